@@ -1,12 +1,42 @@
-from flask import Flask, request, jsonify
-from models import db, Period,Project,Skill,Component, Contributor, Assignment, ContributorSkill
+import click
+import json
+import zlib
+from flask import Flask, Response, request, jsonify, stream_with_context
+from sqlalchemy.orm.exc import StaleDataError
+from models import db, Period,Project,Skill,Component, Contributor, Assignment, ContributorSkill, VersionConflict, record_event, parse_project_fields
 from config import Config
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_cors import CORS
-def create_app():
+from changes import register_listeners, subscribe, subscribe_before_commit
+from chart_store import contributor_charts
+from skill_index import skill_index
+from scheduler import load_period_state, plan_period, check_plan, apply_plan
+import roadmap
+from versions import conditional_response
+from response_cache import response_cache
+from instrumentation import instrumentation
+import period_io
+from live import live_updates
+import serialization
+import transactions
+from replicas import replica_router, READ_PRIMARY_HEADER
+import scenarios
+from scenarios import ScenarioError
+from serialization import week_encoding, encode_charts
+
+# Contributor assignment history paging
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+def create_app(create_tables=None, config=None):
     
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Overrides on top of the environment, used by the tests
+    app.config.update(config or {})
+    serialization.init_app(app)
+    transactions.init_app(app)
 
     # Configure CORS with expanded settings
     CORS(app, resources={
@@ -22,8 +52,11 @@ def create_app():
             "User-Agent",
             "Sec-Fetch-Mode",
             "Sec-Fetch-Site",
-            "Sec-Fetch-Dest"
-        ]
+            "Sec-Fetch-Dest",
+            READ_PRIMARY_HEADER
+        ],
+        # Cross-site clients read the read-your-writes mark to echo it back
+        "expose_headers": [READ_PRIMARY_HEADER]
     }
 })
     
@@ -31,11 +64,40 @@ def create_app():
     
     # Initialize extensions
     db.init_app(app)
+    replica_router.init_app(app)
     
     # Create tables
-    with app.app_context():
-        db.create_all()
+    if create_tables is None:
+        create_tables = app.config['CREATE_TABLES_ON_STARTUP']
+    if create_tables:
+        with app.app_context():
+            db.create_all()
+
+    # Keep in-process materializations in step with committed writes
+    register_listeners()
+    subscribe(contributor_charts.on_commit)
+    skill_index.init_app(app)
+    subscribe(skill_index.on_commit)
+    response_cache.init_app(app)
+    subscribe(response_cache.on_commit)
+    instrumentation.init_app(app)
+    live_updates.init_app(app)
+    subscribe(live_updates.on_commit)
+    subscribe_before_commit(live_updates.before_commit)
+    scenarios.scenarios.init_app(app)
     
+    def component_conflict(component_id):
+        # The write was based on an outdated version; answer with the current
+        # state so the client can rebase
+        db.session.rollback()
+        component = db.session.query(Component).get(component_id)
+        return jsonify({"message": "Component was changed by someone else", "component": component.to_dict()}), 409
+
+    def assignment_conflict(error):
+        db.session.rollback()
+        charts = Assignment.get_week_charts(error.component_ids)
+        return jsonify({"message": "Components were changed by someone else", "components": encode_charts(charts, week_encoding())}), 409
+
     @app.route('/')
     def index():
         return 'Flask PostgreSQL App'
@@ -99,8 +161,13 @@ def create_app():
         data = request.get_json()
         estimated_weeks = data['estimated_weeks']
         component = db.session.query(Component).get(component_id)
-        component.estimated_weeks = estimated_weeks
-        db.session.commit()
+        try:
+            component.check_version(data.get('version'))
+            component.estimated_weeks = estimated_weeks
+            record_event({'type': 'estimated_weeks', 'component_id': str(component.component_id), 'estimated_weeks': estimated_weeks})
+            db.session.commit()
+        except (VersionConflict, StaleDataError):
+            return component_conflict(component_id)
         return jsonify(component.to_dict()), 200
 
     @app.route('/contributor', methods=['POST'])
@@ -125,8 +192,14 @@ def create_app():
         data = request.get_json()
         contributor_id = data['contributor_id']
         component = db.session.query(Component).get(component_id)
-        component.assign_contributor(contributor_id)
-        db.session.commit()
+        try:
+            component.check_version(data.get('version'))
+            component.assign_contributor(contributor_id)
+            db.session.commit()
+        except (VersionConflict, StaleDataError):
+            return component_conflict(component_id)
+        except ValueError as error:
+            return jsonify({"message": str(error)}), 400
         return jsonify(component.to_dict()), 200
 
 
@@ -134,42 +207,127 @@ def create_app():
     @app.route('/assignment', methods=['POST'])
     def create_assignment():
         data = request.get_json()
-        component_id = data['component_id']
-        contributor_id = data['contributor_id']
-        added_weeks = data['added_weeks']
-        removed_weeks = data['removed_weeks']
-        
-        for week in added_weeks:
-            assignment = Assignment(component_id=component_id, contributor_id=contributor_id, week=week)
-            db.session.add(assignment)
-        for week in removed_weeks:
-            assignment = db.session.query(Assignment).filter(Assignment.component_id == component_id, Assignment.contributor_id == contributor_id, Assignment.week == week).first()
-            db.session.delete(assignment)
-        db.session.commit()
-        return jsonify(assignment.to_dict()), 201
+        change = {
+            'component_id': data['component_id'],
+            'contributor_id': data['contributor_id'],
+            'added_weeks': data['added_weeks'],
+            'removed_weeks': data['removed_weeks'],
+            'version': data.get('version')
+        }
+        try:
+            charts = Assignment.apply_week_changes([change])
+            db.session.commit()
+        except VersionConflict as error:
+            return assignment_conflict(error)
+        except ValueError as error:
+            return jsonify({"message": str(error)}), 400
+        encode_charts(charts, week_encoding())
+        return jsonify(charts[0] if charts else {}), 201
+
+    @app.route('/assignments/bulk', methods=['POST'])
+    def create_assignments_bulk():
+        data = request.get_json()
+        changes = data['changes']
+        try:
+            charts = Assignment.apply_week_changes(changes)
+            db.session.commit()
+        except VersionConflict as error:
+            return assignment_conflict(error)
+        except ValueError as error:
+            return jsonify({"message": str(error)}), 400
+        return jsonify({"components": encode_charts(charts, week_encoding())}), 200
+
+    @app.route('/components/batch', methods=['POST'])
+    def apply_component_batch():
+        # All actions are committed together or not at all
+        data = request.get_json()
+        try:
+            components = transactions.apply_batch(data['actions'])
+            db.session.commit()
+        except VersionConflict as error:
+            return assignment_conflict(error)
+        except transactions.BatchError as error:
+            return jsonify({"message": str(error), "index": error.index}), 400
+        return jsonify({"components": encode_charts(components, week_encoding())}), 200
     
     @app.route('/assignments/contributor/<contributor_id>', methods=['GET'])
     def get_assignments(contributor_id):
-        assignments = db.session.query(Assignment).filter(Assignment.contributor_id == contributor_id).order_by(Assignment.week.desc()).all()
-        return jsonify([assignment.to_dict() for assignment in assignments]), 200
+        after = None
+        if 'cursor' in request.args:
+            try:
+                week, component_id = request.args['cursor'].split(':', 1)
+                after = (int(week), component_id)
+            except ValueError:
+                return jsonify({"message": "Invalid cursor"}), 400
+        query = Assignment.contributor_history(contributor_id, request.args.get('period_id'), after)
+
+        if 'limit' in request.args or after is not None:
+            limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+            rows = db.session.execute(query.limit(limit + 1)).all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = f'{rows[-1].week}:{rows[-1].component_id}'
+            return jsonify({"assignments": [row._asdict() for row in rows], "next_cursor": next_cursor}), 200
+
+        # Full history is streamed from a server-side cursor, either as NDJSON
+        # or as the plain JSON list this endpoint has always returned
+        rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                for row in rows:
+                    yield app.json.dumps(row._asdict()) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        def generate():
+            yield '['
+            for index, row in enumerate(rows):
+                yield (',' if index else '') + app.json.dumps(row._asdict())
+            yield ']'
+        return Response(stream_with_context(generate()), mimetype='application/json')
     
     @app.route('/skills', methods=["GET"])
     def get_skills():
-        skills = db.session.query(Skill).all()
-        return jsonify([skill.to_dict() for skill in skills]), 200
+        def build(versions):
+            skills = db.session.query(Skill).all()
+            return jsonify([skill.to_dict() for skill in skills]), 200
+        return conditional_response(['skills'], build)
     
     @app.route('/periods', methods=["GET"])
     def get_periods():
-        periods = db.session.query(Period).all()
-        return jsonify([period.to_dict() for period in periods]), 200
+        def build(versions):
+            periods = db.session.query(Period).all()
+            return jsonify([period.to_dict() for period in periods]), 200
+        return conditional_response(['periods'], build)
     
     @app.route('/period/<period_id>/projects', methods=["GET"])
     def get_projects(period_id):
-        projects = db.session.query(Project).filter(Project.period_id == period_id).order_by(Project.name).all()
+        # fields= and include=summary trim the listing; see parse_project_fields
+        encoding = week_encoding()
+        try:
+            project_fields, component_fields, summary = parse_project_fields(request.args.get('fields'), request.args.get('include'))
+        except ValueError as error:
+            return jsonify({"message": str(error)}), 400
+        if 'assignments' not in component_fields:
+            encoding = None
+        selection = ','.join(sorted(project_fields) + sorted('components.' + field for field in component_fields))
+        variant = None
+        if request.args.get('fields') or summary:
+            variant = f'{zlib.crc32(selection.encode()):08x}' + ('s' if summary else '')
+        if encoding:
+            variant = encoding + ('-' + variant if variant else '')
 
-        response = {"projects": [project.to_response() for project in projects]}
+        def build(versions):
+            period = db.session.query(Period).get(period_id)
+            if period is None:
+                return jsonify({"projects": []}), 200
 
-        return jsonify(response), 200
+            response = period.get_projects_response(project_fields, component_fields, summary)
+            for project in response['projects']:
+                encode_charts(project.get('components', []), encoding)
+            return jsonify(response), 200
+        return conditional_response([period_id, 'contributors', 'skills'], build,
+                                    cache_key=(period_id, 'projects', selection, summary), variant=variant)
 
     @app.route('/component/<component_id>/assignments', methods=["DELETE"])
     def delete_assignments(component_id):
@@ -180,29 +338,295 @@ def create_app():
     
     @app.route('/project/<project_id>', methods=["DELETE"])
     def delete_project(project_id):
-        project = db.session.query(Project).get(project_id)
-        db.session.delete(project)
+        if not Project.delete_many([project_id]):
+            return jsonify({"message": "Project not found"}), 404
         db.session.commit()
         return jsonify({"message": "Project deleted"}), 200
 
     @app.route('/component/<component_id>', methods=["DELETE"])
     def delete_component(component_id):
-        component = db.session.query(Component).get(component_id)
-        db.session.delete(component)
+        if not Component.delete_many([component_id]):
+            return jsonify({"message": "Component not found"}), 404
         db.session.commit()
         return jsonify({"message": "Component deleted"}), 200
+
+    @app.route('/projects/bulk_delete', methods=["POST"])
+    def delete_projects_bulk():
+        deleted = Project.delete_many(request.get_json()['project_ids'])
+        db.session.commit()
+        return jsonify({"deleted": deleted}), 200
+
+    @app.route('/components/bulk_delete', methods=["POST"])
+    def delete_components_bulk():
+        deleted = Component.delete_many(request.get_json()['component_ids'])
+        db.session.commit()
+        return jsonify({"deleted": deleted}), 200
     
     @app.route('/contributors/get_contributors_by_skill/<skill_id>', methods=["GET"])
     def get_contributors_by_skill(skill_id):
-        contributors = db.session.query(Contributor).join(ContributorSkill).filter(ContributorSkill.skill_id == skill_id).all()
-        return jsonify({"contributors": [contributor.to_dict() for contributor in contributors]}), 200
+        # Several comma separated skills match contributors with all of them,
+        # or any of them with match=any. With period_id and from_week (and
+        # optionally to_week) only contributors free for those weeks are kept.
+        match_all = request.args.get('match', 'all') != 'any'
+        contributors = skill_index.contributors_with(skill_id.split(','), match_all=match_all)
+
+        period_id = request.args.get('period_id')
+        if period_id is not None and 'from_week' in request.args:
+            from_week = request.args.get('from_week', type=int)
+            to_week = request.args.get('to_week', from_week, type=int)
+            if from_week is None or to_week is None:
+                return jsonify({"message": "from_week and to_week must be week numbers"}), 400
+            period = db.session.query(Period.start_date, Period.end_date).filter(Period.period_id == period_id).first()
+            if period is None:
+                return jsonify({"message": "Period not found"}), 404
+            num_weeks = Period.weeks_between(period.start_date, period.end_date)
+            if not 0 <= from_week <= to_week < num_weeks:
+                return jsonify({"message": f"from_week and to_week must be in order within the {num_weeks}-week period"}), 400
+            chart = contributor_charts.get_chart(period_id)
+            contributors = [contributor for contributor in contributors
+                            if not any(chart[contributor['contributor_id']]['assignments'][from_week:to_week + 1])]
+        return jsonify({"contributors": contributors}), 200
     
+    @app.route('/period/<period_id>/capacity', methods=["GET"])
+    def get_capacity(period_id):
+        def build(versions):
+            period = db.session.query(Period).get(period_id)
+            if period is None:
+                return jsonify({"message": "Period not found"}), 404
+
+            return jsonify(period.get_capacity()), 200
+        return conditional_response([period_id, 'contributors', 'skills'], build, cache_key=(period_id, 'capacity'))
+
+    @app.route('/period/<period_id>/auto_plan', methods=["POST"])
+    def auto_plan(period_id):
+        data = request.get_json(silent=True) or {}
+        period = db.session.query(Period).get(period_id)
+        if period is None:
+            return jsonify({"message": "Period not found"}), 404
+
+        # With apply and the previewed plan, exactly that plan is written under
+        # the component versions it was computed from; apply alone plans and
+        # writes in one go
+        if data.get('apply') and data.get('plan') is not None:
+            result = {"plan": data['plan'], "applied": True}
+        else:
+            result = plan_period(load_period_state(period), improve=data.get('improve', True))
+            result["applied"] = bool(data.get('apply', False))
+        if result["applied"]:
+            try:
+                check_plan(period, result["plan"])
+                result["components"] = apply_plan(result["plan"])
+                db.session.commit()
+            except VersionConflict as error:
+                return assignment_conflict(error)
+            except ValueError as error:
+                return jsonify({"message": str(error)}), 400
+        return jsonify(result), 200
+
     @app.route('/period/<period_id>/contributor_chart', methods=["GET"])
     def get_contributor_chart(period_id):
+        relevant_skills_only = request.args.get('relevant_skills', 'false').lower() == 'true'
+        def build(versions):
+            contributor_chart = contributor_charts.get_chart(period_id, relevant_skills_only=relevant_skills_only, versions=versions)
+            if contributor_chart is None:
+                return jsonify({"message": "Period not found"}), 404
+
+            return jsonify(contributor_chart), 200
+        return conditional_response([period_id, 'contributors'], build, cache_key=(period_id, 'contributor_chart', relevant_skills_only))
+
+    @app.route('/period/import', methods=["POST"])
+    def import_period():
+        try:
+            if request.mimetype == 'text/csv':
+                plan = period_io.parse_csv(request.get_data(as_text=True))
+            else:
+                plan = period_io.parse_json(request.get_json())
+            summary = period_io.import_plan(*plan)
+        except period_io.PlanError as error:
+            db.session.rollback()
+            return jsonify({"message": str(error)}), 400
+        db.session.commit()
+        return jsonify(summary), 201
+
+    @app.route('/period/<period_id>/export', methods=["GET"])
+    def export_period(period_id):
         period = db.session.query(Period).get(period_id)
-        contributor_chart = period.get_contributor_chart()
-        
-        return jsonify(contributor_chart), 200
+        if period is None:
+            return jsonify({"message": "Period not found"}), 404
+        serialize, mimetype = period_io.FORMATS.get(request.args.get('format', 'json'), period_io.FORMATS['json'])
+        return Response(stream_with_context(serialize(*period_io.export_plan(period))), mimetype=mimetype)
+
+    @app.cli.command('import-period')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    def import_period_command(path):
+        """Load a whole period plan from a JSON or CSV file."""
+        with open(path, newline='') as plan_file:
+            if path.endswith('.csv'):
+                plan = period_io.parse_csv(plan_file.read())
+            else:
+                plan = period_io.parse_json(json.load(plan_file))
+        try:
+            summary = period_io.import_plan(*plan)
+        except period_io.PlanError as error:
+            db.session.rollback()
+            raise click.ClickException(str(error))
+        db.session.commit()
+        click.echo(json.dumps(summary, default=str))
+
+    @app.cli.command('export-period')
+    @click.argument('period_id')
+    @click.option('--format', 'export_format', type=click.Choice(sorted(period_io.FORMATS)), default='json')
+    @click.option('--output', type=click.File('w'), default='-')
+    def export_period_command(period_id, export_format, output):
+        """Stream a period plan as JSON or CSV."""
+        period = db.session.query(Period).get(period_id)
+        if period is None:
+            raise click.ClickException('Period not found')
+        serialize, _ = period_io.FORMATS[export_format]
+        for chunk in serialize(*period_io.export_plan(period)):
+            output.write(chunk)
+
+    @app.route('/period/<period_id>/clone', methods=["POST"])
+    def clone_period(period_id):
+        period = db.session.query(Period).get(period_id)
+        if period is None:
+            return jsonify({"message": "Period not found"}), 404
+        data = request.get_json() or {}
+        if not data.get('name'):
+            return jsonify({"message": "A name is required"}), 400
+        if db.session.query(Period.period_id).filter(Period.name == data['name']).first():
+            return jsonify({"message": f"A period named {data['name']!r} already exists"}), 400
+
+        # Defaults to the same length starting the week after this period
+        try:
+            if 'start_date' in data:
+                start_date = datetime.strptime(data['start_date'], '%Y-%m-%d')
+            else:
+                start_date = period.end_date + timedelta(weeks=1)
+            if 'end_date' in data:
+                end_date = datetime.strptime(data['end_date'], '%Y-%m-%d')
+            else:
+                end_date = start_date + (period.end_date - period.start_date)
+        except (TypeError, ValueError):
+            return jsonify({"message": "Dates must be given as YYYY-MM-DD"}), 400
+        week_offset = data.get('week_offset', 0)
+        if not isinstance(week_offset, int) or isinstance(week_offset, bool):
+            return jsonify({"message": "week_offset must be a whole number of weeks"}), 400
+
+        include_contributors = data.get('include_contributors', True)
+        include_assignments = data.get('include_assignments', False)
+        if include_assignments and not include_contributors:
+            return jsonify({"message": "Assignments can only be copied together with contributors"}), 400
+
+        clone = period.clone(data['name'], start_date, end_date, include_contributors=include_contributors,
+                             include_assignments=include_assignments, week_offset=week_offset)
+        db.session.commit()
+        return jsonify(clone.to_dict()), 201
+
+    @app.route('/period/<period_id>/events', methods=["GET"])
+    def period_events(period_id):
+        return Response(live_updates.stream(period_id), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def scenario_response(scenario, status=200):
+        return jsonify({
+            "scenario_id": scenario.scenario_id,
+            "parent_id": scenario.parent_id,
+            "period_id": scenario.snapshot.period_id,
+            "stale": scenario.is_stale(),
+            "changes": scenario.diff(),
+            "capacity": scenario.capacity()
+        }), status
+
+    def scenario_not_found():
+        return jsonify({"message": "Scenario not found"}), 404
+
+    @app.route('/period/<period_id>/scenarios', methods=["POST"])
+    def create_scenario(period_id):
+        period = db.session.query(Period).get(period_id)
+        if period is None:
+            return jsonify({"message": "Period not found"}), 404
+        return scenario_response(scenarios.scenarios.create(period), 201)
+
+    @app.route('/scenarios/<scenario_id>', methods=["GET"])
+    def get_scenario(scenario_id):
+        scenario = scenarios.scenarios.get(scenario_id)
+        if scenario is None:
+            return scenario_not_found()
+        return scenario_response(scenario)
+
+    @app.route('/scenarios/<scenario_id>', methods=["DELETE"])
+    def discard_scenario(scenario_id):
+        if scenarios.scenarios.discard(scenario_id) is None:
+            return scenario_not_found()
+        return jsonify({"message": "Scenario discarded"}), 200
+
+    @app.route('/scenarios/<scenario_id>/fork', methods=["POST"])
+    def fork_scenario(scenario_id):
+        scenario = scenarios.scenarios.get(scenario_id)
+        if scenario is None:
+            return scenario_not_found()
+        return scenario_response(scenarios.scenarios.fork(scenario), 201)
+
+    @app.route('/scenarios/<scenario_id>/edits', methods=["POST"])
+    def edit_scenario(scenario_id):
+        # Edits are applied in order and all or nothing; the response carries
+        # the charts of the components they touched
+        scenario = scenarios.scenarios.get(scenario_id)
+        if scenario is None:
+            return scenario_not_found()
+        edits = (request.get_json(silent=True) or {}).get('edits')
+        if not isinstance(edits, list):
+            return jsonify({"message": "edits must be a list"}), 400
+        try:
+            scenario.apply(edits)
+        except ScenarioError as error:
+            return jsonify({"message": str(error), "index": error.index}), 400
+        component_ids = dict.fromkeys(component_id for edit in edits
+                                      for component_id in (edit.get('component_id'), edit.get('other_component_id')) if component_id)
+        components = encode_charts([scenario.chart(component_id) for component_id in component_ids], week_encoding())
+        return jsonify({"components": components, "capacity": scenario.capacity()}), 200
+
+    @app.route('/scenarios/<scenario_id>/components', methods=["GET"])
+    def get_scenario_components(scenario_id):
+        scenario = scenarios.scenarios.get(scenario_id)
+        if scenario is None:
+            return scenario_not_found()
+        charts = [scenario.chart(component_id) for component_id in scenario.snapshot.components]
+        return jsonify({"components": encode_charts(charts, week_encoding())}), 200
+
+    @app.route('/scenarios/<scenario_id>/commit', methods=["POST"])
+    def commit_scenario(scenario_id):
+        scenario = scenarios.scenarios.get(scenario_id)
+        if scenario is None:
+            return scenario_not_found()
+        try:
+            charts = scenarios.commit(scenario)
+            db.session.commit()
+        except VersionConflict as error:
+            return assignment_conflict(error)
+        scenarios.scenarios.discard(scenario_id)
+        return jsonify({"components": encode_charts(charts, week_encoding())}), 200
+
+    @app.route('/roadmap', methods=["GET"])
+    def get_roadmap():
+        try:
+            start = datetime.strptime(request.args['from'], '%Y-%m-%d')
+            end = datetime.strptime(request.args['to'], '%Y-%m-%d')
+        except (KeyError, ValueError):
+            return jsonify({"message": "from and to must be dates (YYYY-MM-DD)"}), 400
+        if end < start or (end - start).days // 7 >= roadmap.MAX_ROADMAP_WEEKS:
+            return jsonify({"message": f"The range must run forward and span at most {roadmap.MAX_ROADMAP_WEEKS} weeks"}), 400
+
+        periods = roadmap.overlapping_periods(start, end)
+        def build(versions):
+            return jsonify(roadmap.build_roadmap(periods, start, end)), 200
+        scopes = [str(period.period_id) for period in periods] + ['periods', 'contributors', 'skills']
+        return conditional_response(scopes, build, cache_key=('roadmap', request.args['from'], request.args['to']))
+
+    @app.route('/cache/stats', methods=["GET"])
+    def get_cache_stats():
+        return jsonify(response_cache.stats()), 200
     
 
     
@@ -0,0 +1,392 @@
+"""Latency and throughput benchmark for every route in app.py but the
+/period/<id>/events stream, which holds its connection open.
+
+    python benchmark.py --requests 200 --concurrency 8 --output bench-HEAD.json
+    python benchmark.py --compare bench-baseline.json
+
+Loads synthetic data (see the scale flags) into DATABASE_URL and commits it,
+then drives each route from a thread pool through the Flask test client and
+removes the data again. Point DATABASE_URL at a scratch database. With
+--base-url the requests go over HTTP to a running server instead; that server
+must use the same database, and per-request query counts are not available.
+Scenarios live in the serving process, so the scenario routes create theirs
+through the same transport right before they are measured.
+"""
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import event
+from app import create_app
+from models import db, Period, Skill, Contributor
+import synthetic
+
+_local = threading.local()
+
+class Fixture:
+    def __init__(self, data):
+        self.data = data
+        self.period_ids = [row['period_id'] for row in data['periods']]
+        self.skill_ids = [row['skill_id'] for row in data['skills']]
+        self.contributor_ids = [row['contributor_id'] for row in data['contributors']]
+        self.assigned = [row for row in data['components'] if row['contributor_id']]
+        self.contributors_by_skill = {}
+        for row in data['contributor_skills']:
+            self.contributors_by_skill.setdefault(row['skill_id'], []).append(row['contributor_id'])
+        self.lock = threading.Lock()
+        self.delete_targets = {'projects': [], 'components': [], 'scenarios': []}
+        self.scenario_ids = []
+
+        # The first period in the import format, loaded again under new names
+        names = {row['contributor_id']: f"{row['first_name']} {row['last_name']}" for row in data['contributors']}
+        skills = {row['skill_id']: row['name'] for row in data['skills']}
+        projects = {row['project_id']: row['name'] for row in data['projects'] if row['period_id'] == self.period_ids[0]}
+        weeks = {}
+        for row in data['assignments']:
+            weeks.setdefault(row['component_id'], []).append(row['week'])
+        self.first_period_components = [row for row in data['components'] if row['project_id'] in projects]
+        self.import_components = [{
+            'project': projects[row['project_id']],
+            'name': row['name'],
+            'skill': skills[row['skill_id']],
+            'estimated_weeks': row['estimated_weeks'],
+            'contributor': names.get(row['contributor_id']),
+            'weeks': weeks.get(row['component_id'], [])
+        } for row in self.first_period_components]
+        self.date_range = (min(row['start_date'] for row in data['periods']).strftime('%Y-%m-%d'),
+                           max(row['end_date'] for row in data['periods']).strftime('%Y-%m-%d'))
+
+    def pop_target(self, kind):
+        with self.lock:
+            return self.delete_targets[kind].pop() if self.delete_targets[kind] else None
+
+    def pop_targets(self, kind, count):
+        with self.lock:
+            targets = self.delete_targets[kind][-count:]
+            del self.delete_targets[kind][-count:]
+            return targets
+
+def _rng():
+    if not hasattr(_local, 'rng'):
+        _local.rng = random.Random()
+    return _local.rng
+
+def _period(fixture):
+    return _rng().choice(fixture.period_ids)
+
+def _component(fixture):
+    return _rng().choice(fixture.assigned)
+
+def _unique(prefix):
+    return f'{prefix} {time.time_ns()} {_rng().getrandbits(32)}'
+
+def _scenario(fixture):
+    return _rng().choice(fixture.scenario_ids)
+
+# Rows created by the write routes carry this prefix so they can be removed
+BENCH_PREFIX = 'Bench'
+
+# Projects or components removed by one bulk delete request
+BULK_DELETE_SIZE = 5
+
+# Scenarios the read and edit routes pick from; a few, so scenarios the fork
+# route adds do not evict them from the store
+SHARED_SCENARIOS = 8
+
+# name -> (method, build(fixture) -> (url, json))
+ENDPOINTS = {
+    'index': ('GET', lambda f: ('/', None)),
+    'get_skills': ('GET', lambda f: ('/skills', None)),
+    'get_periods': ('GET', lambda f: ('/periods', None)),
+    'get_projects': ('GET', lambda f: (f'/period/{_period(f)}/projects', None)),
+    'get_contributor_chart': ('GET', lambda f: (f'/period/{_period(f)}/contributor_chart', None)),
+    'get_capacity': ('GET', lambda f: (f'/period/{_period(f)}/capacity', None)),
+    'get_assignments': ('GET', lambda f: (f'/assignments/contributor/{_rng().choice(f.contributor_ids)}', None)),
+    'get_contributors_by_skill': ('GET', lambda f: (f'/contributors/get_contributors_by_skill/{_rng().choice(f.skill_ids)}', None)),
+    'get_cache_stats': ('GET', lambda f: ('/cache/stats', None)),
+    'get_roadmap': ('GET', lambda f: (f'/roadmap?from={f.date_range[0]}&to={f.date_range[1]}', None)),
+    'export_period_json': ('GET', lambda f: (f'/period/{_period(f)}/export', None)),
+    'export_period_csv': ('GET', lambda f: (f'/period/{_period(f)}/export?format=csv', None)),
+    'auto_plan_dry_run': ('POST', lambda f: (f'/period/{_period(f)}/auto_plan', {})),
+    'create_period': ('POST', lambda f: ('/period', {'name': _unique(BENCH_PREFIX), 'start_date': '2030-01-06', 'end_date': '2030-03-31'})),
+    'create_skill': ('POST', lambda f: ('/skill', {'name': _unique(f'{BENCH_PREFIX} skill')})),
+    'create_contributor': ('POST', lambda f: ('/contributor', {'first_name': BENCH_PREFIX, 'last_name': _unique('Contributor'),
+                                                             'skill_ids': [_rng().choice(f.skill_ids)]})),
+    'create_project': ('POST', lambda f: ('/project', {'name': _unique('Project'), 'description': '', 'period_id': _period(f),
+                                                     'components': [{'skill_id': _rng().choice(f.skill_ids), 'estimated_weeks': 3}]})),
+    'create_component': ('POST', lambda f: ('/component', {'name': _unique('Component'), 'description': '', 'skill_id': _rng().choice(f.skill_ids),
+                                                         'project_id': _rng().choice(f.data['projects'])['project_id'], 'estimated_weeks': 2})),
+    'update_estimated_weeks': ('PUT', lambda f: (f"/component/{_component(f)['component_id']}/estimated_weeks", {'estimated_weeks': _rng().randint(1, 6)})),
+    'assign_contributor': ('POST', lambda f: _assign_contributor(f)),
+    'create_assignment': ('POST', lambda f: _create_assignment(f)),
+    'create_assignments_bulk': ('POST', lambda f: ('/assignments/bulk', {'changes': [_create_assignment(f)[1] for _ in range(10)]})),
+    'apply_component_batch': ('POST', lambda f: ('/components/batch', {'actions': [_batch_action(f) for _ in range(10)]})),
+    'import_period': ('POST', lambda f: ('/period/import', {'period': {'name': _unique(BENCH_PREFIX), 'start_date': '2030-01-06', 'end_date': '2030-03-31'},
+                                                           'components': f.import_components})),
+    'clone_period': ('POST', lambda f: (f'/period/{_period(f)}/clone', {'name': _unique(BENCH_PREFIX)})),
+    'create_scenario': ('POST', lambda f: (f'/period/{f.period_ids[0]}/scenarios', {})),
+    'get_scenario': ('GET', lambda f: (f'/scenarios/{_scenario(f)}', None)),
+    'get_scenario_components': ('GET', lambda f: (f'/scenarios/{_scenario(f)}/components', None)),
+    'edit_scenario': ('POST', lambda f: (f'/scenarios/{_scenario(f)}/edits', {'edits': [_scenario_edit(f)]})),
+    'fork_scenario': ('POST', lambda f: (f'/scenarios/{_scenario(f)}/fork', None)),
+    'commit_scenario': ('POST', lambda f: (f"/scenarios/{f.pop_target('scenarios')}/commit", None)),
+    'discard_scenario': ('DELETE', lambda f: (f"/scenarios/{f.pop_target('scenarios')}", None)),
+    'auto_plan_apply': ('POST', lambda f: (f'/period/{_period(f)}/auto_plan', {'apply': True})),
+    'delete_assignments': ('DELETE', lambda f: (f"/component/{_component(f)['component_id']}/assignments", None)),
+    'delete_component': ('DELETE', lambda f: (f"/component/{f.pop_target('components')}", None)),
+    'delete_project': ('DELETE', lambda f: (f"/project/{f.pop_target('projects')}", None)),
+    'delete_components_bulk': ('POST', lambda f: ('/components/bulk_delete', {'component_ids': f.pop_targets('components', BULK_DELETE_SIZE)})),
+    'delete_projects_bulk': ('POST', lambda f: ('/projects/bulk_delete', {'project_ids': f.pop_targets('projects', BULK_DELETE_SIZE)})),
+}
+
+def _assign_contributor(fixture):
+    component = _component(fixture)
+    contributor_id = _rng().choice(fixture.contributors_by_skill[component['skill_id']])
+    return f"/component/{component['component_id']}/assign_contributor", {'contributor_id': contributor_id}
+
+def _create_assignment(fixture):
+    component = _component(fixture)
+    week = _rng().randrange(13)
+    added, removed = ([week], []) if _rng().random() < 0.5 else ([], [week])
+    return '/assignment', {'component_id': component['component_id'], 'contributor_id': component['contributor_id'],
+                           'added_weeks': added, 'removed_weeks': removed}
+
+def _batch_action(fixture):
+    component = _component(fixture)
+    if _rng().random() < 0.5:
+        return {'type': 'estimated_weeks', 'component_id': component['component_id'], 'estimated_weeks': _rng().randint(1, 6)}
+    return {'type': 'weeks', 'component_id': component['component_id'], 'contributor_id': component['contributor_id'],
+            'added_weeks': [_rng().randrange(13)], 'removed_weeks': []}
+
+def _scenario_edit(fixture):
+    component = _rng().choice(fixture.first_period_components)
+    if component['contributor_id'] and _rng().random() < 0.5:
+        return {'type': 'weeks', 'component_id': component['component_id'], 'added_weeks': [_rng().randrange(13)]}
+    return {'type': 'estimated_weeks', 'component_id': component['component_id'], 'estimated_weeks': _rng().randint(1, 6)}
+
+def prepare_scenarios(transport, fixture, count, edited=False):
+    # Made through the transport since they live in the serving process. An
+    # edited scenario changes a component no other one touches, where the
+    # period has enough, so committing them does not conflict.
+    period_id = fixture.period_ids[0]
+    components = fixture.first_period_components
+    scenario_ids = []
+    for index in range(count):
+        scenario_id = transport.json('POST', f'/period/{period_id}/scenarios', {})['scenario_id']
+        if edited:
+            transport.json('POST', f'/scenarios/{scenario_id}/edits', {'edits': [{
+                'type': 'estimated_weeks', 'component_id': components[index % len(components)]['component_id'], 'estimated_weeks': index % 6 + 1
+            }]})
+        scenario_ids.append(scenario_id)
+    fixture.scenario_ids = scenario_ids
+    fixture.delete_targets['scenarios'] = list(scenario_ids)
+
+# name -> prepare(transport, fixture, count), run right before the endpoint
+# is measured with the number of requests it will make
+PREPARE = {
+    'get_scenario': lambda transport, f, count: prepare_scenarios(transport, f, SHARED_SCENARIOS),
+    'get_scenario_components': lambda transport, f, count: prepare_scenarios(transport, f, SHARED_SCENARIOS),
+    'edit_scenario': lambda transport, f, count: prepare_scenarios(transport, f, SHARED_SCENARIOS),
+    'fork_scenario': lambda transport, f, count: prepare_scenarios(transport, f, SHARED_SCENARIOS),
+    'commit_scenario': lambda transport, f, count: prepare_scenarios(transport, f, count, edited=True),
+    'discard_scenario': lambda transport, f, count: prepare_scenarios(transport, f, count),
+}
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class LocalTransport:
+    def __init__(self, app):
+        self.app = app
+        self._clients = threading.local()
+
+    def _client(self):
+        if not hasattr(self._clients, 'client'):
+            self._clients.client = self.app.test_client()
+        return self._clients.client
+
+    def request(self, method, url, body):
+        _local.queries = 0
+        response = self._client().open(url, method=method, json=body)
+        # Streamed bodies are only produced while they are read
+        response.get_data()
+        response.close()
+        return response.status_code, _local.queries
+
+    def json(self, method, url, body):
+        return self._client().open(url, method=method, json=body).json
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, url, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + url, data=data, method=method, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as error:
+            return error.code, None
+
+    def json(self, method, url, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + url, data=data, method=method, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _local.queries = getattr(_local, 'queries', 0) + 1
+
+def prepare_delete_targets(fixture, count):
+    # Dedicated projects and components for the delete routes to consume
+    period_id = fixture.period_ids[0]
+    skill_id = fixture.skill_ids[0]
+    extra = {key: [] for key in ('skills', 'contributors', 'contributor_skills', 'periods', 'projects', 'components', 'assignments')}
+
+    def add_project(name):
+        project_id = str(uuid.uuid4())
+        extra['projects'].append({'project_id': project_id, 'name': name, 'description': '', 'period_id': period_id})
+        return project_id
+
+    def add_component(name, project_id):
+        component_id = str(uuid.uuid4())
+        extra['components'].append({'component_id': component_id, 'name': name, 'project_id': project_id,
+                                    'skill_id': skill_id, 'estimated_weeks': 1, 'contributor_id': None, 'week_mask': 0})
+        return component_id
+
+    holder_id = add_project('Delete targets')
+    for index in range(count):
+        project_id = add_project(f'Delete target {index}')
+        add_component(f'Delete target {index}', project_id)
+        fixture.delete_targets['projects'].append(project_id)
+        fixture.delete_targets['components'].append(add_component(f'Delete target {index}', holder_id))
+    synthetic.load(extra)
+
+def run_endpoint(transport, fixture, name, args):
+    method, build = ENDPOINTS[name]
+    if name in PREPARE:
+        PREPARE[name](transport, fixture, args.warmup + args.requests)
+    latencies = []
+    queries = []
+    statuses = Counter()
+
+    def one(measure):
+        url, body = build(fixture)
+        start = time.perf_counter()
+        status, query_count = transport.request(method, url, body)
+        elapsed = time.perf_counter() - start
+        if measure:
+            latencies.append(elapsed * 1000)
+            statuses[status] += 1
+            if query_count is not None:
+                queries.append(query_count)
+
+    for _ in range(args.warmup):
+        one(False)
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(lambda _: one(True), range(args.requests)))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        'method': method,
+        'requests': len(latencies),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'requests_per_sec': len(latencies) / wall if wall else None,
+        'queries_per_request': (sum(queries) / len(queries)) if queries else None,
+        'max_queries': max(queries) if queries else None
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results, baseline=None):
+    print(f"{'endpoint':28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8}  statuses")
+    for name, result in results['endpoints'].items():
+        line = f"{name:28} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['requests_per_sec']:9.1f} "
+        line += f"{result['queries_per_request']:8.1f}" if result['queries_per_request'] is not None else f"{'-':>8}"
+        line += f"  {result['statuses']}"
+        previous = (baseline or {}).get('endpoints', {}).get(name)
+        if previous and previous.get('p95_ms'):
+            line += f"  p95 {100 * (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms']:+.0f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--periods', type=int, default=4)
+    parser.add_argument('--projects-per-period', type=int, default=50)
+    parser.add_argument('--components-per-project', type=int, default=5)
+    parser.add_argument('--contributors', type=int, default=100)
+    parser.add_argument('--skills', type=int, default=8)
+    parser.add_argument('--density', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=100, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--endpoints', nargs='*', default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument('--base-url')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run to diff p95 against')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        data = synthetic.generate(periods=args.periods, projects_per_period=args.projects_per_period,
+                                  components_per_project=args.components_per_project, contributors=args.contributors,
+                                  skills=args.skills, density=args.density, seed=args.seed)
+        synthetic.load(data)
+        fixture = Fixture(data)
+        if any(name.startswith('delete_') for name in args.endpoints):
+            prepare_delete_targets(fixture, (args.requests + args.warmup) * (1 + BULK_DELETE_SIZE))
+        db.session.commit()
+        event.listen(db.engine, 'before_cursor_execute', _count_query)
+
+    transport = HttpTransport(args.base_url) if args.base_url else LocalTransport(app)
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'scale': {key: getattr(args, key) for key in ('periods', 'projects_per_period', 'components_per_project', 'contributors', 'skills', 'density', 'seed')},
+        'concurrency': args.concurrency,
+        'endpoints': {}
+    }
+    try:
+        for name in args.endpoints:
+            results['endpoints'][name] = run_endpoint(transport, fixture, name, args)
+    finally:
+        with app.app_context():
+            bench_periods = [row.period_id for row in db.session.query(Period.period_id).filter(Period.name.startswith(BENCH_PREFIX))]
+            bench_skills = [row.skill_id for row in db.session.query(Skill.skill_id).filter(Skill.name.startswith(BENCH_PREFIX))]
+            bench_contributors = [row.contributor_id for row in db.session.query(Contributor.contributor_id).filter(Contributor.first_name == BENCH_PREFIX)]
+            synthetic.cleanup(fixture.period_ids + bench_periods, fixture.contributor_ids + bench_contributors, fixture.skill_ids + bench_skills)
+            db.session.commit()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+if __name__ == '__main__':
+    main()
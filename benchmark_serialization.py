@@ -0,0 +1,79 @@
+"""Compares JSON providers and week chart encodings on a large projects view.
+
+    python benchmark_serialization.py
+    python benchmark_serialization.py --projects 400 --components 5 --weeks 26
+
+Builds a /period/<id>/projects payload in memory and times jsonify under each
+provider for every week encoding, reporting body size raw and gzipped.
+"""
+import argparse
+import copy
+import gzip
+import random
+import time
+import uuid
+from flask import Flask
+import serialization
+from serialization import PROVIDERS, encode_charts
+
+def make_payload(num_projects, components_per_project, num_weeks, density, seed=0):
+    rng = random.Random(seed)
+    projects = []
+    for project_index in range(num_projects):
+        components = []
+        for component_index in range(components_per_project):
+            chart = [rng.random() < density for _ in range(num_weeks)]
+            components.append({
+                'component_id': uuid.uuid4(),
+                'component_name': f'Project {project_index} Component {component_index}',
+                'estimated_weeks': rng.randint(1, 6),
+                'skill': 'Backend',
+                'contributor_id': uuid.uuid4(),
+                'contributor_name': 'First Last',
+                'assigned_weeks': sum(chart),
+                'assignments': chart
+            })
+        projects.append({'project_id': uuid.uuid4(), 'project_name': f'Project {project_index}', 'components': components})
+    return {'projects': projects}
+
+def encode(payload, encoding):
+    payload = copy.deepcopy(payload)
+    for project in payload['projects']:
+        encode_charts(project['components'], encoding)
+    return payload
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=400)
+    parser.add_argument('--components', type=int, default=5)
+    parser.add_argument('--weeks', type=int, default=13)
+    parser.add_argument('--density', type=float, default=0.3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.projects, args.components, args.weeks, args.density)
+    print(f'{args.projects} projects x {args.components} components x {args.weeks} weeks')
+    print(f'{"provider":10} {"weeks":6} {"serialize":>12} {"bytes":>10} {"gzip":>10}')
+    for name, provider_class in PROVIDERS.items():
+        if name == 'orjson' and serialization.orjson is None:
+            print('orjson     not installed')
+            continue
+        app = Flask(__name__)
+        app.json = provider_class(app)
+        for encoding in (None, *serialization.WEEK_ENCODINGS):
+            encoded = encode(payload, encoding)
+            with app.app_context():
+                body = app.json.response(encoded).get_data()
+                elapsed = best_of(lambda: app.json.response(encoded).get_data(), args.repeat)
+            print(f'{name:10} {encoding or "bool":6} {elapsed * 1000:9.2f} ms {len(body):10} {len(gzip.compress(body)):10}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Compares the assignments-rows layout with Component.week_mask.
+
+    python benchmark_week_bitmap.py                  # in-memory decode only
+    python benchmark_week_bitmap.py --db             # also time both read paths
+                                                     # against DATABASE_URL
+
+The --db run loads a scratch period inside a transaction that is rolled back.
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from utils import weeks_to_mask, mask_to_chart, count_weeks
+
+# Approximate on-disk row sizes in Postgres: 23 byte tuple header plus
+# alignment, two uuids and an int per assignment vs one bigint per component.
+ASSIGNMENT_ROW_BYTES = 24 + 16 + 16 + 4 + 4
+WEEK_MASK_BYTES = 8
+
+def make_layouts(num_components, num_weeks, density, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    masks = {}
+    for _ in range(num_components):
+        component_id = str(uuid.uuid4())
+        weeks = [week for week in range(num_weeks) if rng.random() < density]
+        rows.extend((component_id, week) for week in weeks)
+        masks[component_id] = weeks_to_mask(weeks)
+    return rows, masks
+
+def decode_rows(rows, component_ids, num_weeks):
+    charts = {component_id: [False] * num_weeks for component_id in component_ids}
+    for component_id, week in rows:
+        charts[component_id][week] = True
+    return {component_id: (chart, sum(chart)) for component_id, chart in charts.items()}
+
+def decode_masks(masks, num_weeks):
+    return {component_id: (mask_to_chart(mask, num_weeks), count_weeks(mask)) for component_id, mask in masks.items()}
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def bench_memory(args):
+    rows, masks = make_layouts(args.components, args.weeks, args.density)
+    assert decode_rows(rows, masks.keys(), args.weeks) == decode_masks(masks, args.weeks)
+
+    rows_time = best_of(lambda: decode_rows(rows, masks.keys(), args.weeks), args.repeat)
+    masks_time = best_of(lambda: decode_masks(masks, args.weeks), args.repeat)
+    print(f'{args.components} components x {args.weeks} weeks, {len(rows)} assignment rows')
+    print(f'  rows   decode {rows_time * 1000:8.2f} ms   storage ~{len(rows) * ASSIGNMENT_ROW_BYTES / 1024:8.0f} KiB')
+    print(f'  bitmap decode {masks_time * 1000:8.2f} ms   storage ~{len(masks) * WEEK_MASK_BYTES / 1024:8.0f} KiB')
+
+def bench_database(args):
+    from sqlalchemy.dialects.postgresql import insert
+    from app import create_app
+    from models import db, Period, Project, Skill, Component, Assignment
+
+    app = create_app()
+    with app.app_context():
+        rng = random.Random(0)
+        start_date = datetime(2000, 1, 3)
+        period = Period(name=f'bitmap-bench-{uuid.uuid4()}', start_date=start_date, end_date=start_date + timedelta(weeks=args.weeks - 1))
+        skill = Skill(name='bitmap-bench')
+        db.session.add_all([period, skill])
+        db.session.flush()
+
+        projects = [{'project_id': str(uuid.uuid4()), 'name': f'Project {i}', 'description': '', 'period_id': period.period_id}
+                    for i in range(max(1, args.components // 5))]
+        components = []
+        assignments = []
+        for i in range(args.components):
+            component_id = str(uuid.uuid4())
+            weeks = [week for week in range(args.weeks) if rng.random() < args.density]
+            components.append({'component_id': component_id, 'name': f'Component {i}', 'project_id': projects[i % len(projects)]['project_id'],
+                               'skill_id': skill.skill_id, 'estimated_weeks': len(weeks), 'week_mask': weeks_to_mask(weeks)})
+            assignments.extend({'component_id': component_id, 'week': week} for week in weeks)
+        db.session.execute(insert(Project), projects)
+        db.session.execute(insert(Component), components)
+        db.session.execute(insert(Assignment), assignments)
+        db.session.flush()
+
+        for use_week_bitmap in (False, True):
+            app.config['USE_WEEK_BITMAP'] = use_week_bitmap
+            elapsed = best_of(period.get_projects_response, args.repeat)
+            label = 'bitmap' if use_week_bitmap else 'rows  '
+            print(f'  {label} get_projects_response {elapsed * 1000:8.2f} ms')
+        db.session.rollback()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--components', type=int, default=10000)
+    parser.add_argument('--weeks', type=int, default=13)
+    parser.add_argument('--density', type=float, default=0.4)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', action='store_true')
+    args = parser.parse_args()
+
+    bench_memory(args)
+    if args.db:
+        bench_database(args)
@@ -0,0 +1,118 @@
+from sqlalchemy import event
+from models import db, Period, Project, Skill, Component, Assignment, Contributor, ContributorSkill, ChangeVersion
+
+# Callbacks run after every successful commit with a dict of the component and
+# contributor ids the transaction touched, the change versions it bumped and
+# the events recorded with models.record_event.
+_subscribers = []
+
+# Callbacks run inside the committing transaction with the session and the
+# same dict, for work that must commit or roll back together with the writes.
+_commit_hooks = []
+
+def subscribe(callback):
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+def subscribe_before_commit(callback):
+    if callback not in _commit_hooks:
+        _commit_hooks.append(callback)
+
+def _touched(session, key):
+    return session.info.setdefault(key, set())
+
+def _after_flush(session, flush_context):
+    components = _touched(session, 'touched_components')
+    contributors = _touched(session, 'touched_contributors')
+    projects = _touched(session, 'touched_projects')
+    periods = _touched(session, 'touched_periods')
+    scopes = _touched(session, 'touched_scopes')
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Assignment):
+            components.add(obj.component_id)
+        elif isinstance(obj, Component):
+            components.add(obj.component_id)
+            projects.add(obj.project_id)
+        elif isinstance(obj, Project):
+            periods.add(obj.period_id)
+        elif isinstance(obj, Period):
+            periods.add(obj.period_id)
+            scopes.add('periods')
+        elif isinstance(obj, Skill):
+            scopes.add('skills')
+        elif isinstance(obj, (Contributor, ContributorSkill)):
+            contributors.add(obj.contributor_id)
+            scopes.add('contributors')
+
+def _resolve_periods(session):
+    periods = {period_id for period_id in session.info.get('touched_periods', ()) if period_id}
+    components = session.info.get('touched_components')
+    projects = {project_id for project_id in session.info.get('touched_projects', ()) if project_id}
+    if components:
+        periods.update(row.period_id for row in (session.query(Project.period_id)
+        .join(Component, Component.project_id == Project.project_id)
+        .filter(Component.component_id.in_(components))
+        .distinct()))
+    if projects:
+        periods.update(row.period_id for row in (session.query(Project.period_id)
+        .filter(Project.project_id.in_(projects))
+        .distinct()))
+    return {str(period_id) for period_id in periods if period_id}
+
+def _resolve_event_periods(session):
+    events = session.info.get('pending_events', ())
+    unresolved = {change['component_id'] for change in events if not change.get('period_id') and change.get('component_id')}
+    periods = {}
+    if unresolved:
+        periods = {str(row.component_id): str(row.period_id) for row in (session.query(Component.component_id, Project.period_id)
+        .join(Project, Component.project_id == Project.project_id)
+        .filter(Component.component_id.in_(unresolved)))}
+    for change in events:
+        if change.get('period_id'):
+            change['period_id'] = str(change['period_id'])
+        else:
+            change['period_id'] = periods.get(change.get('component_id'))
+
+def _before_commit(session):
+    # Flush first so objects added right before commit are tracked too
+    session.flush()
+    scopes = _resolve_periods(session) | session.info.get('touched_scopes', set())
+    if scopes:
+        session.info['bumped_versions'] = ChangeVersion.bump(scopes)
+    _resolve_event_periods(session)
+    changes = _changes(session.info.get)
+    if _has_changes(changes):
+        for callback in _commit_hooks:
+            callback(session, changes)
+
+def _changes(take):
+    return {
+        'components': take('touched_components', set()),
+        'contributors': take('touched_contributors', set()),
+        'versions': take('bumped_versions', {}),
+        'events': take('pending_events', [])
+    }
+
+def _has_changes(changes):
+    return changes['components'] or changes['contributors'] or changes['versions']
+
+def _after_commit(session):
+    changes = _changes(session.info.pop)
+    _after_rollback(session)
+    if not _has_changes(changes):
+        return
+    for callback in _subscribers:
+        callback(changes)
+
+def _after_rollback(session):
+    for key in ('touched_components', 'touched_contributors', 'touched_projects',
+                'touched_periods', 'touched_scopes', 'bumped_versions', 'pending_events'):
+        session.info.pop(key, None)
+
+def register_listeners():
+    if event.contains(db.session, 'after_flush', _after_flush):
+        return
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'before_commit', _before_commit)
+    event.listen(db.session, 'after_commit', _after_commit)
+    event.listen(db.session, 'after_rollback', _after_rollback)
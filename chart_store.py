@@ -0,0 +1,176 @@
+import threading
+from models import db, Period, Project, Component, Contributor, ContributorSkill, Assignment, ChangeVersion
+from replicas import primary_reads
+
+class ContributorChartStore:
+    """In-process contributor x week chart of component names per period.
+
+    A period is built from the database on first read and afterwards only the
+    components and contributors touched by committed transactions are
+    re-read. Each worker process keeps its own copy; a change version that
+    moved without this process seeing the commit means another worker wrote,
+    and the affected period or contributor list is rebuilt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._periods = {}
+        self._component_periods = {}
+        self._contributors = None
+        self._versions = {}
+        self._pending_components = set()
+        self._pending_contributors = set()
+
+    def on_commit(self, changes):
+        with self._lock:
+            self._pending_components.update(str(component_id) for component_id in changes['components'])
+            self._pending_contributors.update(str(contributor_id) for contributor_id in changes['contributors'])
+            for scope, version in changes['versions'].items():
+                if scope not in self._versions:
+                    continue
+                if self._versions[scope] == version - 1:
+                    self._versions[scope] = version
+                else:
+                    self._invalidate(scope)
+
+    def clear(self):
+        with self._lock:
+            self._periods = {}
+            self._component_periods = {}
+            self._contributors = None
+            self._versions = {}
+            self._pending_components = set()
+            self._pending_contributors = set()
+
+    def _invalidate(self, scope):
+        self._versions.pop(scope, None)
+        if scope == 'contributors':
+            self._contributors = None
+            return
+        period = self._periods.pop(scope, None)
+        if period is not None:
+            for component_id in period['components']:
+                self._component_periods.pop(component_id, None)
+
+    def get_chart(self, period_id, relevant_skills_only=False, versions=None):
+        scope = str(period_id)
+        if versions is None:
+            versions = ChangeVersion.get_versions([scope, 'contributors'])
+        with self._lock, primary_reads():
+            self._apply_pending()
+            for stale in [key for key in (scope, 'contributors') if self._versions.get(key) != versions[key]]:
+                self._invalidate(stale)
+
+            if self._contributors is None:
+                self._contributors = self._load_contributors()
+                self._versions['contributors'] = versions['contributors']
+            period = self._periods.get(scope)
+            if period is None:
+                period = self._build_period(period_id)
+                if period is None:
+                    return None
+                self._versions[scope] = versions[scope]
+
+            skill_ids = {str(component['skill_id']) for component in period['components'].values()}
+            contributor_chart = {}
+            for contributor_id, contributor in self._contributors.items():
+                weeks = period['chart'].get(contributor_id)
+                if relevant_skills_only and weeks is None and not contributor['skill_ids'] & skill_ids:
+                    continue
+                contributor_chart[contributor_id] = {
+                    "assignments": [list(names) for names in weeks] if weeks else [[] for _ in range(period['num_weeks'])],
+                    "name": contributor['name']
+                }
+            return contributor_chart
+
+    def _load_contributors(self, contributor_ids=None):
+        query = (db.session.query(Contributor.contributor_id, Contributor.first_name, Contributor.last_name, ContributorSkill.skill_id)
+        .outerjoin(ContributorSkill, Contributor.contributor_id == ContributorSkill.contributor_id))
+        if contributor_ids is not None:
+            query = query.filter(Contributor.contributor_id.in_(contributor_ids))
+
+        contributors = {}
+        for row in query.all():
+            contributor = contributors.setdefault(str(row.contributor_id), {
+                "name": row.first_name + " " + row.last_name,
+                "skill_ids": set()
+            })
+            if row.skill_id is not None:
+                contributor["skill_ids"].add(str(row.skill_id))
+        return contributors
+
+    def _component_rows(self, filter_clause):
+        return (db.session.query(
+            Component.component_id,
+            Component.name,
+            Component.skill_id,
+            Project.period_id,
+            Assignment.week,
+            Assignment.contributor_id
+        )
+        .join(Project, Component.project_id == Project.project_id)
+        .outerjoin(Assignment, Component.component_id == Assignment.component_id)
+        .filter(filter_clause)
+        .all())
+
+    def _add_rows(self, rows):
+        for row in rows:
+            period_id = str(row.period_id)
+            component_id = str(row.component_id)
+            period = self._periods.get(period_id)
+            if period is None:
+                continue
+            component = period['components'].setdefault(component_id, {
+                "name": row.name,
+                "skill_id": row.skill_id,
+                "weeks": []
+            })
+            self._component_periods[component_id] = period_id
+            if row.week is None or row.contributor_id is None:
+                continue
+            contributor_id = str(row.contributor_id)
+            component["weeks"].append((row.week, contributor_id))
+            chart = period['chart'].setdefault(contributor_id, [[] for _ in range(period['num_weeks'])])
+            chart[row.week].append(row.name)
+
+    def _remove_component(self, component_id):
+        period_id = self._component_periods.pop(component_id, None)
+        period = self._periods.get(period_id)
+        if period is None:
+            return
+        component = period['components'].pop(component_id, None)
+        if component is None:
+            return
+        for week, contributor_id in component["weeks"]:
+            period['chart'][contributor_id][week].remove(component["name"])
+
+    def _build_period(self, period_id):
+        period = db.session.query(Period).get(period_id)
+        if period is None:
+            return None
+
+        self._periods[str(period_id)] = {
+            "num_weeks": period.num_weeks,
+            "components": {},
+            "chart": {}
+        }
+        self._add_rows(self._component_rows(Project.period_id == period_id))
+        return self._periods[str(period_id)]
+
+    def _apply_pending(self):
+        if self._pending_contributors and self._contributors is not None:
+            contributor_ids = self._pending_contributors
+            fresh = self._load_contributors(contributor_ids)
+            for contributor_id in contributor_ids:
+                self._contributors.pop(contributor_id, None)
+            self._contributors.update(fresh)
+        self._pending_contributors = set()
+
+        if self._pending_components and self._periods:
+            component_ids = self._pending_components
+            for component_id in component_ids:
+                self._remove_component(component_id)
+            self._add_rows(self._component_rows(Component.component_id.in_(component_ids)))
+        self._pending_components = set()
+
+contributor_charts = ContributorChartStore()
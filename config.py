@@ -3,7 +3,61 @@ import os
 
 load_dotenv()
 
+def _engine_options(database_url):
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    # SQLite stand-ins use SQLAlchemy's single-connection pools, which take no
+    # sizing arguments
+    if database_url and not database_url.startswith('sqlite'):
+        options.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        })
+    return options
+
+def _replica_binds(urls):
+    # replica_0, replica_1, ... binds for replicas.ReplicaRouter
+    urls = [url.strip() for url in urls.split(',') if url.strip()]
+    return {f'replica_{index}': {'url': url, **_engine_options(url)} for index, url in enumerate(urls)}
+
+def _live_updates_backend(database_url):
+    # Streams only reach clients of the worker that committed unless the
+    # workers share a broker, and Postgres deployments have one to hand
+    if database_url and database_url.startswith('postgres'):
+        return 'postgres'
+    return 'local'
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev')
\ No newline at end of file
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # Optional comma separated read replicas for GET requests; a client's
+    # reads stay on the primary for READ_YOUR_WRITES_SECONDS after it writes
+    SQLALCHEMY_BINDS = _replica_binds(os.getenv('DATABASE_REPLICA_URLS', ''))
+    READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev')
+    # Read week charts from Component.week_mask instead of the assignments rows
+    USE_WEEK_BITMAP = os.getenv('USE_WEEK_BITMAP', 'false').lower() == 'true'
+    # Production workers skip db.create_all(); gunicorn.conf.py runs it once
+    CREATE_TABLES_ON_STARTUP = os.getenv('CREATE_TABLES_ON_STARTUP', 'true').lower() == 'true'
+    # 'orjson' when installed, falling back to Flask's stdlib provider
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+    # Serialized period views: 'local' keeps an in-process LRU, 'none' disables it
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'local')
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 256))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+    # Per-request timing with Server-Timing headers and /metrics; SQL is only
+    # timed for the sampled fraction of requests
+    INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'false').lower() == 'true'
+    INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', 0.1))
+    INSTRUMENTATION_SLOW_STATEMENTS = int(os.getenv('INSTRUMENTATION_SLOW_STATEMENTS', 5))
+    # Live period streams: 'local' reaches this worker's clients only,
+    # 'postgres' fans out to every worker through LISTEN/NOTIFY and is the
+    # default on Postgres
+    LIVE_UPDATES_BACKEND = os.getenv('LIVE_UPDATES_BACKEND') or _live_updates_backend(SQLALCHEMY_DATABASE_URI)
+    # What-if scenarios kept in memory per worker before the least recently
+    # used are dropped
+    SCENARIO_LIMIT = int(os.getenv('SCENARIO_LIMIT', 200))
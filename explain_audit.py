@@ -0,0 +1,96 @@
+"""Checks that every read endpoint is served by indexes.
+
+    python explain_audit.py
+
+Loads a large synthetic fixture into DATABASE_URL (Postgres) inside a
+transaction, calls each GET endpoint, runs EXPLAIN on every statement it
+issued and exits non-zero if any plan sequentially scans one of the large
+tables. The fixture is rolled back afterwards.
+"""
+import json
+import sys
+from sqlalchemy import event, text
+from app import create_app
+from models import db
+from response_cache import NullBackend, response_cache
+import synthetic
+
+LARGE_TABLES = {'projects', 'components', 'assignments', 'contributor_skills'}
+
+# Full scans that are part of what the endpoint computes: the chart lists every
+# contributor with their skills and capacity reports supply for every skill.
+ALLOWED_SEQ_SCANS = {
+    'contributor_chart': {'contributor_skills'},
+    'capacity': {'contributor_skills'},
+}
+
+FIXTURE = dict(periods=40, projects_per_period=50, components_per_project=5, contributors=3000, skills=50)
+
+def seq_scans(plan):
+    found = set()
+    if plan.get('Node Type') == 'Seq Scan':
+        found.add(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        found |= seq_scans(child)
+    return found
+
+def explain(statement, parameters):
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+    plan = cursor.fetchone()[0]
+    cursor.close()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+def main():
+    app = create_app()
+    response_cache.backend = NullBackend()
+    client = app.test_client()
+    failures = []
+
+    # Requests reuse this app context, so they share its session and see the
+    # uncommitted fixture.
+    with app.app_context():
+        data = synthetic.generate(**FIXTURE)
+        synthetic.load(data)
+        for table in LARGE_TABLES | {'periods', 'skills', 'contributors'}:
+            db.session.execute(text(f'ANALYZE {table}'))
+
+        period_id = data['periods'][len(data['periods']) // 2]['period_id']
+        contributor_id = data['assignments'][0]['contributor_id']
+        skill_id = data['skills'][0]['skill_id']
+        endpoints = {
+            'projects': f'/period/{period_id}/projects',
+            'contributor_chart': f'/period/{period_id}/contributor_chart',
+            'capacity': f'/period/{period_id}/capacity',
+            'contributor_assignments': f'/assignments/contributor/{contributor_id}',
+            'contributors_by_skill': f'/contributors/get_contributors_by_skill/{skill_id}',
+        }
+
+        for name, url in endpoints.items():
+            statements = []
+            def record(conn, cursor, statement, parameters, context, executemany):
+                statements.append((statement, parameters))
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                status = client.get(url).status_code
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+
+            allowed = ALLOWED_SEQ_SCANS.get(name, set())
+            scanned = set()
+            for statement, parameters in statements:
+                scanned |= seq_scans(explain(statement, parameters)) & LARGE_TABLES - allowed
+            print(f'{name:24} {status} {len(statements):3} statements  seq scans: {sorted(scanned) or "none"}')
+            if scanned:
+                failures.append(name)
+
+        db.session.rollback()
+
+    if failures:
+        print(f'Sequential scans on large tables in: {", ".join(failures)}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
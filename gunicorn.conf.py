@@ -0,0 +1,34 @@
+"""Production serving configuration.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Runs WEB_CONCURRENCY worker processes with GUNICORN_THREADS threads each.
+Every worker has its own SQLAlchemy pool of DB_POOL_SIZE connections plus up to
+DB_MAX_OVERFLOW extra, so keep WEB_CONCURRENCY * (DB_POOL_SIZE +
+DB_MAX_OVERFLOW) below the Postgres max_connections.
+
+Live period streams only reach clients of the worker that committed when
+LIVE_UPDATES_BACKEND is 'local', so more than one worker needs the 'postgres'
+backend; startup fails otherwise.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 4000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+def on_starting(server):
+    # Create tables once in the master, then drop its connections so forked
+    # workers open their own.
+    from app import create_app
+    from models import db
+    app = create_app(create_tables=True)
+    if workers > 1 and app.config['LIVE_UPDATES_BACKEND'] == 'local':
+        raise RuntimeError(f"LIVE_UPDATES_BACKEND 'local' cannot reach the streams of {workers} workers; "
+                           "use 'postgres' or set WEB_CONCURRENCY=1")
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
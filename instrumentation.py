@@ -0,0 +1,164 @@
+import contextvars
+import heapq
+import random
+import threading
+import time
+from flask import request
+from sqlalchemy import event
+from models import db
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statement text kept for slow-query reporting
+STATEMENT_PREVIEW = 200
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+class Instrumentation:
+    """Opt-in per-request timing and SQL accounting.
+
+    Every request is timed; a sampled fraction also has its SQL statements
+    counted and timed through cursor events. Sampled requests report the
+    numbers in a Server-Timing header, and all of it is exported in
+    Prometheus text format at /metrics.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.slow_statements = 5
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._histograms = {}
+        self._db = {}
+        self._slowest = []
+
+    def init_app(self, app):
+        self.enabled = app.config['INSTRUMENTATION_ENABLED']
+        if not self.enabled:
+            return
+        self.sample_rate = app.config['INSTRUMENTATION_SAMPLE_RATE']
+        self.slow_statements = app.config['INSTRUMENTATION_SLOW_STATEMENTS']
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view, methods=['GET'])
+
+    def _before_request(self):
+        sampled = random.random() < self.sample_rate
+        _current.set({
+            'start': time.perf_counter(),
+            'sampled': sampled,
+            'statements': 0,
+            'db_time': 0.0,
+            'slowest': []
+        })
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        if metrics is not None and metrics['sampled']:
+            # On the execution context rather than the connection, so a
+            # statement that raises leaves nothing behind
+            context._query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        start = getattr(context, '_query_start', None)
+        if metrics is None or not metrics['sampled'] or start is None:
+            return
+        elapsed = time.perf_counter() - start
+        metrics['statements'] += 1
+        metrics['db_time'] += elapsed
+        entry = (elapsed, statement[:STATEMENT_PREVIEW])
+        if len(metrics['slowest']) < self.slow_statements:
+            heapq.heappush(metrics['slowest'], entry)
+        else:
+            heapq.heappushpop(metrics['slowest'], entry)
+
+    def _after_request(self, response):
+        metrics = _current.get()
+        if metrics is None:
+            return response
+        _current.set(None)
+        elapsed = time.perf_counter() - metrics['start']
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        self._record(request.method, endpoint, response.status_code, elapsed, metrics)
+
+        timings = [f'app;dur={elapsed * 1000:.2f}']
+        if metrics['sampled']:
+            timings.append(f'db;dur={metrics["db_time"] * 1000:.2f};desc="{metrics["statements"]} statements"')
+            for index, (duration, _) in enumerate(sorted(metrics['slowest'], reverse=True)):
+                timings.append(f'sql{index + 1};dur={duration * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def _record(self, method, endpoint, status, elapsed, metrics):
+        with self._lock:
+            key = (method, endpoint, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            histogram = self._histograms.setdefault(endpoint, {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if elapsed <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += elapsed
+            histogram['count'] += 1
+
+            if metrics['sampled']:
+                totals = self._db.setdefault(endpoint, {'requests': 0, 'statements': 0, 'seconds': 0.0})
+                totals['requests'] += 1
+                totals['statements'] += metrics['statements']
+                totals['seconds'] += metrics['db_time']
+                for entry in metrics['slowest']:
+                    if len(self._slowest) < self.slow_statements:
+                        heapq.heappush(self._slowest, entry)
+                    else:
+                        heapq.heappushpop(self._slowest, entry)
+
+    def render_metrics(self):
+        lines = []
+        with self._lock:
+            lines += ['# HELP planner_http_requests_total Requests served.',
+                      '# TYPE planner_http_requests_total counter']
+            for (method, endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'planner_http_requests_total{{method="{method}",endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+
+            lines += ['# HELP planner_http_request_duration_seconds Wall time per request.',
+                      '# TYPE planner_http_request_duration_seconds histogram']
+            for endpoint, histogram in sorted(self._histograms.items()):
+                label = f'endpoint="{_escape(endpoint)}"'
+                for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+                    lines.append(f'planner_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'planner_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {histogram["count"]}')
+                lines.append(f'planner_http_request_duration_seconds_sum{{{label}}} {histogram["sum"]:.6f}')
+                lines.append(f'planner_http_request_duration_seconds_count{{{label}}} {histogram["count"]}')
+
+            lines += ['# HELP planner_sampled_requests_total Requests whose SQL was measured.',
+                      '# TYPE planner_sampled_requests_total counter']
+            lines += [f'planner_sampled_requests_total{{endpoint="{_escape(endpoint)}"}} {totals["requests"]}' for endpoint, totals in sorted(self._db.items())]
+            lines += ['# HELP planner_db_statements_total SQL statements issued by sampled requests.',
+                      '# TYPE planner_db_statements_total counter']
+            lines += [f'planner_db_statements_total{{endpoint="{_escape(endpoint)}"}} {totals["statements"]}' for endpoint, totals in sorted(self._db.items())]
+            lines += ['# HELP planner_db_seconds_total Time spent in SQL by sampled requests.',
+                      '# TYPE planner_db_seconds_total counter']
+            lines += [f'planner_db_seconds_total{{endpoint="{_escape(endpoint)}"}} {totals["seconds"]:.6f}' for endpoint, totals in sorted(self._db.items())]
+
+            lines += ['# HELP planner_slow_statement_seconds Slowest sampled SQL statements seen by this process.',
+                      '# TYPE planner_slow_statement_seconds gauge']
+            for duration, statement in sorted(self._slowest, reverse=True):
+                lines.append(f'planner_slow_statement_seconds{{statement="{_escape(statement)}"}} {duration:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return self.render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+instrumentation = Instrumentation()
@@ -0,0 +1,191 @@
+"""Live period updates over Server-Sent Events.
+
+Every commit that bumps a period's version publishes one message on that
+period's channel: a 'diff' listing the events the mutating routes recorded
+with models.record_event, or a bare 'changed' when nothing finer grained was
+recorded. Each message carries the period's new version, which is also the
+version in the period views' ETags, so a client that sees a gap re-fetches.
+Contributor and skill changes go to every channel since they show up on every
+board.
+
+Each open stream holds a worker thread, so size GUNICORN_THREADS for the
+number of boards expected to be open at once.
+"""
+import json
+import queue
+import select
+import threading
+import time
+from sqlalchemy import text
+from models import db
+from response_cache import GLOBAL_SCOPES
+
+BROADCAST = '*'
+
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+
+# Messages buffered per stream before it is told to resync instead
+MAX_QUEUED_MESSAGES = 1000
+
+class LocalBroker:
+    """In-process fan-out; only reaches streams served by this worker."""
+
+    transactional = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channels):
+        messages = queue.Queue(maxsize=MAX_QUEUED_MESSAGES)
+        with self._lock:
+            for channel in channels:
+                self._channels.setdefault(channel, set()).add(messages)
+        return messages
+
+    def unsubscribe(self, channels, messages):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._channels.get(channel, set())
+                subscribers.discard(messages)
+                if not subscribers:
+                    self._channels.pop(channel, None)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for messages in subscribers:
+            try:
+                messages.put_nowait(message)
+            except queue.Full:
+                # A stalled client gets one resync instead of a backlog
+                with messages.mutex:
+                    messages.queue.clear()
+                messages.put_nowait({'type': 'resync'})
+
+class PostgresBroker:
+    """Fans messages out to every worker through LISTEN/NOTIFY.
+
+    publish() runs inside the committing transaction, so its NOTIFY goes
+    out when the writes commit and is dropped with them on rollback, without
+    a connection of its own. A background thread LISTENs and hands each
+    notification to a LocalBroker serving this worker's streams, its own
+    messages included.
+    """
+
+    transactional = True
+
+    CHANNEL = 'planner_live'
+    # NOTIFY payloads are limited to 8000 bytes
+    MAX_PAYLOAD = 7900
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.local = LocalBroker()
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        self._ensure_listener()
+        return self.local.subscribe(channels)
+
+    def unsubscribe(self, channels, messages):
+        self.local.unsubscribe(channels, messages)
+
+    def publish(self, channel, message, session):
+        payload = json.dumps({'channel': channel, 'message': message}, default=str)
+        if len(payload) > self.MAX_PAYLOAD:
+            payload = json.dumps({'channel': channel, 'message': {'type': 'changed', 'version': message.get('version')}})
+        session.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': self.CHANNEL, 'payload': payload})
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='live-updates-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                connection = self.engine.raw_connection()
+                try:
+                    raw = connection.dbapi_connection
+                    raw.autocommit = True
+                    cursor = raw.cursor()
+                    cursor.execute(f'LISTEN {self.CHANNEL}')
+                    while True:
+                        if select.select([raw], [], [], KEEPALIVE_INTERVAL) == ([], [], []):
+                            continue
+                        raw.poll()
+                        while raw.notifies:
+                            data = json.loads(raw.notifies.pop(0).payload)
+                            self.local.publish(data['channel'], data['message'])
+                finally:
+                    connection.invalidate()
+            except Exception:
+                # Reconnect after a dropped connection; streams miss nothing
+                # they cannot recover from their versions
+                time.sleep(1)
+
+BACKENDS = {
+    'local': lambda app: LocalBroker(),
+    'postgres': lambda app: PostgresBroker(db.engine)
+}
+
+class LiveUpdates:
+    def __init__(self):
+        self.broker = LocalBroker()
+
+    def init_app(self, app):
+        with app.app_context():
+            self.broker = BACKENDS[app.config['LIVE_UPDATES_BACKEND']](app)
+
+    def before_commit(self, session, changes):
+        if self.broker.transactional:
+            for channel, message in self._messages(changes):
+                self.broker.publish(channel, message, session)
+
+    def on_commit(self, changes):
+        if not self.broker.transactional:
+            for channel, message in self._messages(changes):
+                self.broker.publish(channel, message)
+
+    def _messages(self, changes):
+        events = {}
+        for event in changes.get('events', ()):
+            if event.get('period_id'):
+                events.setdefault(event['period_id'], []).append({key: value for key, value in event.items() if key != 'period_id'})
+
+        for scope, version in changes['versions'].items():
+            if scope in GLOBAL_SCOPES:
+                yield BROADCAST, {'type': 'changed', 'scope': scope, 'version': version}
+            elif scope != 'periods':
+                if scope in events:
+                    message = {'type': 'diff', 'period_id': scope, 'version': version, 'changes': events[scope]}
+                else:
+                    message = {'type': 'changed', 'period_id': scope, 'version': version}
+                yield scope, message
+
+    def stream(self, period_id):
+        channels = [str(period_id), BROADCAST]
+        messages = self.broker.subscribe(channels)
+
+        def generate():
+            try:
+                yield ': connected\n\n'
+                while True:
+                    try:
+                        message = messages.get(timeout=KEEPALIVE_INTERVAL)
+                    except queue.Empty:
+                        yield ': keepalive\n\n'
+                        continue
+                    frame = f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+                    if 'version' in message and message.get('period_id'):
+                        frame = f"id: {message['version']}\n" + frame
+                    yield frame
+            finally:
+                self.broker.unsubscribe(channels, messages)
+        return generate()
+
+live_updates = LiveUpdates()
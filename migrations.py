@@ -0,0 +1,60 @@
+from sqlalchemy import text
+from models import db
+
+# db.create_all() only creates missing tables, so changes to existing tables
+# are listed here. Every statement is idempotent and the steps run in order.
+MIGRATIONS = [
+    ('0001_component_week_mask', [
+        "ALTER TABLE components ADD COLUMN IF NOT EXISTS week_mask BIGINT NOT NULL DEFAULT 0",
+        """
+        UPDATE components c
+        SET week_mask = COALESCE((
+            SELECT bit_or(1::bigint << a.week)
+            FROM assignments a
+            WHERE a.component_id = c.component_id AND a.week < 63
+        ), 0)
+        """,
+    ]),
+    ('0002_foreign_key_indexes', [
+        "CREATE INDEX IF NOT EXISTS ix_projects_period_id ON projects (period_id)",
+        "CREATE INDEX IF NOT EXISTS ix_components_project_id ON components (project_id)",
+        "CREATE INDEX IF NOT EXISTS ix_components_skill_id ON components (skill_id)",
+        "CREATE INDEX IF NOT EXISTS ix_components_contributor_id ON components (contributor_id)",
+        "CREATE INDEX IF NOT EXISTS ix_contributor_skills_skill_id ON contributor_skills (skill_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assignments_contributor_id_week ON assignments (contributor_id, week)",
+    ]),
+    ('0003_assignment_history_keyset_index', [
+        "CREATE INDEX IF NOT EXISTS ix_assignments_contributor_id_week_component_id ON assignments (contributor_id, week, component_id)",
+        "DROP INDEX IF EXISTS ix_assignments_contributor_id_week",
+    ]),
+    ('0004_component_version', [
+        "ALTER TABLE components ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    ]),
+    ('0005_cascading_deletes', [
+        """
+        ALTER TABLE projects DROP CONSTRAINT IF EXISTS projects_period_id_fkey,
+        ADD CONSTRAINT projects_period_id_fkey FOREIGN KEY (period_id) REFERENCES periods (period_id) ON DELETE CASCADE
+        """,
+        """
+        ALTER TABLE components DROP CONSTRAINT IF EXISTS components_project_id_fkey,
+        ADD CONSTRAINT components_project_id_fkey FOREIGN KEY (project_id) REFERENCES projects (project_id) ON DELETE CASCADE
+        """,
+        """
+        ALTER TABLE assignments DROP CONSTRAINT IF EXISTS assignments_component_id_fkey,
+        ADD CONSTRAINT assignments_component_id_fkey FOREIGN KEY (component_id) REFERENCES components (component_id) ON DELETE CASCADE
+        """,
+    ]),
+]
+
+def run_migrations():
+    for name, statements in MIGRATIONS:
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+        print(f'Applied {name}')
+
+if __name__ == '__main__':
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        run_migrations()
@@ -1,9 +1,72 @@
 from datetime import datetime, timedelta
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, insert
 import uuid
 import math
-db = SQLAlchemy()
+from utils import MAX_BITMAP_WEEKS, mask_to_chart, count_weeks
+from replicas import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+class VersionConflict(Exception):
+    # Raised when a write names a component version that is no longer current
+    def __init__(self, component_ids):
+        super().__init__('Components were changed concurrently: ' + ', '.join(str(component_id) for component_id in component_ids))
+        self.component_ids = list(component_ids)
+
+def touch_components(component_ids):
+    # Bulk statements bypass the ORM unit of work, so callers record the
+    # components they changed for the change listeners in changes.py.
+    db.session.info.setdefault('touched_components', set()).update(component_ids)
+
+def touch_contributors(contributor_ids):
+    db.session.info.setdefault('touched_contributors', set()).update(contributor_ids)
+    touch_scopes(['contributors'])
+
+def touch_periods(period_ids):
+    db.session.info.setdefault('touched_periods', set()).update(period_ids)
+
+def touch_scopes(scopes):
+    db.session.info.setdefault('touched_scopes', set()).update(scopes)
+
+# Fields of the /period/<id>/projects listing; ids are always returned
+PROJECT_FIELDS = ('project_id', 'project_name', 'components')
+COMPONENT_FIELDS = ('component_id', 'component_name', 'estimated_weeks', 'assigned_weeks', 'skill', 'skill_id',
+                    'assignments', 'contributor_id', 'contributor_name', 'version')
+
+def parse_project_fields(fields, include):
+    # fields=project_name,components.assigned_weeks style selections, where a
+    # bare "components" means every component field. include=summary adds
+    # per-project totals and, without fields, drops the components.
+    summary = 'summary' in (include or '').split(',')
+    if not fields:
+        if summary:
+            return {'project_id', 'project_name'}, set(), summary
+        return set(PROJECT_FIELDS), set(COMPONENT_FIELDS), summary
+
+    project_fields = {'project_id'}
+    component_fields = {'component_id'}
+    for field in fields.split(','):
+        field = field.strip()
+        if field.startswith('components.'):
+            if field[len('components.'):] not in COMPONENT_FIELDS:
+                raise ValueError(f"Unknown field {field!r}")
+            project_fields.add('components')
+            component_fields.add(field[len('components.'):])
+        elif field == 'components':
+            project_fields.add('components')
+            component_fields.update(COMPONENT_FIELDS)
+        elif field in PROJECT_FIELDS:
+            project_fields.add(field)
+        else:
+            raise ValueError(f"Unknown field {field!r}")
+    return project_fields, component_fields, summary
+
+def record_event(event):
+    # Queues a change description for live subscribers; it is published with
+    # the period's new version once the transaction commits. Events that only
+    # name a component_id get their period_id filled in at commit time.
+    db.session.info.setdefault('pending_events', []).append(event)
 
 class Period(db.Model):
     __tablename__ = 'periods'
@@ -21,34 +84,235 @@ class Period(db.Model):
     
     @property
     def num_weeks(self):
-        return math.ceil((self.end_date - self.start_date).days / 7) + 1
+        return Period.weeks_between(self.start_date, self.end_date)
+
+    @staticmethod
+    def weeks_between(start_date, end_date):
+        return math.ceil((end_date - start_date).days / 7) + 1
+
+    @property
+    def uses_week_bitmap(self):
+        return current_app.config.get('USE_WEEK_BITMAP', False) and self.num_weeks <= MAX_BITMAP_WEEKS
     
-    def get_contributor_chart(self):
-        contributor_chart = {}
-        assignment_blobs = (db.session.query(
-            Component.name,
+    def get_projects_response(self, project_fields=PROJECT_FIELDS, component_fields=COMPONENT_FIELDS, summary=False):
+        # Loads the whole period tree in a fixed number of queries. Only the
+        # columns behind the requested fields are selected, and assignments
+        # are only read when charts or week counts are asked for.
+        projects = (db.session.query(Project.project_id, Project.name)
+        .filter(Project.period_id == self.period_id)
+        .order_by(Project.name)
+        .all())
+
+        include_components = 'components' in project_fields
+        if not include_components:
+            component_fields = ()
+        want_chart = 'assignments' in component_fields
+        want_count = summary or 'assigned_weeks' in component_fields
+        want_contributor = 'contributor_id' in component_fields or 'contributor_name' in component_fields
+        weeks_in_period = self.num_weeks
+        uses_week_bitmap = self.uses_week_bitmap
+
+        columns = [Component.component_id, Component.project_id, Component.name]
+        if summary or 'estimated_weeks' in component_fields:
+            columns.append(Component.estimated_weeks)
+        if 'skill_id' in component_fields:
+            columns.append(Component.skill_id)
+        if 'skill' in component_fields:
+            columns.append(Skill.name.label('skill_name'))
+        if want_contributor:
+            columns += [Component.contributor_id, Contributor.first_name, Contributor.last_name]
+        if 'version' in component_fields:
+            columns.append(Component.version)
+        if uses_week_bitmap and (want_chart or want_count):
+            columns.append(Component.week_mask)
+
+        component_rows = []
+        if include_components or summary:
+            query = (db.session.query(*columns)
+            .join(Project, Component.project_id == Project.project_id)
+            .filter(Project.period_id == self.period_id))
+            if 'skill' in component_fields:
+                query = query.outerjoin(Skill, Component.skill_id == Skill.skill_id)
+            if want_contributor:
+                query = query.outerjoin(Contributor, Component.contributor_id == Contributor.contributor_id)
+            component_rows = query.all()
+
+        charts = {}
+        counts = {}
+        if uses_week_bitmap:
+            for row in component_rows:
+                if want_chart:
+                    charts[row.component_id] = mask_to_chart(row.week_mask, weeks_in_period)
+                if want_count:
+                    counts[row.component_id] = count_weeks(row.week_mask)
+        elif want_chart:
+            assignment_rows = (db.session.query(Assignment.component_id, Assignment.week)
+            .join(Component, Assignment.component_id == Component.component_id)
+            .join(Project, Component.project_id == Project.project_id)
+            .filter(Project.period_id == self.period_id)
+            .all())
+            for row in assignment_rows:
+                chart = charts.setdefault(row.component_id, [False] * weeks_in_period)
+                chart[row.week] = True
+            counts = {component_id: sum(chart) for component_id, chart in charts.items()}
+        elif want_count:
+            counts = dict(db.session.query(Assignment.component_id, db.func.count())
+            .join(Component, Assignment.component_id == Component.component_id)
+            .join(Project, Component.project_id == Project.project_id)
+            .filter(Project.period_id == self.period_id)
+            .group_by(Assignment.component_id)
+            .all())
+
+        components_by_project = {}
+        for row in component_rows:
+            response = {
+              "component_id": row.component_id,
+              "component_name": row.name
+            }
+            if 'estimated_weeks' in component_fields or summary:
+                response["estimated_weeks"] = row.estimated_weeks
+            if want_count:
+                response["assigned_weeks"] = counts.get(row.component_id, 0)
+            if 'skill' in component_fields:
+                response["skill"] = row.skill_name
+            if 'skill_id' in component_fields:
+                response["skill_id"] = row.skill_id
+            if want_chart:
+                response["assignments"] = charts.get(row.component_id, [False] * weeks_in_period)
+            if want_contributor:
+                response["contributor_id"] = None
+                response["contributor_name"] = None
+                if row.first_name is not None:
+                    response["contributor_name"] = row.first_name + " " + row.last_name
+                    response["contributor_id"] = row.contributor_id
+            if 'version' in component_fields:
+                response["version"] = row.version
+            components_by_project.setdefault(row.project_id, []).append(response)
+
+        response = {"projects": []}
+        for project in projects:
+            components = sorted(components_by_project.get(project.project_id, []), key=lambda x: x['component_name'])
+            project_response = {'project_id': project.project_id}
+            if 'project_name' in project_fields:
+                project_response['project_name'] = project.name
+            if summary:
+                project_response['summary'] = {
+                    'components': len(components),
+                    'estimated_weeks': sum(component['estimated_weeks'] or 0 for component in components),
+                    'assigned_weeks': sum(component['assigned_weeks'] for component in components)
+                }
+            if include_components:
+                project_response['components'] = [{field: value for field, value in component.items()
+                                                   if field in component_fields or field == 'component_id'}
+                                                  for component in components]
+            response["projects"].append(project_response)
+        return response
+    
+    def get_capacity(self):
+        # Every aggregate is computed with GROUP BY in the database; Python only
+        # reshapes the already aggregated rows.
+        period_assignments = (db.session.query(Assignment.contributor_id, Assignment.week, Assignment.component_id)
+        .join(Component, Assignment.component_id == Component.component_id)
+        .join(Project, Component.project_id == Project.project_id)
+        .filter(Project.period_id == self.period_id)
+        .subquery())
+
+        load_rows = (db.session.query(
             Contributor.contributor_id,
             Contributor.first_name,
             Contributor.last_name,
-            Assignment.week
+            period_assignments.c.week,
+            db.func.count().label('load')
         )
+        .join(period_assignments, Contributor.contributor_id == period_assignments.c.contributor_id)
+        .group_by(Contributor.contributor_id, Contributor.first_name, Contributor.last_name, period_assignments.c.week)
+        .all())
+
+        overbooked = (db.session.query(period_assignments.c.contributor_id, period_assignments.c.week)
+        .group_by(period_assignments.c.contributor_id, period_assignments.c.week)
+        .having(db.func.count() > 1)
+        .subquery())
+        conflict_rows = (db.session.query(Assignment.contributor_id, Assignment.week, Component.component_id, Component.name)
+        .join(overbooked, db.and_(Assignment.contributor_id == overbooked.c.contributor_id, Assignment.week == overbooked.c.week))
+        .join(Component, Assignment.component_id == Component.component_id)
         .join(Project, Component.project_id == Project.project_id)
-        .join(Assignment, Component.component_id == Assignment.component_id)
-        .join(Contributor, Assignment.contributor_id == Contributor.contributor_id)
         .filter(Project.period_id == self.period_id)
-        .order_by(Contributor.first_name, Contributor.last_name)
+        .order_by(Assignment.contributor_id, Assignment.week, Component.name)
         .all())
 
-        contributor_chart = {}
-        for contributor in db.session.query(Contributor).all():
-            contributor_chart[str(contributor.contributor_id)] = {
-                "assignments": [[] for _ in range(self.num_weeks)],
-                "name": contributor.first_name + " " + contributor.last_name
-            }
-        for blob in assignment_blobs:
-            contributor_chart[str(blob.contributor_id)]["assignments"][blob.week].append(blob.name)
+        demand = (db.session.query(
+            Component.skill_id,
+            db.func.count(Component.component_id).label('components'),
+            db.func.coalesce(db.func.sum(Component.estimated_weeks), 0).label('estimated_weeks')
+        )
+        .join(Project, Component.project_id == Project.project_id)
+        .filter(Project.period_id == self.period_id)
+        .group_by(Component.skill_id)
+        .subquery())
+        assigned = (db.session.query(Component.skill_id, db.func.count().label('assigned_weeks'))
+        .join(period_assignments, Component.component_id == period_assignments.c.component_id)
+        .group_by(Component.skill_id)
+        .subquery())
+        supply = (db.session.query(ContributorSkill.skill_id, db.func.count().label('contributors'))
+        .group_by(ContributorSkill.skill_id)
+        .subquery())
+        skill_rows = (db.session.query(
+            Skill.skill_id,
+            Skill.name,
+            db.func.coalesce(demand.c.components, 0).label('components'),
+            db.func.coalesce(demand.c.estimated_weeks, 0).label('estimated_weeks'),
+            db.func.coalesce(assigned.c.assigned_weeks, 0).label('assigned_weeks'),
+            db.func.coalesce(supply.c.contributors, 0).label('contributors')
+        )
+        .outerjoin(demand, Skill.skill_id == demand.c.skill_id)
+        .outerjoin(assigned, Skill.skill_id == assigned.c.skill_id)
+        .outerjoin(supply, Skill.skill_id == supply.c.skill_id)
+        .filter(db.or_(demand.c.skill_id.isnot(None), supply.c.skill_id.isnot(None)))
+        .order_by(Skill.name)
+        .all())
+
+        weeks_in_period = self.num_weeks
+        contributors = {}
+        for row in load_rows:
+            contributor = contributors.setdefault(str(row.contributor_id), {
+                "contributor_id": row.contributor_id,
+                "name": row.first_name + " " + row.last_name,
+                "weekly_load": [0] * weeks_in_period,
+                "assigned_weeks": 0
+            })
+            contributor["weekly_load"][row.week] = row.load
+            contributor["assigned_weeks"] += row.load
+
+        conflicts = {}
+        for row in conflict_rows:
+            conflict = conflicts.setdefault((str(row.contributor_id), row.week), {
+                "contributor_id": row.contributor_id,
+                "name": contributors[str(row.contributor_id)]["name"],
+                "week": row.week,
+                "components": []
+            })
+            conflict["components"].append({"component_id": row.component_id, "component_name": row.name})
 
-        return contributor_chart
+        skills = []
+        for row in skill_rows:
+            available_weeks = row.contributors * weeks_in_period
+            skills.append({
+                "skill_id": row.skill_id,
+                "skill": row.name,
+                "components": row.components,
+                "estimated_weeks": int(row.estimated_weeks),
+                "assigned_weeks": row.assigned_weeks,
+                "contributors": row.contributors,
+                "available_weeks": available_weeks,
+                "shortfall": max(int(row.estimated_weeks) - available_weeks, 0)
+            })
+
+        return {
+            "num_weeks": weeks_in_period,
+            "contributors": sorted(contributors.values(), key=lambda x: x['name']),
+            "conflicts": list(conflicts.values()),
+            "skills": skills
+        }
     
     def __repr__(self):
         return f'<Period {self.name}>'
@@ -61,16 +325,81 @@ class Period(db.Model):
             'end_date': self.end_date
         }
 
+    def clone(self, name, start_date, end_date, include_contributors=True, include_assignments=False, week_offset=0):
+        # Copies projects and components, and optionally the assigned weeks
+        # shifted by week_offset, with INSERT ... SELECT statements. Weeks that
+        # land outside the new period are dropped. The caller commits.
+        period = Period(name=name, start_date=start_date, end_date=end_date)
+        db.session.add(period)
+        db.session.flush()
+        new_period_id = period.period_id
+
+        db.session.execute(db.insert(Project).from_select(
+            ['project_id', 'name', 'description', 'period_id'],
+            db.select(_cloned_id(Project.project_id, new_period_id), Project.name, Project.description, db.literal(new_period_id, UUID))
+            .where(Project.period_id == self.period_id)
+        ))
+        db.session.execute(db.insert(Component).from_select(
+            ['component_id', 'name', 'description', 'project_id', 'skill_id', 'estimated_weeks', 'contributor_id', 'week_mask'],
+            db.select(
+                _cloned_id(Component.component_id, new_period_id),
+                Component.name,
+                Component.description,
+                _cloned_id(Component.project_id, new_period_id),
+                Component.skill_id,
+                Component.estimated_weeks,
+                Component.contributor_id if include_contributors else db.null(),
+                db.literal(0, db.BigInteger)
+            )
+            .join(Project, Component.project_id == Project.project_id)
+            .where(Project.period_id == self.period_id)
+        ))
+
+        if include_assignments:
+            shifted_week = Assignment.week + week_offset
+            db.session.execute(db.insert(Assignment).from_select(
+                ['component_id', 'contributor_id', 'week'],
+                db.select(_cloned_id(Assignment.component_id, new_period_id), Assignment.contributor_id, shifted_week)
+                .join(Component, Assignment.component_id == Component.component_id)
+                .join(Project, Component.project_id == Project.project_id)
+                .where(Project.period_id == self.period_id, shifted_week >= 0, shifted_week < period.num_weeks)
+            ))
+            Component.refresh_week_masks(db.select(Component.component_id)
+            .join(Project, Component.project_id == Project.project_id)
+            .where(Project.period_id == new_period_id))
+        return period
+
+def _cloned_id(column, period_id):
+    # Derives the copy's id from the original and the new period inside the
+    # database, so child rows can follow their parents without a lookup table
+    return db.cast(db.func.md5(db.cast(column, db.String) + str(period_id)), UUID)
+
 class Project(db.Model):
     __tablename__ = 'projects'
     
     project_id = db.Column(UUID, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    period_id = db.Column(UUID, db.ForeignKey('periods.period_id'))
+    period_id = db.Column(UUID, db.ForeignKey('periods.period_id', ondelete='CASCADE'), index=True)
     
-    # Relationship
-    period = db.relationship('Period', backref=db.backref('projects', lazy=True))
+    # Relationship; children are removed by the ON DELETE CASCADE foreign keys
+    # rather than loaded and deleted row by row
+    period = db.relationship('Period', backref=db.backref('projects', lazy=True, cascade='all, delete-orphan', passive_deletes=True))
+
+    @staticmethod
+    def delete_many(project_ids):
+        # Two statements however large the projects: their component ids are
+        # read for the change listeners, then the database cascades the rest
+        component_ids = db.session.execute(db.select(Component.component_id).where(Component.project_id.in_(project_ids))).scalars().all()
+        deleted = db.session.execute(db.delete(Project)
+        .where(Project.project_id.in_(project_ids))
+        .returning(Project.project_id, Project.period_id)
+        .execution_options(synchronize_session=False)).all()
+        touch_components(component_ids)
+        touch_periods(row.period_id for row in deleted)
+        for row in deleted:
+            record_event({'type': 'project_deleted', 'project_id': str(row.project_id), 'period_id': row.period_id})
+        return [row.project_id for row in deleted]
 
     def add_component(self, component_data):
         skill_id = component_data['skill_id']
@@ -93,13 +422,6 @@ class Project(db.Model):
             'period_id': self.period_id,
         }
     
-    def to_response(self):
-        return {
-            'project_id': self.project_id,
-            'project_name': self.name,
-            'components': sorted([component.to_response() for component in self.components], key=lambda x: x['component_name'])
-        }
-    
 class Skill(db.Model):
     __tablename__ = 'skills'
     
@@ -121,26 +443,75 @@ class Component(db.Model):
     component_id = db.Column(UUID, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    project_id = db.Column(UUID, db.ForeignKey('projects.project_id', ondelete='CASCADE'))
-    skill_id = db.Column(UUID, db.ForeignKey('skills.skill_id'))
+    project_id = db.Column(UUID, db.ForeignKey('projects.project_id', ondelete='CASCADE'), index=True)
+    skill_id = db.Column(UUID, db.ForeignKey('skills.skill_id'), index=True)
     estimated_weeks = db.Column(db.Integer, nullable=True)
-    contributor_id = db.Column(UUID, db.ForeignKey('contributors.contributor_id'), nullable=True)
+    contributor_id = db.Column(UUID, db.ForeignKey('contributors.contributor_id'), nullable=True, index=True)
+    # Bit n is set when week n is assigned; mirrors the assignments rows
+    week_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    # Bumped by every change to the component or its assignments; ORM updates
+    # check it through version_id_col and bulk writes through claim_versions
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationship
-    project = db.relationship('Project', backref=db.backref('components', lazy=True, cascade='all, delete-orphan'))
+    project = db.relationship('Project', backref=db.backref('components', lazy=True, cascade='all, delete-orphan', passive_deletes=True))
     skill = db.relationship('Skill', backref=db.backref('components', lazy=True))
     contributor = db.relationship('Contributor', backref=db.backref('components', lazy=True))
     assignments = db.relationship('Assignment', backref=db.backref('component'), 
-                                cascade='all, delete-orphan', lazy=True)
+                                cascade='all, delete-orphan', passive_deletes=True, lazy=True)
+
+    @staticmethod
+    def delete_many(component_ids):
+        # Reads the periods first so live subscribers can be told, then deletes
+        # in one statement and lets the database cascade the assignments
+        periods = dict(db.session.query(Component.component_id, Project.period_id)
+        .join(Project, Component.project_id == Project.project_id)
+        .filter(Component.component_id.in_(component_ids))
+        .all())
+        db.session.execute(db.delete(Component)
+        .where(Component.component_id.in_(periods.keys()))
+        .execution_options(synchronize_session=False))
+        touch_components(periods.keys())
+        touch_periods(periods.values())
+        for component_id, period_id in periods.items():
+            record_event({'type': 'component_deleted', 'component_id': str(component_id), 'period_id': period_id})
+        return list(periods.keys())
+
+    def check_version(self, expected):
+        if expected is not None and expected != self.version:
+            raise VersionConflict([self.component_id])
+
+    @staticmethod
+    def claim_versions(component_ids, expected=None):
+        # Bumps the version of every component about to be written in bulk. The
+        # ones listed in expected ({component_id: version}) are only bumped
+        # when still at that version; any that are not raise VersionConflict.
+        expected = expected or {}
+        unguarded = set(component_ids) - expected.keys()
+        conditions = []
+        if unguarded:
+            conditions.append(Component.component_id.in_(unguarded))
+        if expected:
+            conditions.append(db.tuple_(Component.component_id, Component.version).in_(list(expected.items())))
+        if not conditions:
+            return
+        claimed = db.session.execute(db.update(Component)
+        .where(db.or_(*conditions))
+        .values(version=Component.version + 1)
+        .returning(Component.component_id)
+        .execution_options(synchronize_session=False)).scalars().all()
+        conflicts = set(expected) - {str(component_id) for component_id in claimed}
+        if conflicts:
+            raise VersionConflict(sorted(conflicts))
 
     def assert_skill_match(self, contributor_id):
-        contributor = Contributor.query.get(contributor_id)
-        required_skill_id = self.skill_id
-        contributor_skill_ids = [skill.skill_id for skill in contributor.skill_ids]
-        return required_skill_id in contributor_skill_ids
+        return current_app.extensions['skill_index'].has_skill(contributor_id, self.skill_id)
 
     def assign_contributor(self, contributor_id):
         if contributor_id is None:
+            record_event({'type': 'contributor', 'component_id': str(self.component_id), 'contributor_id': None})
             self.contributor_id = None
             self.clear_assignments()
             return
@@ -148,16 +519,32 @@ class Component(db.Model):
         if not self.assert_skill_match(contributor_id):
             raise ValueError("Contributor does not have the required skill")
 
+        record_event({'type': 'contributor', 'component_id': str(self.component_id), 'contributor_id': str(contributor_id)})
         if self.contributor_id:
-            assignments = self.assignments
-            for assignment in assignments:
-                assignment.contributor_id = contributor_id
+            (db.session.query(Assignment)
+            .filter(Assignment.component_id == self.component_id)
+            .update({Assignment.contributor_id: contributor_id}, synchronize_session=False))
+            db.session.expire(self, ['assignments'])
+            touch_components([self.component_id])
         self.contributor_id = contributor_id
-        db.session.commit()
 
     def clear_assignments(self):
-        db.session.query(Assignment).filter(Assignment.component_id == self.component_id).delete()
-        db.session.commit()
+        (db.session.query(Assignment)
+        .filter(Assignment.component_id == self.component_id)
+        .delete(synchronize_session=False))
+        db.session.expire(self, ['assignments'])
+        self.week_mask = 0
+        touch_components([self.component_id])
+        record_event({'type': 'weeks_cleared', 'component_id': str(self.component_id)})
+
+    @staticmethod
+    def refresh_week_masks(component_ids):
+        week_mask = (db.session.query(db.func.coalesce(db.func.sum(db.literal(1, db.BigInteger).op('<<')(Assignment.week)), 0))
+        .filter(Assignment.component_id == Component.component_id, Assignment.week < MAX_BITMAP_WEEKS)
+        .scalar_subquery())
+        (db.session.query(Component)
+        .filter(Component.component_id.in_(component_ids))
+        .update({Component.week_mask: week_mask}, synchronize_session=False))
     
     def __repr__(self):
         return f'<Component {self.name}>'
@@ -168,39 +555,12 @@ class Component(db.Model):
             'name': self.name,
             'description': self.description,
             'project_id': self.project_id,
-            'skill_id': self.skill_id
+            'skill_id': self.skill_id,
+            'estimated_weeks': self.estimated_weeks,
+            'contributor_id': self.contributor_id,
+            'version': self.version
         } 
     
-    def to_response(self):
-
-        weeks_in_period = self.project.period.num_weeks
-
-        skill_name = db.session.query(Skill).filter(Skill.skill_id == self.skill_id).first().name
-        assignments = db.session.query(Assignment).filter(Assignment.component_id == self.component_id).order_by(Assignment.week).all()
-        assignment_chart = [False] * weeks_in_period
-        assigned_weeks_count = 0
-        for assignment in assignments:
-            assignment_chart[assignment.week] = True
-            assigned_weeks_count += 1
-
-        response = {
-          "component_id": self.component_id,
-          "component_name": self.name,
-          "estimated_weeks": self.estimated_weeks,
-          "assigned_weeks": assigned_weeks_count,
-          "skill": skill_name,
-          "skill_id": self.skill_id,
-          "assignments": assignment_chart,
-          "contributor_id": None,
-          "contributor_name": None
-        }
-
-        if self.contributor:
-            response["contributor_name"] = self.contributor.first_name + " " + self.contributor.last_name
-            response["contributor_id"] = self.contributor_id
-
-        return response
-    
 class Contributor(db.Model):
     __tablename__ = 'contributors'
     
@@ -222,7 +582,7 @@ class ContributorSkill(db.Model):
     __tablename__ = 'contributor_skills'
     
     contributor_id = db.Column(UUID, db.ForeignKey('contributors.contributor_id'), primary_key=True)
-    skill_id = db.Column(UUID, db.ForeignKey('skills.skill_id'), primary_key=True)
+    skill_id = db.Column(UUID, db.ForeignKey('skills.skill_id'), primary_key=True, index=True)
     
     def __repr__(self):
         return f'<ContributorSkill {self.contributor_id} {self.skill_id}>'
@@ -235,6 +595,10 @@ class ContributorSkill(db.Model):
     
 class Assignment(db.Model):
     __tablename__ = 'assignments'
+    __table_args__ = (
+        # Serves contributor filters and the keyset ordering of their history
+        db.Index('ix_assignments_contributor_id_week_component_id', 'contributor_id', 'week', 'component_id'),
+    )
     
     component_id = db.Column(UUID, db.ForeignKey('components.component_id', ondelete='CASCADE'), primary_key=True)
     contributor_id = db.Column(UUID, db.ForeignKey('contributors.contributor_id'))
@@ -253,5 +617,158 @@ class Assignment(db.Model):
             'week': self.week
         }
 
+    @staticmethod
+    def apply_week_changes(changes):
+        # Applies many (component, contributor, added_weeks, removed_weeks)
+        # changes, later ones winning, as one upsert and one delete, then returns the resulting
+        # week chart of every touched component. A change that carries the
+        # component version it was based on fails with VersionConflict when
+        # someone else has written the component since. Weeks outside a
+        # component's period raise ValueError before anything is written.
+        component_ids = {str(change['component_id']) for change in changes}
+        period_rows = (db.session.query(Component.component_id, Period.start_date, Period.end_date)
+        .join(Project, Component.project_id == Project.project_id)
+        .join(Period, Project.period_id == Period.period_id)
+        .filter(Component.component_id.in_(component_ids))
+        .all())
+        weeks_in_period = {str(row.component_id): Period.weeks_between(row.start_date, row.end_date) for row in period_rows}
+        for change in changes:
+            num_weeks = weeks_in_period.get(str(change['component_id']))
+            if num_weeks is None:
+                raise ValueError(f"Component {change['component_id']} not found")
+            for week in list(change.get('added_weeks', [])) + list(change.get('removed_weeks', [])):
+                if not isinstance(week, int) or not 0 <= week < num_weeks:
+                    raise ValueError(f"Week {week!r} is outside the {num_weeks}-week period")
+        Component.claim_versions(component_ids, {
+            str(change['component_id']): change['version'] for change in changes if change.get('version') is not None
+        })
+
+        # The final state of every (component, week) in payload order, added
+        # weeks before removed ones within a change: the contributor an add
+        # leaves, or the contributors whose row a remove deletes (None for
+        # any, when it removes what an earlier change added)
+        final = {}
+        for change in changes:
+            component_id = str(change['component_id'])
+            contributor_id = str(change['contributor_id'])
+            for week in change.get('added_weeks', []):
+                final[(component_id, week)] = ('add', contributor_id)
+            for week in change.get('removed_weeks', []):
+                action, value = final.get((component_id, week), ('remove', set()))
+                if action == 'add':
+                    if value == contributor_id:
+                        final[(component_id, week)] = ('remove', None)
+                elif value is not None:
+                    final[(component_id, week)] = ('remove', value | {contributor_id})
+
+        rows = []
+        removed_weeks = {}
+        for (component_id, week), (action, value) in final.items():
+            if action == 'add':
+                rows.append({'component_id': component_id, 'contributor_id': value, 'week': week})
+            else:
+                removed_weeks.setdefault((component_id, frozenset(value) if value is not None else None), []).append(week)
+
+        if rows:
+            stmt = insert(Assignment).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Assignment.component_id, Assignment.week],
+                set_={'contributor_id': stmt.excluded.contributor_id}
+            )
+            db.session.execute(stmt)
+        if removed_weeks:
+            removed = []
+            for (component_id, contributor_ids), weeks in removed_weeks.items():
+                condition = db.and_(Assignment.component_id == component_id, Assignment.week.in_(weeks))
+                if contributor_ids is not None:
+                    condition = db.and_(condition, Assignment.contributor_id.in_(contributor_ids))
+                removed.append(condition)
+            db.session.query(Assignment).filter(db.or_(*removed)).delete(synchronize_session=False)
+
+        Component.refresh_week_masks(component_ids)
+        touch_components(component_ids)
+        for change in changes:
+            record_event({
+                'type': 'weeks',
+                'component_id': str(change['component_id']),
+                'contributor_id': str(change['contributor_id']),
+                'added_weeks': change.get('added_weeks', []),
+                'removed_weeks': change.get('removed_weeks', [])
+            })
+        return Assignment.get_week_charts(component_ids)
+
+    @staticmethod
+    def contributor_history(contributor_id, period_id=None, after=None):
+        # Newest week first with the component id breaking ties, so the last
+        # (week, component_id) returned is a stable keyset cursor
+        query = (db.select(Assignment.component_id, Assignment.contributor_id, Assignment.week)
+        .where(Assignment.contributor_id == contributor_id)
+        .order_by(Assignment.week.desc(), Assignment.component_id.desc()))
+        if period_id is not None:
+            query = (query.join(Component, Assignment.component_id == Component.component_id)
+            .join(Project, Component.project_id == Project.project_id)
+            .where(Project.period_id == period_id))
+        if after is not None:
+            query = query.where(db.tuple_(Assignment.week, Assignment.component_id) < after)
+        return query
+
+    @staticmethod
+    def get_week_charts(component_ids):
+        periods = (db.session.query(Component.component_id, Component.week_mask, Component.version, Period)
+        .join(Project, Component.project_id == Project.project_id)
+        .join(Period, Project.period_id == Period.period_id)
+        .filter(Component.component_id.in_(component_ids))
+        .all())
+
+        charts = {}
+        versions = {}
+        row_component_ids = []
+        for component_id, week_mask, version, period in periods:
+            versions[component_id] = version
+            if period.uses_week_bitmap:
+                charts[component_id] = mask_to_chart(week_mask, period.num_weeks)
+            else:
+                charts[component_id] = [False] * period.num_weeks
+                row_component_ids.append(component_id)
+
+        if row_component_ids:
+            weeks = (db.session.query(Assignment.component_id, Assignment.week)
+            .filter(Assignment.component_id.in_(row_component_ids))
+            .all())
+            for row in weeks:
+                charts[row.component_id][row.week] = True
+
+        return [{
+            'component_id': component_id,
+            'assigned_weeks': sum(chart),
+            'assignments': chart,
+            'version': versions[component_id]
+        } for component_id, chart in charts.items()]
+
+
+    
+class ChangeVersion(db.Model):
+    __tablename__ = 'change_versions'
+
+    # A period_id, or 'periods', 'skills' or 'contributors' for the global lists
+    scope = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ChangeVersion {self.scope} {self.version}>'
+
+    @staticmethod
+    def bump(scopes):
+        stmt = insert(ChangeVersion).values([{'scope': scope, 'version': 1} for scope in sorted(scopes)])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChangeVersion.scope],
+            set_={'version': ChangeVersion.version + 1}
+        ).returning(ChangeVersion.scope, ChangeVersion.version)
+        return {row.scope: row.version for row in db.session.execute(stmt)}
 
-    
\ No newline at end of file
+    @staticmethod
+    def get_versions(scopes):
+        rows = db.session.query(ChangeVersion.scope, ChangeVersion.version).filter(ChangeVersion.scope.in_(scopes)).all()
+        versions = {scope: 0 for scope in scopes}
+        versions.update({row.scope: row.version for row in rows})
+        return versions
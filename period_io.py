@@ -0,0 +1,261 @@
+"""Whole-period import and export.
+
+A plan is one period, the skills of the contributors it mentions and one record
+per component with its project, skill, contributor and assigned weeks. Skills,
+projects and contributors ("First Last") are referenced by name, so a plan
+exported from one database loads into another.
+
+JSON groups the records under 'period', 'contributor_skills' and 'components'.
+CSV has one record per line, told apart by the 'type' column, and lists weeks
+separated by spaces.
+"""
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from models import db, Period, Project, Skill, Component, Contributor, ContributorSkill, Assignment, touch_components, touch_contributors, touch_scopes
+from utils import mask_to_chart, weeks_to_mask
+
+CSV_COLUMNS = ['type', 'name', 'description', 'project', 'project_description', 'skill',
+               'estimated_weeks', 'contributor', 'weeks', 'start_date', 'end_date']
+
+# Rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+class PlanError(Exception):
+    pass
+
+def _full_name(first_name, last_name):
+    return f'{first_name} {last_name}'
+
+def parse_json(data):
+    if not isinstance(data, dict) or 'period' not in data:
+        raise PlanError('A plan needs a period')
+    return data['period'], data.get('contributor_skills', []), data.get('components', [])
+
+def parse_csv(text):
+    period = None
+    contributor_skills = []
+    components = []
+    for line, row in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+        kind = row.get('type')
+        try:
+            if kind == 'period':
+                period = {'name': row['name'], 'start_date': row['start_date'], 'end_date': row['end_date']}
+            elif kind == 'contributor_skill':
+                contributor_skills.append({'contributor': row['contributor'], 'skill': row['skill']})
+            elif kind == 'component':
+                components.append({
+                    'project': row['project'],
+                    'project_description': row.get('project_description') or '',
+                    'name': row.get('name') or '',
+                    'description': row.get('description') or None,
+                    'skill': row['skill'],
+                    'estimated_weeks': row.get('estimated_weeks') or None,
+                    'contributor': row.get('contributor') or None,
+                    'weeks': [int(week) for week in (row.get('weeks') or '').split()]
+                })
+            else:
+                raise PlanError(f'Unknown record type {kind!r} on line {line}')
+        except (KeyError, ValueError):
+            raise PlanError(f'Malformed {kind} record on line {line}')
+    if period is None:
+        raise PlanError('A plan needs a period record')
+    return period, contributor_skills, components
+
+def import_plan(period_data, contributor_skills, components):
+    # Everything is staged in the current session; the caller commits
+    try:
+        period = Period(
+            name=period_data['name'],
+            start_date=datetime.strptime(period_data['start_date'], '%Y-%m-%d'),
+            end_date=datetime.strptime(period_data['end_date'], '%Y-%m-%d')
+        )
+    except (KeyError, TypeError, ValueError):
+        raise PlanError('The period needs a name, start_date and end_date (YYYY-MM-DD)')
+    if db.session.query(Period.period_id).filter(Period.name == period.name).first():
+        raise PlanError(f'A period named {period.name!r} already exists')
+    db.session.add(period)
+    db.session.flush()
+    try:
+        summary = _load_records(period, contributor_skills, components)
+    except (KeyError, TypeError, ValueError) as error:
+        raise PlanError(f'Malformed plan record: {error!r}')
+    summary['period_id'] = period.period_id
+    return summary
+
+def _load_records(period, contributor_skills, components):
+    num_weeks = period.num_weeks
+
+    # One lookup map per kind of name, creating whatever is missing
+    skill_names = {row['skill'] for row in contributor_skills} | {row['skill'] for row in components}
+    skills = {row.name: row.skill_id for row in db.session.query(Skill.skill_id, Skill.name).filter(Skill.name.in_(skill_names))}
+    new_skills = [{'skill_id': str(uuid.uuid4()), 'name': name} for name in sorted(skill_names - skills.keys())]
+    skills.update((row['name'], row['skill_id']) for row in new_skills)
+
+    contributor_names = {row['contributor'] for row in contributor_skills} | {row['contributor'] for row in components if row.get('contributor')}
+    contributors = {}
+    if contributor_names:
+        contributors = {_full_name(row.first_name, row.last_name): row.contributor_id
+                        for row in (db.session.query(Contributor.contributor_id, Contributor.first_name, Contributor.last_name)
+                        .filter((Contributor.first_name + ' ' + Contributor.last_name).in_(contributor_names)))}
+    new_contributors = []
+    for name in sorted(contributor_names - contributors.keys()):
+        first_name, _, last_name = name.partition(' ')
+        new_contributors.append({'contributor_id': str(uuid.uuid4()), 'first_name': first_name, 'last_name': last_name})
+        contributors[name] = new_contributors[-1]['contributor_id']
+
+    projects = {}
+    component_rows = []
+    assignment_rows = []
+    for row in components:
+        project = row['project']
+        if project not in projects:
+            projects[project] = {'project_id': str(uuid.uuid4()), 'name': project,
+                                 'description': row.get('project_description') or '', 'period_id': period.period_id}
+        weeks = sorted(set(row.get('weeks') or []))
+        contributor_id = contributors[row['contributor']] if row.get('contributor') else None
+        if weeks and contributor_id is None:
+            raise PlanError(f"Component {row.get('name') or project!r} has weeks but no contributor")
+        if weeks and (weeks[0] < 0 or weeks[-1] >= num_weeks):
+            raise PlanError(f"Component {row.get('name') or project!r} has weeks outside the {num_weeks}-week period")
+        component_id = str(uuid.uuid4())
+        component_rows.append({
+            'component_id': component_id,
+            'name': row.get('name') or project + ' ' + row['skill'],
+            'description': row.get('description'),
+            'project_id': projects[project]['project_id'],
+            'skill_id': skills[row['skill']],
+            'estimated_weeks': int(row['estimated_weeks']) if row.get('estimated_weeks') is not None else None,
+            'contributor_id': contributor_id,
+            'week_mask': weeks_to_mask(weeks)
+        })
+        assignment_rows.extend({'component_id': component_id, 'contributor_id': contributor_id, 'week': week} for week in weeks)
+
+    contributor_skill_rows = {(contributors[row['contributor']], skills[row['skill']]) for row in contributor_skills}
+
+    for model, rows in ((Skill, new_skills), (Contributor, new_contributors), (Project, list(projects.values())),
+                        (Component, component_rows), (Assignment, assignment_rows)):
+        if rows:
+            db.session.execute(db.insert(model), rows)
+    if contributor_skill_rows:
+        db.session.execute(insert(ContributorSkill).on_conflict_do_nothing(),
+                           [{'contributor_id': contributor_id, 'skill_id': skill_id} for contributor_id, skill_id in contributor_skill_rows])
+
+    if new_skills:
+        touch_scopes(['skills'])
+    touched_contributors = {contributor_id for contributor_id, _ in contributor_skill_rows} | {row['contributor_id'] for row in new_contributors}
+    if touched_contributors:
+        touch_contributors(touched_contributors)
+    touch_components(row['component_id'] for row in component_rows)
+
+    return {
+        'projects': len(projects),
+        'components': len(component_rows),
+        'assignments': len(assignment_rows),
+        'skills_created': len(new_skills),
+        'contributors_created': len(new_contributors)
+    }
+
+def export_plan(period):
+    # Returns the period record and lazy iterators over the rest, each reading
+    # from its own server-side cursor
+    period_record = {
+        'name': period.name,
+        'start_date': period.start_date.strftime('%Y-%m-%d'),
+        'end_date': period.end_date.strftime('%Y-%m-%d')
+    }
+    return period_record, _export_contributor_skills(period), _export_components(period)
+
+def _export_contributor_skills(period):
+    period_contributors = (db.select(Component.contributor_id)
+    .join(Project, Component.project_id == Project.project_id)
+    .where(Project.period_id == period.period_id, Component.contributor_id.isnot(None)))
+    rows = db.session.execute(db.select(Contributor.first_name, Contributor.last_name, Skill.name)
+    .join(ContributorSkill, ContributorSkill.contributor_id == Contributor.contributor_id)
+    .join(Skill, ContributorSkill.skill_id == Skill.skill_id)
+    .where(Contributor.contributor_id.in_(period_contributors))
+    .order_by(Contributor.last_name, Contributor.first_name, Skill.name)
+    .execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in rows:
+        yield {'contributor': _full_name(row.first_name, row.last_name), 'skill': row.name}
+
+def _export_components(period):
+    order = (Project.name, Project.project_id, Component.component_id)
+    components = db.session.execute(db.select(
+        Component.component_id, Component.name, Component.description, Component.estimated_weeks, Component.week_mask,
+        Project.name.label('project'), Project.description.label('project_description'),
+        Skill.name.label('skill'), Contributor.first_name, Contributor.last_name)
+    .join(Project, Component.project_id == Project.project_id)
+    .join(Skill, Component.skill_id == Skill.skill_id)
+    .outerjoin(Contributor, Component.contributor_id == Contributor.contributor_id)
+    .where(Project.period_id == period.period_id)
+    .order_by(*order)
+    .execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+    # Without the bitmap, weeks come from a second cursor over the assignments
+    # in the same order, merged as both advance
+    weeks = iter(())
+    if not period.uses_week_bitmap:
+        weeks = iter(db.session.execute(db.select(Assignment.component_id, Assignment.week)
+        .join(Component, Assignment.component_id == Component.component_id)
+        .join(Project, Component.project_id == Project.project_id)
+        .where(Project.period_id == period.period_id)
+        .order_by(*order, Assignment.week)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)))
+    pending = next(weeks, None)
+
+    for row in components:
+        if period.uses_week_bitmap:
+            assigned = [week for week, is_set in enumerate(mask_to_chart(row.week_mask, period.num_weeks)) if is_set]
+        else:
+            assigned = []
+            while pending is not None and pending.component_id == row.component_id:
+                assigned.append(pending.week)
+                pending = next(weeks, None)
+        yield {
+            'project': row.project,
+            'project_description': row.project_description,
+            'name': row.name,
+            'description': row.description,
+            'skill': row.skill,
+            'estimated_weeks': row.estimated_weeks,
+            'contributor': _full_name(row.first_name, row.last_name) if row.first_name is not None else None,
+            'weeks': assigned
+        }
+
+def to_json(period_record, contributor_skills, components):
+    yield '{"period": ' + json.dumps(period_record) + ', "contributor_skills": ['
+    for index, record in enumerate(contributor_skills):
+        yield (', ' if index else '') + json.dumps(record)
+    yield '], "components": ['
+    for index, record in enumerate(components):
+        yield (', ' if index else '') + json.dumps(record)
+    yield ']}\n'
+
+def to_csv(period_record, contributor_skills, components):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writeheader()
+    writer.writerow({'type': 'period', **period_record})
+    yield flush()
+    for record in contributor_skills:
+        writer.writerow({'type': 'contributor_skill', **record})
+        yield flush()
+    for record in components:
+        writer.writerow({'type': 'component', **record, 'weeks': ' '.join(str(week) for week in record['weeks'])})
+        yield flush()
+
+FORMATS = {
+    'json': (to_json, 'application/json'),
+    'csv': (to_csv, 'text/csv')
+}
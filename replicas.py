@@ -0,0 +1,105 @@
+"""Read replica routing.
+
+Every URL in DATABASE_REPLICA_URLS becomes a Flask-SQLAlchemy bind named
+replica_<n>. GET and HEAD requests are given one of them round robin, and
+RoutingSession sends their reads there. Flushes and INSERT/UPDATE/DELETE
+statements always go to the primary and keep the rest of that request there
+too, as does everything outside a request (CLI commands, migrations).
+The skill index and contributor chart store load inside primary_reads(), since
+what they cache outlives the request.
+
+A request that commits marks its client for READ_YOUR_WRITES_SECONDS, in a
+cookie and in the X-Read-Primary-Until response header. While the mark is
+fresh that client's reads stay on the primary, so it sees its own writes
+whatever the replication lag.
+
+The cookie is SameSite=Lax, which browsers do not send on cross-site fetch or
+XHR requests. A frontend served from another origin must therefore keep the
+latest X-Read-Primary-Until it received and send it back as a request header;
+CORS allows and exposes the header for that.
+"""
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_PREFIX = 'replica_'
+READ_PRIMARY_COOKIE = 'read_primary_until'
+READ_PRIMARY_HEADER = 'X-Read-Primary-Until'
+READ_METHODS = ('GET', 'HEAD')
+
+@contextmanager
+def primary_reads():
+    # For the in-process caches shared by every request: rows a lagging
+    # replica has not seen yet must not be loaded into them as current
+    if not has_app_context():
+        yield
+        return
+    replica = g.get('db_replica')
+    g.db_replica = None
+    try:
+        yield
+    finally:
+        g.db_replica = replica
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('db_replica') is not None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                # Stay on the primary once this request has written
+                g.db_replica = None
+            else:
+                return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class ReplicaRouter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._replicas = None
+        self.replicas = []
+        self.read_your_writes = 0
+
+    def init_app(self, app):
+        self.replicas = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_PREFIX))
+        if not self.replicas:
+            return
+        self.read_your_writes = app.config['READ_YOUR_WRITES_SECONDS']
+        self._replicas = itertools.cycle(self.replicas)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not event.contains(RoutingSession, 'after_commit', self._after_commit):
+            event.listen(RoutingSession, 'after_commit', self._after_commit)
+
+    def _reads_primary(self):
+        token = request.headers.get(READ_PRIMARY_HEADER) or request.cookies.get(READ_PRIMARY_COOKIE)
+        try:
+            return float(token) > time.time()
+        except (TypeError, ValueError):
+            return False
+
+    def _before_request(self):
+        # g outlives the request when an app context was already pushed, so
+        # both marks are set afresh for each request
+        g.db_replica = None
+        g.db_wrote = False
+        if request.method in READ_METHODS and not self._reads_primary():
+            with self._lock:
+                g.db_replica = next(self._replicas)
+
+    def _after_commit(self, session):
+        if has_request_context():
+            g.db_wrote = True
+
+    def _after_request(self, response):
+        if g.get('db_wrote'):
+            until = time.time() + self.read_your_writes
+            response.set_cookie(READ_PRIMARY_COOKIE, f'{until:.3f}', max_age=math.ceil(self.read_your_writes),
+                                httponly=True, samesite='Lax')
+            response.headers[READ_PRIMARY_HEADER] = f'{until:.3f}'
+        return response
+
+replica_router = ReplicaRouter()
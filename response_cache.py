@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Scopes shared by every period view; a bump evicts all cached periods
+GLOBAL_SCOPES = ('contributors', 'skills')
+
+class NullBackend:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def keys(self):
+        return []
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+class LocalLRUBackend:
+    """Thread-safe in-process store bounded by entry count and age."""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+BACKENDS = {
+    'local': LocalLRUBackend,
+    'none': NullBackend,
+}
+
+class ResponseCache:
+    """Serialized period views keyed by (period_id, view, args).
+
+    Entries remember the change versions they were built from, so a write by
+    another worker turns them into misses. Commits in this process evict the
+    touched periods straight away.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or NullBackend()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        backend = app.config['RESPONSE_CACHE_BACKEND']
+        if backend == 'local':
+            self.backend = LocalLRUBackend(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+        else:
+            self.backend = BACKENDS[backend]()
+
+    def get(self, key, versions):
+        entry = self.backend.get(key)
+        if entry is None or entry[0] != versions:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, versions, body):
+        self.backend.set(key, (dict(versions), body))
+
+    def invalidate_period(self, period_id):
+        for key in self.backend.keys():
+            if key[0] == period_id:
+                self.backend.delete(key)
+                self.invalidations += 1
+
+    def on_commit(self, changes):
+        for scope in changes['versions']:
+            if scope in GLOBAL_SCOPES:
+                self.invalidations += len(self.backend)
+                self.backend.clear()
+                return
+            self.invalidate_period(scope)
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": getattr(self.backend, 'evictions', 0)
+        }
+
+response_cache = ResponseCache()
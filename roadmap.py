@@ -0,0 +1,98 @@
+"""Load across several periods on one absolute weekly calendar.
+
+Week n of a period lands on calendar week (period.start_date - start) / 7 + n,
+so overlapping or back-to-back periods add up on the same row. All assignments
+in range are counted by one grouped query, and the rows are scattered into
+contributor x week and skill x week matrices with NumPy.
+"""
+from datetime import timedelta
+import numpy as np
+from models import db, Period, Project, Component, Contributor, Skill, Assignment
+
+# Longest range served, about ten years
+MAX_ROADMAP_WEEKS = 520
+
+def monday(day):
+    return day - timedelta(days=day.weekday())
+
+def overlapping_periods(start, end):
+    return (db.session.query(Period)
+    .filter(Period.start_date <= end, Period.end_date >= monday(start))
+    .order_by(Period.start_date)
+    .all())
+
+def _weekly_load(ids, week_offsets, counts, num_weeks):
+    keys, rows = np.unique(ids, return_inverse=True)
+    load = np.zeros((len(keys), num_weeks), dtype=np.int64)
+    np.add.at(load, (rows, week_offsets), counts)
+    return keys, load
+
+def build_roadmap(periods, start, end):
+    start = monday(start)
+    num_weeks = (monday(end) - start).days // 7 + 1
+
+    rows = (db.session.query(
+        Period.start_date,
+        Assignment.week,
+        Assignment.contributor_id,
+        Contributor.first_name,
+        Contributor.last_name,
+        Component.skill_id,
+        Skill.name.label('skill_name'),
+        db.func.count().label('load')
+    )
+    .join(Project, Project.period_id == Period.period_id)
+    .join(Component, Component.project_id == Project.project_id)
+    .join(Assignment, Assignment.component_id == Component.component_id)
+    .join(Contributor, Assignment.contributor_id == Contributor.contributor_id)
+    .join(Skill, Component.skill_id == Skill.skill_id)
+    .filter(Period.start_date <= end, Period.end_date >= start)
+    .group_by(Period.period_id, Period.start_date, Assignment.week, Assignment.contributor_id,
+              Contributor.first_name, Contributor.last_name, Component.skill_id, Skill.name)
+    .all())
+
+    response = {
+        "from": start.strftime('%Y-%m-%d'),
+        "to": (start + timedelta(weeks=num_weeks - 1)).strftime('%Y-%m-%d'),
+        "weeks": [(start + timedelta(weeks=week)).strftime('%Y-%m-%d') for week in range(num_weeks)],
+        "periods": [{
+            "period_id": period.period_id,
+            "name": period.name,
+            "start_week": (period.start_date - start).days // 7,
+            "num_weeks": period.num_weeks
+        } for period in periods],
+        "contributors": [],
+        "skills": []
+    }
+    if not rows:
+        return response
+
+    period_starts, weeks, contributor_ids, _, _, skill_ids, _, counts = zip(*rows)
+    week_offsets = (np.array(period_starts, dtype='datetime64[D]') - np.datetime64(start.date(), 'D')).astype(np.int64) // 7 + np.array(weeks)
+    counts = np.array(counts, dtype=np.int64)
+    inside = (week_offsets >= 0) & (week_offsets < num_weeks)
+    week_offsets = week_offsets[inside]
+    counts = counts[inside]
+
+    contributor_ids = np.array([str(contributor_id) for contributor_id in contributor_ids], dtype=object)[inside]
+    skill_ids = np.array([str(skill_id) for skill_id in skill_ids], dtype=object)[inside]
+    contributor_names = {str(row.contributor_id): row.first_name + " " + row.last_name for row in rows}
+    skill_names = {str(row.skill_id): row.skill_name for row in rows}
+
+    keys, load = _weekly_load(contributor_ids, week_offsets, counts, num_weeks)
+    response["contributors"] = sorted(({
+        "contributor_id": contributor_id,
+        "name": contributor_names[contributor_id],
+        "weekly_load": weekly_load.tolist(),
+        "assigned_weeks": int(weekly_load.sum()),
+        "overbooked_weeks": int((weekly_load > 1).sum())
+    } for contributor_id, weekly_load in zip(keys, load)), key=lambda contributor: contributor["name"])
+
+    keys, load = _weekly_load(skill_ids, week_offsets, counts, num_weeks)
+    response["skills"] = sorted(({
+        "skill_id": skill_id,
+        "skill": skill_names[skill_id],
+        "weekly_load": weekly_load.tolist(),
+        "assigned_weeks": int(weekly_load.sum())
+    } for skill_id, weekly_load in zip(keys, load)), key=lambda skill: skill["skill"])
+    return response
@@ -0,0 +1,398 @@
+"""What-if planning scenarios held in memory.
+
+A Snapshot is a period's planning state read once: every component's
+contributor, estimated weeks and assigned weeks as a bitmask, each
+contributor's weekly load and the per-skill totals. It is never modified, and
+all scenarios started while the period is at the same version share it.
+
+A Scenario only records what it changed on top of its snapshot, so a fork
+copies those few entries and nothing else. An edit replaces the component,
+the weekly load of the contributors involved and its skill's totals, so
+charts and capacity are always current without a rebuild. diff() lists the
+changes against the snapshot and commit() writes them in one transaction,
+guarded by the component versions the snapshot was read at.
+
+Scenarios live in the memory of one worker process, like the skill index,
+and the least recently used ones are dropped past SCENARIO_LIMIT.
+"""
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from models import (db, Project, Component, Contributor, ContributorSkill, Skill, Assignment, ChangeVersion,
+                    record_event, touch_components)
+from utils import count_weeks, mask_to_chart
+
+Planned = namedtuple('Planned', 'name skill_id contributor_id estimated_weeks week_mask version')
+
+class ScenarioError(Exception):
+    # index is set to the failing edit when raised from Scenario.apply
+    index = None
+
+def _week_numbers(mask):
+    weeks = []
+    week = 0
+    while mask:
+        if mask & 1:
+            weeks.append(week)
+        mask >>= 1
+        week += 1
+    return weeks
+
+def _add_load(load, mask, delta):
+    load = list(load)
+    for week in _week_numbers(mask):
+        load[week] += delta
+    return tuple(load)
+
+def _id(value):
+    return str(value) if value is not None else None
+
+class Snapshot:
+    def __init__(self, period, versions):
+        self.period_id = str(period.period_id)
+        self.num_weeks = period.num_weeks
+        self.versions = versions
+
+        component_rows = (db.session.query(Component.component_id, Component.name, Component.skill_id,
+                                           Component.contributor_id, Component.estimated_weeks, Component.version)
+        .join(Project, Component.project_id == Project.project_id)
+        .filter(Project.period_id == period.period_id)
+        .all())
+        masks = {}
+        for row in (db.session.query(Assignment.component_id, Assignment.week)
+        .join(Component, Assignment.component_id == Component.component_id)
+        .join(Project, Component.project_id == Project.project_id)
+        .filter(Project.period_id == period.period_id)):
+            if row.week < self.num_weeks:
+                component_id = str(row.component_id)
+                masks[component_id] = masks.get(component_id, 0) | 1 << row.week
+
+        self.components = {}
+        self.by_contributor = {}
+        self.loads = {}
+        self.skill_totals = {}
+        self.idle = (0,) * self.num_weeks
+        for row in component_rows:
+            component_id = str(row.component_id)
+            component = Planned(row.name, _id(row.skill_id), _id(row.contributor_id), row.estimated_weeks or 0,
+                                masks.get(component_id, 0), row.version)
+            self.components[component_id] = component
+            if component.contributor_id:
+                self.by_contributor.setdefault(component.contributor_id, set()).add(component_id)
+                self.loads[component.contributor_id] = _add_load(self.loads.get(component.contributor_id, self.idle), component.week_mask, 1)
+            if component.skill_id:
+                components, estimated_weeks, assigned_weeks = self.skill_totals.get(component.skill_id, (0, 0, 0))
+                self.skill_totals[component.skill_id] = (components + 1, estimated_weeks + component.estimated_weeks,
+                                                         assigned_weeks + count_weeks(component.week_mask))
+
+        self.names = {str(row.contributor_id): row.first_name + " " + row.last_name
+                      for row in db.session.query(Contributor.contributor_id, Contributor.first_name, Contributor.last_name)}
+        self.skills_of = {}
+        for row in db.session.query(ContributorSkill.contributor_id, ContributorSkill.skill_id):
+            self.skills_of.setdefault(str(row.contributor_id), set()).add(str(row.skill_id))
+        self.skill_names = {str(row.skill_id): row.name for row in db.session.query(Skill.skill_id, Skill.name)}
+        self.supply = {}
+        for skill_ids in self.skills_of.values():
+            for skill_id in skill_ids:
+                self.supply[skill_id] = self.supply.get(skill_id, 0) + 1
+
+class Scenario:
+    def __init__(self, snapshot, parent_id=None, overlays=None):
+        self.scenario_id = str(uuid.uuid4())
+        self.parent_id = parent_id
+        self.snapshot = snapshot
+        self._components, self._loads, self._skill_totals = overlays or ({}, {}, {})
+        self._lock = threading.Lock()
+
+    def fork(self):
+        with self._lock:
+            return Scenario(self.snapshot, self.scenario_id,
+                            (dict(self._components), dict(self._loads), dict(self._skill_totals)))
+
+    def component(self, component_id):
+        component = self._components.get(component_id) or self.snapshot.components.get(component_id)
+        if component is None:
+            raise ScenarioError(f"Component {component_id} is not in this period")
+        return component
+
+    def load(self, contributor_id):
+        return self._loads.get(contributor_id) or self.snapshot.loads.get(contributor_id, self.snapshot.idle)
+
+    def _replace(self, component_id, **changes):
+        old = self.component(component_id)
+        new = old._replace(**changes)
+        if old.contributor_id and old.week_mask:
+            self._loads[old.contributor_id] = _add_load(self.load(old.contributor_id), old.week_mask, -1)
+        if new.contributor_id and new.week_mask:
+            self._loads[new.contributor_id] = _add_load(self.load(new.contributor_id), new.week_mask, 1)
+        if new.skill_id:
+            components, estimated_weeks, assigned_weeks = self._skill_totals.get(new.skill_id) or self.snapshot.skill_totals[new.skill_id]
+            self._skill_totals[new.skill_id] = (components, estimated_weeks + new.estimated_weeks - old.estimated_weeks,
+                                                assigned_weeks + count_weeks(new.week_mask) - count_weeks(old.week_mask))
+        self._components[component_id] = new
+
+    def _mask(self, weeks):
+        mask = 0
+        for week in weeks:
+            if not isinstance(week, int) or isinstance(week, bool):
+                raise ScenarioError(f"Week {week!r} is not a week number")
+            if not 0 <= week < self.snapshot.num_weeks:
+                raise ScenarioError(f"Week {week} is outside the period")
+            mask |= 1 << week
+        return mask
+
+    def assign_contributor(self, component_id, contributor_id):
+        # Like Component.assign_contributor: the assigned weeks move along,
+        # and no contributor clears them
+        component = self.component(component_id)
+        if contributor_id is None:
+            self._replace(component_id, contributor_id=None, week_mask=0)
+            return
+        if component.skill_id not in self.snapshot.skills_of.get(contributor_id, ()):
+            raise ScenarioError("Contributor does not have the required skill")
+        self._replace(component_id, contributor_id=contributor_id)
+
+    def swap_contributors(self, component_id, other_id):
+        contributor_id = self.component(component_id).contributor_id
+        self.assign_contributor(component_id, self.component(other_id).contributor_id)
+        self.assign_contributor(other_id, contributor_id)
+
+    def change_weeks(self, component_id, added_weeks=(), removed_weeks=()):
+        component = self.component(component_id)
+        if component.contributor_id is None:
+            raise ScenarioError("Component has no contributor")
+        self._replace(component_id, week_mask=(component.week_mask | self._mask(added_weeks)) & ~self._mask(removed_weeks))
+
+    def shift_weeks(self, component_id, offset):
+        component = self.component(component_id)
+        week_mask = component.week_mask << offset if offset >= 0 else component.week_mask >> -offset
+        if count_weeks(week_mask) != count_weeks(component.week_mask) or week_mask >> self.snapshot.num_weeks:
+            raise ScenarioError("Shift would move weeks outside the period")
+        self._replace(component_id, week_mask=week_mask)
+
+    def set_estimated_weeks(self, component_id, estimated_weeks):
+        self.component(component_id)
+        self._replace(component_id, estimated_weeks=estimated_weeks)
+
+    def apply(self, edits):
+        # All or nothing: the overlays are put back if any edit fails
+        with self._lock:
+            saved = (dict(self._components), dict(self._loads), dict(self._skill_totals))
+            try:
+                for index, edit in enumerate(edits):
+                    if not isinstance(edit, dict):
+                        raise ScenarioError(f"Edit {index} is not an object")
+                    handler = EDITS.get(edit.get('type'))
+                    if handler is None:
+                        raise ScenarioError(f"Unknown edit type {edit.get('type')!r}")
+                    try:
+                        handler(self, edit)
+                    except KeyError as error:
+                        raise ScenarioError(f"{error.args[0]} is required")
+                    except (TypeError, ValueError) as error:
+                        raise ScenarioError(f"Edit {index} is malformed: {error}")
+            except ScenarioError as error:
+                self._components, self._loads, self._skill_totals = saved
+                error.index = index
+                raise
+
+    def chart(self, component_id):
+        component = self.component(component_id)
+        return {
+            'component_id': component_id,
+            'component_name': component.name,
+            'contributor_id': component.contributor_id,
+            'estimated_weeks': component.estimated_weeks,
+            'assigned_weeks': count_weeks(component.week_mask),
+            'assignments': mask_to_chart(component.week_mask, self.snapshot.num_weeks)
+        }
+
+    def capacity(self):
+        # Same shape as Period.get_capacity
+        snapshot = self.snapshot
+        contributors = []
+        conflicts = []
+        for contributor_id in sorted(snapshot.loads.keys() | self._loads.keys(), key=lambda contributor_id: snapshot.names.get(contributor_id, '')):
+            load = self.load(contributor_id)
+            if not any(load):
+                continue
+            contributors.append({
+                "contributor_id": contributor_id,
+                "name": snapshot.names.get(contributor_id),
+                "weekly_load": list(load),
+                "assigned_weeks": sum(load)
+            })
+            for week, count in enumerate(load):
+                if count > 1:
+                    conflicts.append({
+                        "contributor_id": contributor_id,
+                        "name": snapshot.names.get(contributor_id),
+                        "week": week,
+                        "components": sorted(({"component_id": component_id, "component_name": self.component(component_id).name}
+                                              for component_id in self._components_of(contributor_id)
+                                              if self.component(component_id).week_mask >> week & 1),
+                                             key=lambda component: component["component_name"])
+                    })
+
+        conflicts.sort(key=lambda conflict: (conflict["contributor_id"], conflict["week"]))
+
+        skills = []
+        for skill_id in sorted(snapshot.skill_totals.keys() | snapshot.supply.keys(), key=lambda skill_id: snapshot.skill_names.get(skill_id, '')):
+            components, estimated_weeks, assigned_weeks = self._skill_totals.get(skill_id) or snapshot.skill_totals.get(skill_id, (0, 0, 0))
+            available_weeks = snapshot.supply.get(skill_id, 0) * snapshot.num_weeks
+            skills.append({
+                "skill_id": skill_id,
+                "skill": snapshot.skill_names.get(skill_id),
+                "components": components,
+                "estimated_weeks": estimated_weeks,
+                "assigned_weeks": assigned_weeks,
+                "contributors": snapshot.supply.get(skill_id, 0),
+                "available_weeks": available_weeks,
+                "shortfall": max(estimated_weeks - available_weeks, 0)
+            })
+
+        return {
+            "num_weeks": snapshot.num_weeks,
+            "contributors": contributors,
+            "conflicts": conflicts,
+            "skills": skills
+        }
+
+    def _components_of(self, contributor_id):
+        component_ids = set(self.snapshot.by_contributor.get(contributor_id, ()))
+        component_ids.update(component_id for component_id, component in self._components.items()
+                             if component.contributor_id == contributor_id)
+        return [component_id for component_id in component_ids if self.component(component_id).contributor_id == contributor_id]
+
+    def diff(self):
+        changes = []
+        for component_id, component in self._components.items():
+            original = self.snapshot.components[component_id]
+            if component == original:
+                continue
+            change = {'component_id': component_id, 'component_name': component.name, 'version': original.version}
+            if component.contributor_id != original.contributor_id:
+                change['contributor_id'] = {'from': original.contributor_id, 'to': component.contributor_id}
+            if component.estimated_weeks != original.estimated_weeks:
+                change['estimated_weeks'] = {'from': original.estimated_weeks, 'to': component.estimated_weeks}
+            if component.week_mask != original.week_mask:
+                change['added_weeks'] = _week_numbers(component.week_mask & ~original.week_mask)
+                change['removed_weeks'] = _week_numbers(original.week_mask & ~component.week_mask)
+            changes.append(change)
+        return sorted(changes, key=lambda change: change['component_name'])
+
+    def is_stale(self):
+        return ChangeVersion.get_versions(list(self.snapshot.versions)) != self.snapshot.versions
+
+EDITS = {
+    'assign_contributor': lambda scenario, edit: scenario.assign_contributor(edit['component_id'], edit['contributor_id']),
+    'swap_contributors': lambda scenario, edit: scenario.swap_contributors(edit['component_id'], edit['other_component_id']),
+    'weeks': lambda scenario, edit: scenario.change_weeks(edit['component_id'], edit.get('added_weeks', []), edit.get('removed_weeks', [])),
+    'shift_weeks': lambda scenario, edit: scenario.shift_weeks(edit['component_id'], int(edit['offset'])),
+    'estimated_weeks': lambda scenario, edit: scenario.set_estimated_weeks(edit['component_id'], int(edit['estimated_weeks'])),
+}
+
+def commit(scenario):
+    # Writes the whole diff with a fixed number of statements. Every changed
+    # component must still be at the version the snapshot read, otherwise
+    # VersionConflict is raised before anything is written.
+    changes = scenario.diff()
+    if not changes:
+        return []
+    component_ids = [change['component_id'] for change in changes]
+    Component.claim_versions(component_ids, {change['component_id']: change['version'] for change in changes})
+
+    components = Component.__table__
+    assignments = Assignment.__table__
+    reassigned = [{'b_component_id': change['component_id'], 'b_contributor_id': change['contributor_id']['to']}
+                  for change in changes if 'contributor_id' in change]
+    if reassigned:
+        db.session.execute(components.update()
+        .where(components.c.component_id == db.bindparam('b_component_id'))
+        .values(contributor_id=db.bindparam('b_contributor_id')), reassigned)
+        moved = [row for row in reassigned if row['b_contributor_id'] is not None]
+        if moved:
+            db.session.execute(assignments.update()
+            .where(assignments.c.component_id == db.bindparam('b_component_id'))
+            .values(contributor_id=db.bindparam('b_contributor_id')), moved)
+        cleared = [row['b_component_id'] for row in reassigned if row['b_contributor_id'] is None]
+        if cleared:
+            db.session.execute(assignments.delete().where(assignments.c.component_id.in_(cleared)))
+    estimates = [{'b_component_id': change['component_id'], 'b_estimated_weeks': change['estimated_weeks']['to']}
+                 for change in changes if 'estimated_weeks' in change]
+    if estimates:
+        db.session.execute(components.update()
+        .where(components.c.component_id == db.bindparam('b_component_id'))
+        .values(estimated_weeks=db.bindparam('b_estimated_weeks')), estimates)
+
+    week_changes = [{
+        'component_id': change['component_id'],
+        'contributor_id': scenario.component(change['component_id']).contributor_id,
+        'added_weeks': change['added_weeks'],
+        'removed_weeks': change['removed_weeks']
+    } for change in changes if 'added_weeks' in change and scenario.component(change['component_id']).contributor_id]
+    if week_changes:
+        Assignment.apply_week_changes(week_changes)
+    Component.refresh_week_masks(component_ids)
+    touch_components(component_ids)
+
+    for change in changes:
+        if 'contributor_id' in change:
+            record_event({'type': 'contributor', 'component_id': change['component_id'], 'contributor_id': change['contributor_id']['to']})
+            if change['contributor_id']['to'] is None:
+                record_event({'type': 'weeks_cleared', 'component_id': change['component_id']})
+        if 'estimated_weeks' in change:
+            record_event({'type': 'estimated_weeks', 'component_id': change['component_id'], 'estimated_weeks': change['estimated_weeks']['to']})
+    return Assignment.get_week_charts(component_ids)
+
+class ScenarioStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scenarios = OrderedDict()
+        # Latest snapshot per period, reused while its versions are current
+        self._snapshots = {}
+
+    def init_app(self, app):
+        app.extensions['scenarios'] = self
+
+    def clear(self):
+        with self._lock:
+            self._scenarios.clear()
+            self._snapshots = {}
+
+    def create(self, period):
+        period_id = str(period.period_id)
+        versions = ChangeVersion.get_versions([period_id, 'contributors'])
+        with self._lock:
+            snapshot = self._snapshots.get(period_id)
+        if snapshot is None or snapshot.versions != versions:
+            snapshot = Snapshot(period, versions)
+            with self._lock:
+                self._snapshots[period_id] = snapshot
+        return self._add(Scenario(snapshot))
+
+    def fork(self, scenario):
+        return self._add(scenario.fork())
+
+    def get(self, scenario_id):
+        with self._lock:
+            scenario = self._scenarios.get(scenario_id)
+            if scenario is not None:
+                self._scenarios.move_to_end(scenario_id)
+            return scenario
+
+    def discard(self, scenario_id):
+        with self._lock:
+            return self._scenarios.pop(scenario_id, None)
+
+    def _add(self, scenario):
+        with self._lock:
+            self._scenarios[scenario.scenario_id] = scenario
+            while len(self._scenarios) > current_app.config['SCENARIO_LIMIT']:
+                self._scenarios.popitem(last=False)
+            live = {id(scenario.snapshot) for scenario in self._scenarios.values()}
+            self._snapshots = {period_id: snapshot for period_id, snapshot in self._snapshots.items() if id(snapshot) in live}
+        return scenario
+
+scenarios = ScenarioStore()
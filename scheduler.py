@@ -0,0 +1,260 @@
+from flask import current_app
+from models import db, Project, Component, ContributorSkill, Assignment, VersionConflict, touch_components
+from utils import count_weeks
+
+# Passes of the local search that moves planned components between
+# contributors to make room for components the greedy pass could not fill.
+IMPROVE_PASSES = 3
+
+def load_period_state(period):
+    component_rows = (db.session.query(
+        Component.component_id,
+        Component.name,
+        Component.skill_id,
+        Component.estimated_weeks,
+        Component.contributor_id,
+        Component.version
+    )
+    .join(Project, Component.project_id == Project.project_id)
+    .filter(Project.period_id == period.period_id)
+    .all())
+
+    assignment_rows = (db.session.query(Assignment.component_id, Assignment.contributor_id, Assignment.week)
+    .join(Component, Assignment.component_id == Component.component_id)
+    .join(Project, Component.project_id == Project.project_id)
+    .filter(Project.period_id == period.period_id)
+    .all())
+
+    skill_rows = db.session.query(ContributorSkill.contributor_id, ContributorSkill.skill_id).all()
+
+    components = {}
+    for row in component_rows:
+        components[str(row.component_id)] = {
+            "component_id": row.component_id,
+            "name": row.name,
+            "skill_id": str(row.skill_id) if row.skill_id else None,
+            "estimated_weeks": row.estimated_weeks or 0,
+            "contributor_id": str(row.contributor_id) if row.contributor_id else None,
+            "version": row.version,
+            "locked_mask": 0
+        }
+
+    busy = {}
+    for row in assignment_rows:
+        if row.contributor_id is None:
+            continue
+        components[str(row.component_id)]["locked_mask"] |= 1 << row.week
+        contributor_id = str(row.contributor_id)
+        busy[contributor_id] = busy.get(contributor_id, 0) | 1 << row.week
+
+    contributors_by_skill = {}
+    for row in skill_rows:
+        contributors_by_skill.setdefault(str(row.skill_id), []).append(str(row.contributor_id))
+        busy.setdefault(str(row.contributor_id), 0)
+
+    return {
+        "num_weeks": period.num_weeks,
+        "components": components,
+        "contributors_by_skill": contributors_by_skill,
+        "busy": busy
+    }
+
+def _first_free_weeks(free_mask, count):
+    weeks = 0
+    while count > 0 and free_mask:
+        lowest = free_mask & -free_mask
+        weeks |= lowest
+        free_mask ^= lowest
+        count -= 1
+    return weeks
+
+def _candidates(state, component):
+    if component["contributor_id"]:
+        return [component["contributor_id"]]
+    return state["contributors_by_skill"].get(component["skill_id"], [])
+
+def _best_contributor(state, component_id, remaining, busy, full_mask, exclude=None):
+    best = None
+    for contributor_id in _candidates(state, state["components"][component_id]):
+        if contributor_id == exclude:
+            continue
+        free = count_weeks(full_mask & ~busy.get(contributor_id, 0))
+        score = (min(free, remaining), free)
+        if free and (best is None or score > best[0]):
+            best = (score, contributor_id)
+    return best[1] if best else None
+
+def _place(component_id, contributor_id, remaining, planned, busy, full_mask):
+    weeks = _first_free_weeks(full_mask & ~busy.get(contributor_id, 0), remaining)
+    busy[contributor_id] = busy.get(contributor_id, 0) | weeks
+    planned[component_id] = (contributor_id, weeks)
+    return count_weeks(weeks)
+
+def _unplace(component_id, planned, busy):
+    contributor_id, weeks = planned.pop(component_id, (None, 0))
+    if contributor_id is not None:
+        busy[contributor_id] &= ~weeks
+    return count_weeks(weeks)
+
+def plan_period(state, improve=True):
+    """Greedily fills each component's remaining estimated weeks.
+
+    Components with the fewest eligible contributors and the most missing
+    weeks are planned first. A component that already has a contributor keeps
+    them, existing assignments are never moved, and no contributor is booked
+    twice in the same week by the plan.
+    """
+    full_mask = (1 << state["num_weeks"]) - 1
+    busy = dict(state["busy"])
+    planned = {}
+
+    remaining = {}
+    for component_id, component in state["components"].items():
+        missing = component["estimated_weeks"] - count_weeks(component["locked_mask"])
+        if missing > 0 and component["skill_id"]:
+            remaining[component_id] = missing
+    order = sorted(remaining, key=lambda component_id: (len(_candidates(state, state["components"][component_id])), -remaining[component_id]))
+
+    for component_id in order:
+        contributor_id = _best_contributor(state, component_id, remaining[component_id], busy, full_mask)
+        if contributor_id is not None:
+            _place(component_id, contributor_id, remaining[component_id], planned, busy, full_mask)
+
+    def shortfall(component_id):
+        return remaining[component_id] - count_weeks(planned.get(component_id, (None, 0))[1])
+
+    if improve:
+        by_contributor = {}
+        for component_id, (contributor_id, _) in planned.items():
+            by_contributor.setdefault(contributor_id, set()).add(component_id)
+        # Best alternative contributor per (skill, weeks, excluded contributor);
+        # only valid until the next accepted move changes who is busy.
+        alternatives = {}
+        for _ in range(IMPROVE_PASSES):
+            improved = False
+            for component_id in order:
+                if shortfall(component_id) > 0 and _improve(state, component_id, remaining, planned, busy, full_mask, by_contributor, alternatives):
+                    improved = True
+                    alternatives.clear()
+            if not improved:
+                break
+
+    unscheduled = [{
+        "component_id": state["components"][component_id]["component_id"],
+        "component_name": state["components"][component_id]["name"],
+        "missing_weeks": shortfall(component_id)
+    } for component_id in order if shortfall(component_id) > 0]
+
+    plan = []
+    for component_id, (contributor_id, weeks) in planned.items():
+        if not weeks:
+            continue
+        component = state["components"][component_id]
+        plan.append({
+            "component_id": component["component_id"],
+            "component_name": component["name"],
+            "contributor_id": contributor_id,
+            "assign_contributor": component["contributor_id"] is None,
+            "added_weeks": [week for week in range(state["num_weeks"]) if weeks >> week & 1],
+            "version": component["version"]
+        })
+    return {"plan": plan, "unscheduled": unscheduled}
+
+def _improve(state, component_id, remaining, planned, busy, full_mask, by_contributor, alternatives):
+    # Make room for an underfilled component by moving one component planned
+    # onto one of its candidates (never one with a fixed contributor) to
+    # another contributor. The move is kept only if more weeks get planned.
+    for contributor_id in _candidates(state, state["components"][component_id]):
+        for other_id in list(by_contributor.get(contributor_id, ())):
+            other = state["components"][other_id]
+            if other_id == component_id or other["contributor_id"]:
+                continue
+            key = (other["skill_id"], remaining[other_id], contributor_id)
+            if key not in alternatives:
+                alternatives[key] = _best_contributor(state, other_id, remaining[other_id], busy, full_mask, exclude=contributor_id)
+            alternative = alternatives[key]
+            if alternative is None:
+                continue
+
+            saved_planned = {moved_id: planned[moved_id] for moved_id in (component_id, other_id) if moved_id in planned}
+            touched = {contributor_id, alternative} | {previous_contributor for previous_contributor, _ in saved_planned.values()}
+            saved_busy = {busy_id: busy.get(busy_id, 0) for busy_id in touched}
+            before = _unplace(component_id, planned, busy) + _unplace(other_id, planned, busy)
+            after = _place(component_id, contributor_id, remaining[component_id], planned, busy, full_mask)
+            after += _place(other_id, alternative, remaining[other_id], planned, busy, full_mask)
+            if after > before:
+                for moved_id, (previous_contributor, _) in saved_planned.items():
+                    by_contributor[previous_contributor].discard(moved_id)
+                by_contributor.setdefault(contributor_id, set()).add(component_id)
+                by_contributor.setdefault(alternative, set()).add(other_id)
+                return True
+
+            busy.update(saved_busy)
+            planned.pop(component_id, None)
+            planned.pop(other_id, None)
+            planned.update(saved_planned)
+    return False
+
+def check_plan(period, plan):
+    # A previewed plan sent back to be applied: every item must name a
+    # component of this period and the version it was planned against. An
+    # item that assigns a contributor needs one with the component's skill,
+    # any other must keep the component's contributor, and no contributor may
+    # be booked twice in a week. A booking made elsewhere since the preview
+    # raises VersionConflict for the components holding it.
+    for item in plan:
+        missing = [key for key in ("component_id", "contributor_id", "added_weeks", "version") if item.get(key) is None]
+        if missing:
+            raise ValueError(f"Plan item is missing {', '.join(missing)}")
+    components = {str(row.component_id): row for row in (db.session.query(Component.component_id, Component.skill_id, Component.contributor_id)
+    .join(Project, Component.project_id == Project.project_id)
+    .filter(Project.period_id == period.period_id, Component.component_id.in_([item["component_id"] for item in plan])))}
+    skill_index = current_app.extensions['skill_index']
+    planned = {}
+    for item in plan:
+        component = components.get(str(item["component_id"]))
+        if component is None:
+            raise ValueError(f"Component {item['component_id']} is not in this period")
+        contributor_id = str(item["contributor_id"])
+        if item.get("assign_contributor"):
+            if not skill_index.has_skill(item["contributor_id"], component.skill_id):
+                raise ValueError("Contributor does not have the required skill")
+        elif component.contributor_id is None or str(component.contributor_id) != contributor_id:
+            raise ValueError(f"Component {item['component_id']} is not assigned to contributor {contributor_id}")
+        for week in item["added_weeks"]:
+            if not isinstance(week, int):
+                raise ValueError(f"Week {week!r} is not a week number")
+            if (contributor_id, week) in planned:
+                raise ValueError(f"Plan books contributor {contributor_id} twice in week {week}")
+            planned[(contributor_id, week)] = str(item["component_id"])
+
+    booked = (db.session.query(Assignment.component_id, Assignment.contributor_id, Assignment.week)
+    .join(Component, Assignment.component_id == Component.component_id)
+    .join(Project, Component.project_id == Project.project_id)
+    .filter(Project.period_id == period.period_id, Assignment.contributor_id.in_({contributor_id for contributor_id, _ in planned}))
+    .all())
+    clashes = {row.component_id for row in booked
+               if planned.get((str(row.contributor_id), row.week), str(row.component_id)) != str(row.component_id)}
+    if clashes:
+        raise VersionConflict(clashes)
+
+def apply_plan(plan):
+    # Each item carries the component version the plan was computed from, so
+    # a component edited in the meantime raises VersionConflict. The week
+    # changes claim those versions before contributors are written.
+    charts = Assignment.apply_week_changes([{
+        "component_id": item["component_id"],
+        "contributor_id": item["contributor_id"],
+        "added_weeks": item["added_weeks"],
+        "removed_weeks": [],
+        "version": item.get("version")
+    } for item in plan])
+    contributor_updates = [{"b_component_id": item["component_id"], "b_contributor_id": item["contributor_id"]}
+                           for item in plan if item.get("assign_contributor")]
+    if contributor_updates:
+        components = Component.__table__
+        db.session.execute(components.update()
+        .where(components.c.component_id == db.bindparam("b_component_id"))
+        .values(contributor_id=db.bindparam("b_contributor_id")), contributor_updates)
+        touch_components([item["b_component_id"] for item in contributor_updates])
+    return charts
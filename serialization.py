@@ -0,0 +1,97 @@
+"""JSON provider and compact week chart encodings.
+
+OrjsonProvider replaces Flask's default provider when orjson is installed and
+writes documents that parse to the same values: sorted keys, UUIDs as strings
+and datetimes as HTTP dates. The bytes are not identical, since non-ASCII text
+is written as UTF-8 where the default provider escapes it.
+
+Week charts are lists of booleans unless the client asks for weeks=bits
+("0110...") or weeks=rle (alternating run lengths starting with unassigned
+weeks, so [1, 2, 10] is one free week, two assigned, ten free), either in the
+query string or as a parameter of the Accept header:
+
+    Accept: application/json; weeks=rle
+"""
+import re
+from datetime import date
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WEEK_ENCODINGS = ('bits', 'rle')
+
+_accept_weeks = re.compile(r'weeks=(\w+)')
+
+def _default(value):
+    if isinstance(value, date):
+        return http_date(value)
+    return DefaultJSONProvider.default(value)
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self):
+        return orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj, **kwargs):
+        # Callers asking for stdlib options (indent and the like) get stdlib
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'default': DefaultJSONProvider,
+}
+
+def init_app(app):
+    name = app.config['JSON_PROVIDER']
+    if name == 'orjson' and orjson is None:
+        name = 'default'
+    app.json = PROVIDERS[name](app)
+
+def week_encoding():
+    # None means the plain boolean lists
+    encoding = request.args.get('weeks')
+    if encoding is None:
+        match = _accept_weeks.search(request.headers.get('Accept', ''))
+        encoding = match.group(1) if match else None
+    return encoding if encoding in WEEK_ENCODINGS else None
+
+def encode_weeks(chart, encoding):
+    if encoding == 'bits':
+        return ''.join('1' if week else '0' for week in chart)
+    if encoding == 'rle':
+        runs = []
+        current = False
+        length = 0
+        for week in chart:
+            if bool(week) == current:
+                length += 1
+            else:
+                runs.append(length)
+                current = not current
+                length = 1
+        runs.append(length)
+        return runs
+    return chart
+
+def encode_charts(items, encoding):
+    # Re-encodes the 'assignments' chart of each component-shaped dict in place
+    if encoding is not None:
+        for item in items:
+            item['assignments'] = encode_weeks(item['assignments'], encoding)
+    return items
@@ -0,0 +1,129 @@
+import threading
+import time
+from models import db, Contributor, ContributorSkill, ChangeVersion
+from replicas import primary_reads
+
+# Seconds between checks for contributor writes made by other workers
+REFRESH_INTERVAL = 5
+
+class SkillIndex:
+    """In-process skill -> contributors and contributor -> skills maps.
+
+    Built on first use and patched from this process's committed contributor
+    writes. Writes by other workers show up as a moved 'contributors' version,
+    looked at no more than every REFRESH_INTERVAL seconds, so lookups normally
+    run without a query. A negative has_skill answer is confirmed against the
+    database before anything is rejected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contributors = None
+        self._by_skill = {}
+        self._version = None
+        self._checked_at = 0
+        self._pending = set()
+
+    def init_app(self, app):
+        app.extensions['skill_index'] = self
+
+    def clear(self):
+        with self._lock:
+            self._contributors = None
+            self._by_skill = {}
+            self._version = None
+            self._pending = set()
+
+    def on_commit(self, changes):
+        with self._lock:
+            self._pending.update(str(contributor_id) for contributor_id in changes['contributors'])
+            version = changes['versions'].get('contributors')
+            if version is None or self._contributors is None:
+                return
+            if self._version == version - 1:
+                self._version = version
+            else:
+                self._contributors = None
+
+    def has_skill(self, contributor_id, skill_id):
+        with self._lock:
+            self._ensure()
+            contributor = self._contributors.get(str(contributor_id))
+            if contributor is not None and str(skill_id) in contributor['skill_ids']:
+                return True
+        found = (db.session.query(ContributorSkill.contributor_id)
+        .filter(ContributorSkill.contributor_id == contributor_id, ContributorSkill.skill_id == skill_id)
+        .first()) is not None
+        if found:
+            with self._lock:
+                self._pending.add(str(contributor_id))
+        return found
+
+    def skills_of(self, contributor_id):
+        with self._lock:
+            self._ensure()
+            contributor = self._contributors.get(str(contributor_id))
+            return set(contributor['skill_ids']) if contributor else set()
+
+    def contributors_with(self, skill_ids, match_all=True):
+        with self._lock:
+            self._ensure()
+            matches = [self._by_skill.get(str(skill_id), set()) for skill_id in skill_ids]
+            if not matches:
+                return []
+            contributor_ids = set.intersection(*matches) if match_all else set.union(*matches)
+            contributors = [self._contributors[contributor_id]['contributor'] for contributor_id in contributor_ids]
+        return sorted(contributors, key=lambda contributor: (contributor['first_name'], contributor['last_name']))
+
+    def _ensure(self):
+        with primary_reads():
+            self._refresh()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._contributors is not None and now - self._checked_at > REFRESH_INTERVAL:
+            self._checked_at = now
+            if ChangeVersion.get_versions(['contributors'])['contributors'] != self._version:
+                self._contributors = None
+
+        if self._contributors is None:
+            self._version = ChangeVersion.get_versions(['contributors'])['contributors']
+            self._checked_at = now
+            self._contributors = {}
+            self._by_skill = {}
+            self._pending = set()
+            self._add(self._load())
+        elif self._pending:
+            contributor_ids = self._pending
+            self._pending = set()
+            for contributor_id in contributor_ids:
+                self._remove(contributor_id)
+            self._add(self._load(contributor_ids))
+
+    def _load(self, contributor_ids=None):
+        query = (db.session.query(Contributor.contributor_id, Contributor.first_name, Contributor.last_name, ContributorSkill.skill_id)
+        .outerjoin(ContributorSkill, Contributor.contributor_id == ContributorSkill.contributor_id))
+        if contributor_ids is not None:
+            query = query.filter(Contributor.contributor_id.in_(contributor_ids))
+        return query.all()
+
+    def _add(self, rows):
+        for row in rows:
+            contributor_id = str(row.contributor_id)
+            contributor = self._contributors.setdefault(contributor_id, {
+                'contributor': {'contributor_id': contributor_id, 'first_name': row.first_name, 'last_name': row.last_name},
+                'skill_ids': set()
+            })
+            if row.skill_id is not None:
+                skill_id = str(row.skill_id)
+                contributor['skill_ids'].add(skill_id)
+                self._by_skill.setdefault(skill_id, set()).add(contributor_id)
+
+    def _remove(self, contributor_id):
+        contributor = self._contributors.pop(contributor_id, None)
+        if contributor is None:
+            return
+        for skill_id in contributor['skill_ids']:
+            self._by_skill.get(skill_id, set()).discard(contributor_id)
+
+skill_index = SkillIndex()
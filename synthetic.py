@@ -0,0 +1,97 @@
+"""Synthetic planning data at configurable scale.
+
+generate() builds plain row dicts for every table and load() bulk inserts them
+through the current session without committing, so callers decide whether the
+data stays. cleanup() removes committed synthetic data again.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from models import db, Period, Project, Skill, Component, Contributor, ContributorSkill, Assignment, ChangeVersion
+from utils import weeks_to_mask
+
+def generate(periods=4, projects_per_period=50, components_per_project=5, contributors=100,
+             skills=8, weeks=13, density=0.3, seed=0):
+    # The seed fixes the shape of the plan; ids and names stay unique per call
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    data = {
+        'periods': [],
+        'skills': [],
+        'contributors': [],
+        'contributor_skills': [],
+        'projects': [],
+        'components': [],
+        'assignments': []
+    }
+
+    def new_id():
+        return str(uuid.uuid4())
+
+    for index in range(skills):
+        data['skills'].append({'skill_id': new_id(), 'name': f'Skill {tag} {index}'})
+
+    contributors_by_skill = {}
+    for index in range(contributors):
+        contributor_id = new_id()
+        data['contributors'].append({'contributor_id': contributor_id, 'first_name': f'First{index}', 'last_name': f'Last{index}'})
+        for skill in rng.sample(data['skills'], min(2, skills)):
+            data['contributor_skills'].append({'contributor_id': contributor_id, 'skill_id': skill['skill_id']})
+            contributors_by_skill.setdefault(skill['skill_id'], []).append(contributor_id)
+
+    # Periods start on consecutive quarter-ish Mondays
+    start_date = datetime(2020, 1, 6)
+    for period_index in range(periods):
+        period_id = new_id()
+        period_start = start_date + timedelta(weeks=period_index * weeks)
+        data['periods'].append({
+            'period_id': period_id,
+            'name': f'Synthetic {tag} {period_index}',
+            'start_date': period_start,
+            'end_date': period_start + timedelta(weeks=weeks - 1)
+        })
+        for project_index in range(projects_per_period):
+            project_id = new_id()
+            project_name = f'Project {period_index}-{project_index}'
+            data['projects'].append({'project_id': project_id, 'name': project_name, 'description': '', 'period_id': period_id})
+            for skill in rng.sample(data['skills'], min(components_per_project, skills)):
+                component_id = new_id()
+                candidates = contributors_by_skill.get(skill['skill_id'])
+                contributor_id = rng.choice(candidates) if candidates and rng.random() < 0.8 else None
+                assigned = [week for week in range(weeks) if contributor_id and rng.random() < density]
+                data['components'].append({
+                    'component_id': component_id,
+                    'name': f"{project_name} {skill['name']}",
+                    'project_id': project_id,
+                    'skill_id': skill['skill_id'],
+                    'estimated_weeks': rng.randint(1, 6),
+                    'contributor_id': contributor_id,
+                    'week_mask': weeks_to_mask(assigned)
+                })
+                data['assignments'].extend({'component_id': component_id, 'contributor_id': contributor_id, 'week': week} for week in assigned)
+    return data
+
+def load(data):
+    for model, key in ((Skill, 'skills'), (Contributor, 'contributors'), (ContributorSkill, 'contributor_skills'),
+                       (Period, 'periods'), (Project, 'projects'), (Component, 'components'), (Assignment, 'assignments')):
+        if data[key]:
+            db.session.execute(db.insert(model), data[key])
+    db.session.flush()
+
+def cleanup(period_ids, contributor_ids=(), skill_ids=()):
+    # Deletes everything planned in the given periods plus the given
+    # contributors and skills, children first.
+    projects = db.select(Project.project_id).where(Project.period_id.in_(period_ids))
+    components = db.select(Component.component_id).where(Component.project_id.in_(projects))
+    statements = [
+        db.delete(Assignment).where(db.or_(Assignment.component_id.in_(components), Assignment.contributor_id.in_(contributor_ids))),
+        db.delete(Component).where(Component.project_id.in_(projects)),
+        db.delete(Project).where(Project.period_id.in_(period_ids)),
+        db.delete(Period).where(Period.period_id.in_(period_ids)),
+        db.delete(ContributorSkill).where(db.or_(ContributorSkill.contributor_id.in_(contributor_ids), ContributorSkill.skill_id.in_(skill_ids))),
+        db.delete(Contributor).where(Contributor.contributor_id.in_(contributor_ids)),
+        db.delete(Skill).where(Skill.skill_id.in_(skill_ids)),
+        db.delete(ChangeVersion).where(ChangeVersion.scope.in_([str(period_id) for period_id in period_ids])),
+    ]
+    for statement in statements:
+        db.session.execute(statement.execution_options(synchronize_session=False))
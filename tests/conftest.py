@@ -0,0 +1,148 @@
+"""Test harness.
+
+Runs against TEST_DATABASE_URL when that points at a Postgres database.
+Otherwise every test gets a throwaway SQLite file: the Postgres UUID column
+type is swapped for one that stores strings and the Postgres INSERT construct
+for SQLite's, which has the same on_conflict_* API. Both swaps happen before
+models is imported, so the application code runs unchanged.
+"""
+import hashlib
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event, String
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+if not TEST_DATABASE_URL:
+    import sqlalchemy.dialects.postgresql as postgresql
+    from sqlalchemy.dialects import sqlite
+
+    class StringUUID(TypeDecorator):
+        impl = String(36)
+        cache_ok = True
+
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+
+        def process_bind_param(self, value, dialect):
+            return None if value is None else str(value)
+
+    postgresql.UUID = StringUUID
+    postgresql.insert = sqlite.insert
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+    @event.listens_for(Engine, 'connect')
+    def _sqlite_connect(dbapi_connection, connection_record):
+        if type(dbapi_connection).__module__.startswith('sqlite3'):
+            # ON DELETE CASCADE needs foreign keys on; clones use md5()
+            dbapi_connection.execute('PRAGMA foreign_keys = ON')
+            dbapi_connection.create_function('md5', 1, lambda value: hashlib.md5(value.encode()).hexdigest())
+
+from app import create_app
+from models import db
+from chart_store import contributor_charts
+from skill_index import skill_index
+from scenarios import scenarios
+
+def make_app(database_url, **config):
+    app = create_app(create_tables=False, config={
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'RESPONSE_CACHE_BACKEND': 'none',
+        **config
+    })
+    with app.app_context():
+        # Only the primary: the shared db keeps a metadata per bind key any
+        # earlier app configured
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+    contributor_charts.clear()
+    skill_index.clear()
+    scenarios.clear()
+    return app
+
+@pytest.fixture
+def app_config():
+    return {}
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    app = make_app(TEST_DATABASE_URL or f'sqlite:///{tmp_path / "planner.db"}', **app_config)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@contextmanager
+def count_queries():
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+
+class Planner:
+    """Builds planning data through the API the way the frontend does."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def period(self, name='Q1', start_date='2025-02-03', end_date='2025-04-28'):
+        return self.client.post('/period', json={'name': name, 'start_date': start_date, 'end_date': end_date}).json['period_id']
+
+    def skill(self, name):
+        return self.client.post('/skill', json={'name': name}).json['skill_id']
+
+    def contributor(self, first_name, skill_ids, last_name='Tester'):
+        return self.client.post('/contributor', json={
+            'first_name': first_name, 'last_name': last_name, 'skill_ids': skill_ids
+        }).json['contributor_id']
+
+    def project(self, period_id, name, skill_ids, estimated_weeks=3):
+        project = self.client.post('/project', json={
+            'name': name, 'description': '', 'period_id': period_id,
+            'components': [{'skill_id': skill_id, 'estimated_weeks': estimated_weeks} for skill_id in skill_ids]
+        }).json
+        return project['project_id']
+
+    def components(self, period_id):
+        projects = self.client.get(f'/period/{period_id}/projects').json['projects']
+        return {component['component_name']: component for project in projects for component in project['components']}
+
+    def assign(self, component_id, contributor_id, weeks):
+        self.client.post(f'/component/{component_id}/assign_contributor', json={'contributor_id': contributor_id})
+        return self.client.post('/assignment', json={
+            'component_id': component_id, 'contributor_id': contributor_id, 'added_weeks': weeks, 'removed_weeks': []
+        })
+
+    def seed(self, num_projects=3, name='Q1'):
+        # One backend and one frontend component per project; backend work
+        # is spread over two contributors
+        period_id = self.period(name)
+        backend = self.skill('Backend')
+        frontend = self.skill('Frontend')
+        contributors = [self.contributor('Ada', [backend]), self.contributor('Ben', [backend, frontend])]
+        for index in range(num_projects):
+            self.project(period_id, f'P{index:03}', [backend, frontend])
+        components = sorted(self.components(period_id).values(), key=lambda component: component['component_name'])
+        for index, component in enumerate(component for component in components if component['skill'] == 'Backend'):
+            self.assign(component['component_id'], contributors[index % 2], [index % 5, index % 5 + 1])
+        return {'period_id': period_id, 'skills': {'Backend': backend, 'Frontend': frontend}, 'contributors': contributors}
+
+@pytest.fixture
+def planner(client):
+    return Planner(client)
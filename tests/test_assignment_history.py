@@ -0,0 +1,43 @@
+import json
+
+def history(client, contributor_id, **params):
+    response = client.get(f'/assignments/contributor/{contributor_id}', query_string=params)
+    assert response.status_code == 200
+    return response
+
+def test_full_history_is_newest_week_first(client, planner):
+    seeded = planner.seed(6)
+    rows = history(client, seeded['contributors'][0]).json
+    assert [row['week'] for row in rows] == [5, 4, 3, 2, 1, 0]
+    assert {row['contributor_id'] for row in rows} == {seeded['contributors'][0]}
+
+def test_pages_follow_the_cursor_to_the_end(client, planner):
+    seeded = planner.seed(6)
+    ada = seeded['contributors'][0]
+    pages = [history(client, ada, limit=4).json]
+    while pages[-1]['next_cursor']:
+        pages.append(history(client, ada, limit=4, cursor=pages[-1]['next_cursor']).json)
+    assert [len(page['assignments']) for page in pages] == [4, 2]
+    assert [row for page in pages for row in page['assignments']] == history(client, ada).json
+
+def test_ndjson_streams_the_same_rows(client, planner):
+    seeded = planner.seed(4)
+    ada = seeded['contributors'][0]
+    response = history(client, ada, format='ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == history(client, ada).json
+
+def test_history_can_be_limited_to_a_period(client, planner):
+    seeded = planner.seed(2)
+    ada = seeded['contributors'][0]
+    other_period_id = planner.period('Q2')
+    planner.project(other_period_id, 'Later', [seeded['skills']['Backend']])
+    later = planner.components(other_period_id)['Later Backend']
+    planner.assign(later['component_id'], ada, [9])
+    assert len(history(client, ada).json) == 3
+    assert [row['week'] for row in history(client, ada, period_id=other_period_id).json] == [9]
+
+def test_malformed_cursor_is_rejected(client, planner):
+    seeded = planner.seed(1)
+    response = client.get(f"/assignments/contributor/{seeded['contributors'][0]}?cursor=latest")
+    assert response.status_code == 400
@@ -0,0 +1,89 @@
+import pytest
+from models import Assignment
+
+@pytest.mark.parametrize('weeks', [[-1], [13], [40], ['1']])
+def test_weeks_outside_the_period_are_rejected(client, planner, weeks):
+    seeded = planner.seed(num_projects=1)
+    component = planner.components(seeded['period_id'])['P000 Backend']
+    before = Assignment.query.count()
+
+    response = client.post('/assignment', json={
+        'component_id': component['component_id'], 'contributor_id': seeded['contributors'][0],
+        'added_weeks': weeks, 'removed_weeks': []
+    })
+
+    assert response.status_code == 400
+    assert Assignment.query.count() == before
+
+def test_bulk_changes_are_rejected_as_a_whole(client, planner):
+    seeded = planner.seed(num_projects=2)
+    components = planner.components(seeded['period_id'])
+    contributor_id = seeded['contributors'][0]
+    response = client.post('/assignments/bulk', json={'changes': [
+        {'component_id': components['P000 Backend']['component_id'], 'contributor_id': contributor_id, 'added_weeks': [7], 'removed_weeks': []},
+        {'component_id': components['P001 Backend']['component_id'], 'contributor_id': contributor_id, 'added_weeks': [12, 13], 'removed_weeks': []},
+    ]})
+
+    assert response.status_code == 400
+    assert client.get(f"/period/{seeded['period_id']}/projects").json['projects'][0]['components'][0]['assignments'][7] is False
+
+def test_bulk_changes_apply_in_one_request(client, planner):
+    seeded = planner.seed(num_projects=2)
+    components = planner.components(seeded['period_id'])
+    response = client.post('/assignments/bulk', json={'changes': [
+        {'component_id': components['P000 Backend']['component_id'], 'contributor_id': seeded['contributors'][0],
+         'added_weeks': [7, 8], 'removed_weeks': [0]},
+        {'component_id': components['P001 Backend']['component_id'], 'contributor_id': seeded['contributors'][1],
+         'added_weeks': [12], 'removed_weeks': []},
+    ]})
+
+    assert response.status_code == 200
+    charts = {chart['component_id']: chart for chart in response.json['components']}
+    first = charts[components['P000 Backend']['component_id']]
+    assert [week for week, assigned in enumerate(first['assignments']) if assigned] == [1, 7, 8]
+    assert charts[components['P001 Backend']['component_id']]['assignments'][12] is True
+
+@pytest.mark.parametrize('app_config', [{'USE_WEEK_BITMAP': True}])
+def test_rejected_weeks_leave_bitmap_reads_working(client, planner):
+    seeded = planner.seed(num_projects=1)
+    component = planner.components(seeded['period_id'])['P000 Backend']
+    response = client.post('/assignment', json={
+        'component_id': component['component_id'], 'contributor_id': seeded['contributors'][0],
+        'added_weeks': [40], 'removed_weeks': []
+    })
+
+    assert response.status_code == 400
+    assert client.get(f"/period/{seeded['period_id']}/contributor_chart").status_code == 200
+
+def bulk_weeks(client, changes):
+    response = client.post('/assignments/bulk', json={'changes': changes})
+    assert response.status_code == 200
+    [chart] = response.json['components']
+    return [week for week, assigned in enumerate(chart['assignments']) if assigned]
+
+def test_later_bulk_changes_win(client, planner):
+    seeded = planner.seed(num_projects=1)
+    component_id = planner.components(seeded['period_id'])['P000 Backend']['component_id']
+    ada = seeded['contributors'][0]
+    assert bulk_weeks(client, [
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [6], 'removed_weeks': []},
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [], 'removed_weeks': [6]},
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [6], 'removed_weeks': []},
+    ]) == [0, 1, 6]
+    assert bulk_weeks(client, [
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [], 'removed_weeks': [1]},
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [1], 'removed_weeks': []},
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [8], 'removed_weeks': []},
+        {'component_id': component_id, 'contributor_id': ada, 'added_weeks': [], 'removed_weeks': [8, 6]},
+    ]) == [0, 1]
+
+def test_removal_after_a_reassigning_add_clears_the_week(client, planner):
+    seeded = planner.seed(num_projects=1)
+    component_id = planner.components(seeded['period_id'])['P000 Backend']['component_id']
+    ada, ben = seeded['contributors']
+    # Week 0 is Ada's; Ben takes it over and then gives it up
+    assert bulk_weeks(client, [
+        {'component_id': component_id, 'contributor_id': ben, 'added_weeks': [0], 'removed_weeks': []},
+        {'component_id': component_id, 'contributor_id': ben, 'added_weeks': [], 'removed_weeks': [0]},
+        {'component_id': component_id, 'contributor_id': ben, 'added_weeks': [], 'removed_weeks': [1]},
+    ]) == [1]
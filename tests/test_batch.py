@@ -0,0 +1,67 @@
+from sqlalchemy import event
+from models import db, Assignment
+
+def snapshot(planner, period_id):
+    return {name: (component['contributor_id'], component['estimated_weeks'], component['assignments'])
+            for name, component in planner.components(period_id).items()}
+
+def test_batch_applies_every_action_in_one_commit(client, planner):
+    seeded = planner.seed(1)
+    frontend = planner.components(seeded['period_id'])['P000 Frontend']
+    ben = seeded['contributors'][1]
+    commits = []
+    def record(connection):
+        commits.append(connection)
+    event.listen(db.engine, 'commit', record)
+    response = client.post('/components/batch', json={'actions': [
+        {'type': 'assign_contributor', 'component_id': frontend['component_id'], 'contributor_id': ben, 'version': frontend['version']},
+        {'type': 'weeks', 'component_id': frontend['component_id'], 'contributor_id': ben, 'added_weeks': [4, 5], 'version': frontend['version']},
+        {'type': 'estimated_weeks', 'component_id': frontend['component_id'], 'estimated_weeks': 2},
+    ]})
+    event.remove(db.engine, 'commit', record)
+    assert response.status_code == 200
+    assert len(commits) == 1
+    [component] = response.json['components']
+    assert component['contributor_id'] == ben
+    assert component['estimated_weeks'] == 2
+    assert [week for week, assigned in enumerate(component['assignments']) if assigned] == [4, 5]
+
+def test_failing_action_rolls_back_the_whole_batch(client, planner):
+    seeded = planner.seed(1)
+    components = planner.components(seeded['period_id'])
+    before = snapshot(planner, seeded['period_id'])
+    chart = client.get(f"/period/{seeded['period_id']}/contributor_chart").json
+    ada, ben = seeded['contributors']
+    response = client.post('/components/batch', json={'actions': [
+        {'type': 'clear_assignments', 'component_id': components['P000 Backend']['component_id']},
+        {'type': 'estimated_weeks', 'component_id': components['P000 Frontend']['component_id'], 'estimated_weeks': 9},
+        # Ada has no frontend skill
+        {'type': 'assign_contributor', 'component_id': components['P000 Frontend']['component_id'], 'contributor_id': ada},
+    ]})
+    assert response.status_code == 400
+    assert response.json['index'] == 2
+    assert snapshot(planner, seeded['period_id']) == before
+    assert Assignment.query.count() == 2
+    assert client.get(f"/period/{seeded['period_id']}/contributor_chart").json == chart
+
+def test_stale_version_rejects_the_batch(client, planner):
+    seeded = planner.seed(1)
+    components = planner.components(seeded['period_id'])
+    before = snapshot(planner, seeded['period_id'])
+    response = client.post('/components/batch', json={'actions': [
+        {'type': 'estimated_weeks', 'component_id': components['P000 Frontend']['component_id'], 'estimated_weeks': 9},
+        {'type': 'clear_assignments', 'component_id': components['P000 Backend']['component_id'], 'version': components['P000 Backend']['version'] - 1},
+    ]})
+    assert response.status_code == 409
+    assert snapshot(planner, seeded['period_id']) == before
+
+def test_malformed_actions_name_their_index(client, planner):
+    seeded = planner.seed(1)
+    component_id = planner.components(seeded['period_id'])['P000 Frontend']['component_id']
+    response = client.post('/components/batch', json={'actions': [
+        {'type': 'estimated_weeks', 'component_id': component_id, 'estimated_weeks': 3},
+        {'type': 'rename', 'component_id': component_id},
+    ]})
+    assert (response.status_code, response.json['index']) == (400, 1)
+    response = client.post('/components/batch', json={'actions': [{'type': 'estimated_weeks', 'component_id': component_id}]})
+    assert (response.status_code, response.json['message']) == (400, 'estimated_weeks is required')
@@ -0,0 +1,41 @@
+import argparse
+import pytest
+from sqlalchemy import event
+import benchmark
+import synthetic
+from models import db, Period, Component
+
+@pytest.fixture
+def fixture(app):
+    data = synthetic.generate(periods=2, projects_per_period=3, components_per_project=2, contributors=6, skills=3)
+    synthetic.load(data)
+    fixture = benchmark.Fixture(data)
+    benchmark.prepare_delete_targets(fixture, 4)
+    db.session.commit()
+    event.listen(db.engine, 'before_cursor_execute', benchmark._count_query)
+    yield fixture
+    event.remove(db.engine, 'before_cursor_execute', benchmark._count_query)
+
+@pytest.mark.parametrize('name', ['get_projects', 'get_capacity', 'create_assignments_bulk', 'delete_project'])
+def test_endpoint_runs_are_measured(app, fixture, name):
+    args = argparse.Namespace(warmup=1, requests=3, concurrency=2)
+    result = benchmark.run_endpoint(benchmark.LocalTransport(app), fixture, name, args)
+    assert result['requests'] == 3
+    assert all(status.startswith('2') for status in result['statuses'])
+    assert result['p50_ms'] <= result['p99_ms']
+    assert result['queries_per_request'] > 0
+
+def test_cleanup_removes_the_synthetic_data(app, fixture):
+    synthetic.cleanup(fixture.period_ids, fixture.contributor_ids, fixture.skill_ids)
+    db.session.commit()
+    assert db.session.query(Period).count() == 0
+    assert db.session.query(Component).count() == 0
+
+@pytest.mark.parametrize('name', ['get_roadmap', 'export_period_csv', 'apply_component_batch', 'import_period', 'clone_period',
+                                  'create_scenario', 'get_scenario', 'edit_scenario', 'fork_scenario', 'commit_scenario',
+                                  'discard_scenario', 'auto_plan_apply', 'delete_projects_bulk'])
+def test_every_route_can_be_driven(app, fixture, name):
+    args = argparse.Namespace(warmup=1, requests=3, concurrency=1)
+    result = benchmark.run_endpoint(benchmark.LocalTransport(app), fixture, name, args)
+    assert result['requests'] == 3
+    assert all(status.startswith('2') for status in result['statuses'])
@@ -0,0 +1,34 @@
+from conftest import count_queries
+
+def test_capacity_reports_load_conflicts_and_skill_demand(client, planner):
+    seeded = planner.seed(4)
+    ada, ben = seeded['contributors']
+    frontend = planner.components(seeded['period_id'])['P000 Frontend']
+    # Ben already works on P001 Backend in week 1
+    assert planner.assign(frontend['component_id'], ben, [1]).status_code == 201
+
+    capacity = client.get(f"/period/{seeded['period_id']}/capacity").json
+    assert capacity['num_weeks'] == 13
+    loads = {contributor['name']: contributor for contributor in capacity['contributors']}
+    assert loads['Ada Tester']['weekly_load'][:5] == [1, 1, 1, 1, 0]
+    assert loads['Ben Tester']['weekly_load'][:5] == [0, 2, 1, 1, 1]
+    assert loads['Ben Tester']['assigned_weeks'] == 5
+
+    [conflict] = capacity['conflicts']
+    assert (conflict['contributor_id'], conflict['week']) == (ben, 1)
+    assert sorted(component['component_name'] for component in conflict['components']) == ['P000 Frontend', 'P001 Backend']
+
+    skills = {skill['skill']: skill for skill in capacity['skills']}
+    assert skills['Backend'] == {**skills['Backend'], 'components': 4, 'estimated_weeks': 12, 'assigned_weeks': 8,
+                                 'contributors': 2, 'available_weeks': 26, 'shortfall': 0}
+    assert skills['Frontend'] == {**skills['Frontend'], 'components': 4, 'estimated_weeks': 12, 'assigned_weeks': 1,
+                                  'contributors': 1, 'available_weeks': 13, 'shortfall': 0}
+
+def test_capacity_query_count_does_not_grow_with_data(client, planner):
+    counts = []
+    for name, num_projects in (('Small', 2), ('Large', 20)):
+        seeded = planner.seed(num_projects, name=name)
+        with count_queries() as statements:
+            assert client.get(f"/period/{seeded['period_id']}/capacity").status_code == 200
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
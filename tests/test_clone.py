@@ -0,0 +1,36 @@
+import pytest
+
+def test_clone_copies_assignments_shifted(client, planner):
+    seeded = planner.seed(2)
+    response = client.post(f"/period/{seeded['period_id']}/clone", json={
+        'name': 'Q2', 'include_assignments': True, 'week_offset': -1
+    })
+    assert response.status_code == 201
+    assert response.json['start_date'].startswith('Mon, 05 May 2025')
+    original = planner.components(seeded['period_id'])
+    clone = planner.components(response.json['period_id'])
+    assert clone.keys() == original.keys()
+    for name, component in original.items():
+        # Week 0 falls off the start of the clone
+        assert clone[name]['assignments'] == component['assignments'][1:] + [False]
+        assert clone[name]['contributor_id'] == component['contributor_id']
+
+def test_clone_without_contributors(client, planner):
+    seeded = planner.seed(1)
+    response = client.post(f"/period/{seeded['period_id']}/clone", json={'name': 'Q2', 'include_contributors': False})
+    assert response.status_code == 201
+    assert all(component['contributor_id'] is None for component in planner.components(response.json['period_id']).values())
+
+@pytest.mark.parametrize('data', [
+    {'week_offset': 'two'},
+    {'week_offset': '2'},
+    {'week_offset': 1.5},
+    {'week_offset': None},
+    {'start_date': '05/05/2025'},
+    {'end_date': 20250505},
+])
+def test_clone_rejects_malformed_input(client, planner, data):
+    seeded = planner.seed(1)
+    response = client.post(f"/period/{seeded['period_id']}/clone", json={'name': 'Q2', 'include_assignments': True, **data})
+    assert response.status_code == 400
+    assert [period['name'] for period in client.get('/periods').json] == ['Q1']
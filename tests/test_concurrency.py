@@ -0,0 +1,45 @@
+def frontend(planner, period_id):
+    return planner.components(period_id)['P000 Frontend']
+
+def test_stale_estimate_edit_is_a_conflict(client, planner):
+    seeded = planner.seed(1)
+    component = frontend(planner, seeded['period_id'])
+    url = f"/component/{component['component_id']}/estimated_weeks"
+    first = client.put(url, json={'estimated_weeks': 4, 'version': component['version']})
+    assert first.status_code == 200
+    assert first.json['version'] == component['version'] + 1
+
+    response = client.put(url, json={'estimated_weeks': 8, 'version': component['version']})
+    assert response.status_code == 409
+    assert response.json['component']['estimated_weeks'] == 4
+    assert response.json['component']['version'] == first.json['version']
+
+def test_stale_contributor_assignment_is_a_conflict(client, planner):
+    seeded = planner.seed(1)
+    component = frontend(planner, seeded['period_id'])
+    ben = seeded['contributors'][1]
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 4})
+    response = client.post(f"/component/{component['component_id']}/assign_contributor",
+                           json={'contributor_id': ben, 'version': component['version']})
+    assert response.status_code == 409
+    assert frontend(planner, seeded['period_id'])['contributor_id'] is None
+
+def test_stale_week_edit_returns_the_current_chart(client, planner):
+    seeded = planner.seed(1)
+    component = planner.components(seeded['period_id'])['P000 Backend']
+    ada = seeded['contributors'][0]
+    change = {'component_id': component['component_id'], 'contributor_id': ada, 'removed_weeks': [], 'version': component['version']}
+    assert client.post('/assignment', json={**change, 'added_weeks': [5]}).status_code == 201
+
+    response = client.post('/assignment', json={**change, 'added_weeks': [6]})
+    assert response.status_code == 409
+    [chart] = response.json['components']
+    assert [week for week, assigned in enumerate(chart['assignments']) if assigned] == [0, 1, 5]
+    assert chart['version'] == component['version'] + 1
+
+def test_edits_without_a_version_always_apply(client, planner):
+    seeded = planner.seed(1)
+    component = frontend(planner, seeded['period_id'])
+    url = f"/component/{component['component_id']}/estimated_weeks"
+    assert client.put(url, json={'estimated_weeks': 4}).status_code == 200
+    assert client.put(url, json={'estimated_weeks': 5}).status_code == 200
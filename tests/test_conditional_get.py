@@ -0,0 +1,42 @@
+from conftest import count_queries
+
+def test_unchanged_period_answers_304_without_building(client, planner):
+    seeded = planner.seed(2)
+    url = f"/period/{seeded['period_id']}/projects"
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    with count_queries() as statements:
+        again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    # Only the version lookup runs
+    assert len(statements) == 1
+
+def test_writes_to_the_period_change_its_etag(client, planner):
+    seeded = planner.seed(2)
+    url = f"/period/{seeded['period_id']}/projects"
+    etag = client.get(url).headers['ETag']
+    component = planner.components(seeded['period_id'])['P000 Frontend']
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 6})
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_writes_to_another_period_keep_the_etag(client, planner):
+    seeded = planner.seed(1)
+    other = planner.seed(1, name='Q2')
+    url = f"/period/{seeded['period_id']}/projects"
+    etag = client.get(url).headers['ETag']
+    component = planner.components(other['period_id'])['P000 Frontend']
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 6})
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+def test_new_contributor_changes_every_period_view(client, planner):
+    seeded = planner.seed(1)
+    url = f"/period/{seeded['period_id']}/contributor_chart"
+    etag = client.get(url).headers['ETag']
+    planner.contributor('Cy', [seeded['skills']['Frontend']])
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Cy Tester' in [contributor['name'] for contributor in response.json.values()]
@@ -0,0 +1,19 @@
+from config import _engine_options
+
+def test_postgres_pools_are_sized_from_the_environment(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '8')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '2')
+    monkeypatch.delenv('DB_POOL_TIMEOUT', raising=False)
+    monkeypatch.delenv('DB_POOL_PRE_PING', raising=False)
+    options = _engine_options('postgresql://planner@db/planner')
+    assert options['pool_size'] == 8
+    assert options['max_overflow'] == 2
+    assert options['pool_timeout'] == 30
+    assert options['pool_pre_ping'] is True
+
+def test_sqlite_gets_no_pool_sizing(monkeypatch):
+    monkeypatch.delenv('DB_POOL_RECYCLE', raising=False)
+    options = _engine_options('sqlite:///planner.db')
+    assert 'pool_size' not in options
+    assert 'max_overflow' not in options
+    assert options['pool_recycle'] == 1800
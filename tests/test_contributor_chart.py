@@ -0,0 +1,33 @@
+from conftest import count_queries
+
+def test_chart_follows_writes_without_a_rebuild(client, planner):
+    seeded = planner.seed(num_projects=2)
+    period_id = seeded['period_id']
+    ada, ben = seeded['contributors']
+
+    chart = client.get(f'/period/{period_id}/contributor_chart').json
+    assert chart[ada]['name'] == 'Ada Tester'
+    assert chart[ada]['assignments'][0] == ['P000 Backend']
+    assert chart[ben]['assignments'][1] == ['P001 Backend']
+
+    component = planner.components(period_id)['P000 Frontend']
+    planner.assign(component['component_id'], ben, [1])
+    with count_queries() as statements:
+        chart = client.get(f'/period/{period_id}/contributor_chart').json
+    assert sorted(chart[ben]['assignments'][1]) == ['P000 Frontend', 'P001 Backend']
+    # Only the touched component is re-read, never the whole period
+    assert not any('FROM periods' in statement for statement in statements)
+
+    newcomer = planner.contributor('Cy', [seeded['skills']['Frontend']])
+    chart = client.get(f'/period/{period_id}/contributor_chart?relevant_skills=true').json
+    assert chart[newcomer]['assignments'] == [[] for _ in range(13)]
+
+def test_deleted_component_leaves_the_chart(client, planner):
+    seeded = planner.seed(num_projects=1)
+    period_id = seeded['period_id']
+    client.get(f'/period/{period_id}/contributor_chart')
+    component = planner.components(period_id)['P000 Backend']
+
+    assert client.delete(f"/component/{component['component_id']}").status_code == 200
+    chart = client.get(f'/period/{period_id}/contributor_chart').json
+    assert chart[seeded['contributors'][0]]['assignments'][0] == []
@@ -0,0 +1,32 @@
+import pytest
+
+def names(response):
+    return sorted(contributor['first_name'] for contributor in response.json['contributors'])
+
+@pytest.fixture
+def seeded(planner):
+    return planner.seed(4)
+
+def test_matches_all_or_any_skill(client, seeded):
+    skills = seeded['skills']
+    both = f"{skills['Backend']},{skills['Frontend']}"
+    assert names(client.get(f"/contributors/get_contributors_by_skill/{skills['Backend']}")) == ['Ada', 'Ben']
+    assert names(client.get(f"/contributors/get_contributors_by_skill/{both}")) == ['Ben']
+    assert names(client.get(f"/contributors/get_contributors_by_skill/{both}?match=any")) == ['Ada', 'Ben']
+
+def test_keeps_contributors_free_for_the_weeks(client, seeded):
+    # Ada has weeks 0-1 and 2-3, Ben weeks 1-2 and 3-4
+    url = f"/contributors/get_contributors_by_skill/{seeded['skills']['Backend']}?period_id={seeded['period_id']}"
+    assert names(client.get(url + '&from_week=0')) == ['Ben']
+    assert names(client.get(url + '&from_week=4&to_week=4')) == ['Ada']
+    assert names(client.get(url + '&from_week=1&to_week=3')) == []
+    assert names(client.get(url + '&from_week=12')) == ['Ada', 'Ben']
+
+@pytest.mark.parametrize('weeks', ['from_week=-1', 'from_week=-3&to_week=-1', 'from_week=13', 'from_week=5&to_week=13', 'from_week=4&to_week=2', 'from_week=x'])
+def test_rejects_weeks_outside_the_period(client, seeded, weeks):
+    url = f"/contributors/get_contributors_by_skill/{seeded['skills']['Backend']}?period_id={seeded['period_id']}&{weeks}"
+    assert client.get(url).status_code == 400
+
+def test_unknown_period(client, seeded):
+    url = f"/contributors/get_contributors_by_skill/{seeded['skills']['Backend']}?period_id=00000000-0000-0000-0000-000000000000&from_week=0"
+    assert client.get(url).status_code == 404
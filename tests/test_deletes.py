@@ -0,0 +1,49 @@
+from conftest import count_queries
+from models import db, Project, Component, Assignment
+
+def rows(model, **filters):
+    return db.session.query(model).filter_by(**filters).count()
+
+def test_project_delete_cascades_to_components_and_assignments(client, planner):
+    seeded = planner.seed(2)
+    components = planner.components(seeded['period_id'])
+    project_id = db.session.get(Component, components['P000 Backend']['component_id']).project_id
+    assert client.delete(f'/project/{project_id}').status_code == 200
+    assert rows(Component, project_id=project_id) == 0
+    assert rows(Assignment, component_id=components['P000 Backend']['component_id']) == 0
+    assert rows(Assignment) == 2
+    assert list(planner.components(seeded['period_id'])) == ['P001 Backend', 'P001 Frontend']
+
+def test_component_delete_cascades_to_assignments(client, planner):
+    seeded = planner.seed(1)
+    component_id = planner.components(seeded['period_id'])['P000 Backend']['component_id']
+    assert client.delete(f'/component/{component_id}').status_code == 200
+    assert rows(Assignment) == 0
+    chart = client.get(f"/period/{seeded['period_id']}/contributor_chart").json
+    assert not any(week for contributor in chart.values() for week in contributor['assignments'])
+
+def test_unknown_ids_are_not_found(client):
+    missing = '00000000-0000-0000-0000-000000000000'
+    assert client.delete(f'/project/{missing}').status_code == 404
+    assert client.delete(f'/component/{missing}').status_code == 404
+
+def test_bulk_delete_statements_do_not_grow_with_the_projects(client, planner):
+    counts = []
+    for name, num_projects in (('Small', 2), ('Large', 12)):
+        seeded = planner.seed(num_projects, name=name)
+        project_ids = [project.project_id for project in db.session.query(Project).filter_by(period_id=seeded['period_id'])]
+        with count_queries() as statements:
+            response = client.post('/projects/bulk_delete', json={'project_ids': project_ids + ['00000000-0000-0000-0000-000000000000']})
+        assert sorted(response.json['deleted']) == sorted(project_ids)
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+    assert rows(Component) == rows(Assignment) == 0
+
+def test_bulk_component_delete_and_clear(client, planner):
+    seeded = planner.seed(2)
+    components = planner.components(seeded['period_id'])
+    response = client.post('/components/bulk_delete', json={'component_ids': [components['P000 Backend']['component_id'], components['P000 Frontend']['component_id']]})
+    assert len(response.json['deleted']) == 2
+    assert client.delete(f"/component/{components['P001 Backend']['component_id']}/assignments").status_code == 200
+    assert rows(Assignment) == 0
+    assert rows(Component) == 2
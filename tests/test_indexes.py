@@ -0,0 +1,22 @@
+import re
+from sqlalchemy import inspect
+from migrations import MIGRATIONS
+from models import db
+
+def migrated_indexes():
+    # Index names the migrations leave behind on an existing database
+    indexes = set()
+    for _, statements in MIGRATIONS:
+        for statement in statements:
+            indexes |= set(re.findall(r'CREATE INDEX IF NOT EXISTS (\w+)', statement))
+            indexes -= set(re.findall(r'DROP INDEX IF EXISTS (\w+)', statement))
+    return indexes
+
+def test_models_declare_the_migrated_indexes(app):
+    inspector = inspect(db.engine)
+    created = {index['name'] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+    assert migrated_indexes() <= created
+
+def test_history_index_leads_with_contributor_and_week(app):
+    columns = {index['name']: index['column_names'] for index in inspect(db.engine).get_indexes('assignments')}
+    assert columns['ix_assignments_contributor_id_week_component_id'] == ['contributor_id', 'week', 'component_id']
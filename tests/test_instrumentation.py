@@ -0,0 +1,27 @@
+import re
+import pytest
+from conftest import count_queries
+
+pytestmark = pytest.mark.parametrize('app_config', [{'INSTRUMENTATION_ENABLED': True, 'INSTRUMENTATION_SAMPLE_RATE': 1.0}])
+
+def reported_statements(response):
+    return int(re.search(r'desc="(\d+) statements"', response.headers['Server-Timing']).group(1))
+
+def test_server_timing_counts_the_request_statements(client, planner):
+    seeded = planner.seed(2)
+    with count_queries() as statements:
+        response = client.get(f"/period/{seeded['period_id']}/projects")
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('app;dur=')
+    assert reported_statements(response) == len(statements)
+
+def test_failed_statement_does_not_skew_later_requests(client, planner):
+    seeded = planner.seed(1)
+    # The unknown period breaks the foreign key, so the INSERT raises
+    response = client.post('/project', json={'name': 'Orphan', 'description': '', 'period_id': '00000000-0000-0000-0000-000000000000'})
+    assert response.status_code == 500
+    with count_queries() as statements:
+        response = client.get(f"/period/{seeded['period_id']}/projects")
+    assert reported_statements(response) == len(statements)
+    metrics = client.get('/metrics').text
+    assert 'planner_db_statements_total{endpoint="/period/<period_id>/projects"}' in metrics
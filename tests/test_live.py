@@ -0,0 +1,83 @@
+import json
+import pytest
+from sqlalchemy import text
+from config import _live_updates_backend
+from live import live_updates
+
+def frames(stream, count):
+    return [next(stream) for _ in range(count)]
+
+def parse(frame):
+    fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    return fields['event'], json.loads(fields['data']), fields.get('id')
+
+def test_events_route_streams_server_sent_events(client, planner):
+    period_id = planner.period()
+    response = client.get(f'/period/{period_id}/events')
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert next(iter(response.response)) == b': connected\n\n'
+    response.close()
+
+def test_stream_receives_a_diff_for_each_commit(client, planner):
+    seeded = planner.seed(1)
+    component = planner.components(seeded['period_id'])['P000 Frontend']
+    stream = live_updates.stream(seeded['period_id'])
+    assert frames(stream, 1) == [': connected\n\n']
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 5})
+    event, data, version = parse(next(stream))
+    assert event == 'diff'
+    assert data['changes'] == [{'type': 'estimated_weeks', 'component_id': component['component_id'], 'estimated_weeks': 5}]
+    assert version == str(data['version'])
+    stream.close()
+
+def test_stream_only_hears_its_own_period_and_broadcasts(client, planner):
+    seeded = planner.seed(1)
+    other = planner.seed(1, name='Q2')
+    stream = live_updates.stream(seeded['period_id'])
+    next(stream)
+    component = planner.components(other['period_id'])['P000 Frontend']
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 5})
+    planner.skill('Design')
+    event, data, _ = parse(next(stream))
+    assert (event, data['scope']) == ('changed', 'skills')
+    stream.close()
+
+@pytest.mark.parametrize('database_url, backend', [
+    ('postgresql://planner@db/planner', 'postgres'),
+    ('postgres://planner@db/planner', 'postgres'),
+    ('sqlite:///planner.db', 'local'),
+    (None, 'local'),
+])
+def test_default_backend_follows_the_database(database_url, backend):
+    assert _live_updates_backend(database_url) == backend
+
+class RecordingBroker:
+    transactional = True
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message, session):
+        session.execute(text('SELECT 1'))
+        self.published.append((channel, message, session.in_transaction()))
+
+def test_transactional_broker_publishes_inside_the_commit(client, planner, monkeypatch):
+    seeded = planner.seed(1)
+    component = planner.components(seeded['period_id'])['P000 Frontend']
+    broker = RecordingBroker()
+    monkeypatch.setattr(live_updates, 'broker', broker)
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 5})
+    [(channel, message, in_transaction)] = broker.published
+    assert channel == seeded['period_id']
+    assert message['type'] == 'diff'
+    assert in_transaction
+
+def test_transactional_broker_hears_nothing_from_rolled_back_writes(client, planner, monkeypatch):
+    seeded = planner.seed(1)
+    component = planner.components(seeded['period_id'])['P000 Frontend']
+    broker = RecordingBroker()
+    monkeypatch.setattr(live_updates, 'broker', broker)
+    response = client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 5, 'version': 0})
+    assert response.status_code == 409
+    assert broker.published == []
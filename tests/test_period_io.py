@@ -0,0 +1,66 @@
+import pytest
+from conftest import count_queries
+import synthetic
+from models import db, Component
+from utils import MAX_BITMAP_WEEKS
+
+def export(client, period_id, export_format='json'):
+    response = client.get(f'/period/{period_id}/export?format={export_format}')
+    assert response.status_code == 200
+    return response
+
+def components(plan):
+    return sorted((component['name'], component['contributor'], component['weeks']) for component in plan['components'])
+
+@pytest.mark.parametrize('app_config', [{}, {'USE_WEEK_BITMAP': True}])
+def test_json_round_trip(client, planner):
+    seeded = planner.seed(3)
+    plan = export(client, seeded['period_id']).json
+    plan['period']['name'] = 'Q1 copy'
+    response = client.post('/period/import', json=plan)
+    assert response.status_code == 201
+    assert response.json['assignments'] == 6
+    copy = export(client, response.json['period_id']).json
+    assert copy['period']['name'] == 'Q1 copy'
+    assert components(copy) == components(plan)
+    assert copy['contributor_skills'] == plan['contributor_skills']
+
+def test_csv_round_trip(client, planner):
+    seeded = planner.seed(2)
+    text = export(client, seeded['period_id'], 'csv').get_data(as_text=True)
+    response = client.post('/period/import', data=text.replace('Q1', 'Q1 copy', 1), content_type='text/csv')
+    assert response.status_code == 201
+    assert components(export(client, response.json['period_id']).json) == components(export(client, seeded['period_id']).json)
+
+@pytest.mark.parametrize('app_config', [{'USE_WEEK_BITMAP': True}])
+def test_import_period_longer_than_the_bitmap(client):
+    weeks = [0, MAX_BITMAP_WEEKS - 1, MAX_BITMAP_WEEKS, 79]
+    plan = {
+        'period': {'name': 'Long', 'start_date': '2025-01-06', 'end_date': '2026-07-13'},
+        'contributor_skills': [{'contributor': 'Ada Tester', 'skill': 'Backend'}],
+        'components': [{'project': 'Platform', 'skill': 'Backend', 'estimated_weeks': 4, 'contributor': 'Ada Tester', 'weeks': weeks}]
+    }
+    response = client.post('/period/import', json=plan)
+    assert response.status_code == 201
+    assert export(client, response.json['period_id']).json['components'][0]['weeks'] == weeks
+
+def test_synthetic_period_longer_than_the_bitmap(app):
+    data = synthetic.generate(periods=1, projects_per_period=2, components_per_project=2, contributors=4, skills=2, weeks=70, density=1.0)
+    synthetic.load(data)
+    db.session.commit()
+    assert all(0 <= mask < 2 ** MAX_BITMAP_WEEKS for mask in db.session.scalars(db.select(Component.week_mask)))
+
+def test_import_looks_up_only_the_contributors_it_names(client, planner):
+    planner.seed(1)
+    planner.contributor('Ada', [], last_name='Mary Tester')
+    plan = {
+        'period': {'name': 'Q2', 'start_date': '2025-05-05', 'end_date': '2025-07-28'},
+        'components': [{'project': 'Platform', 'skill': 'Backend', 'contributor': 'Ada Tester', 'weeks': [0]},
+                       {'project': 'Platform', 'skill': 'Frontend', 'contributor': 'Ada Mary Tester', 'weeks': [1]}]
+    }
+    with count_queries() as statements:
+        response = client.post('/period/import', json=plan)
+    assert response.status_code == 201
+    assert response.json['contributors_created'] == 0
+    lookup = next(statement for statement in statements if statement.startswith('SELECT contributors.contributor_id'))
+    assert 'WHERE' in lookup
@@ -0,0 +1,40 @@
+import pytest
+from conftest import count_queries
+
+def listing(client, period_id, **params):
+    response = client.get(f'/period/{period_id}/projects', query_string=params)
+    assert response.status_code == 200
+    return response
+
+def test_sparse_fields_return_only_what_was_asked(client, planner):
+    seeded = planner.seed(2)
+    project = listing(client, seeded['period_id'], fields='project_name,components.assigned_weeks').json['projects'][0]
+    assert set(project) == {'project_id', 'project_name', 'components'}
+    assert [set(component) for component in project['components']] == [{'component_id', 'assigned_weeks'}] * 2
+    assert [component['assigned_weeks'] for component in project['components']] == [2, 0]
+
+def test_fields_without_weeks_skip_the_assignments(client, planner):
+    seeded = planner.seed(2)
+    with count_queries() as statements:
+        listing(client, seeded['period_id'], fields='components.component_name,components.skill')
+    assert not any('assignments' in statement for statement in statements)
+
+def test_summary_totals_each_project(client, planner):
+    seeded = planner.seed(2)
+    projects = listing(client, seeded['period_id'], include='summary').json['projects']
+    assert projects[0] == {'project_id': projects[0]['project_id'], 'project_name': 'P000',
+                           'summary': {'components': 2, 'estimated_weeks': 6, 'assigned_weeks': 2}}
+    with_components = listing(client, seeded['period_id'], include='summary', fields='components.skill').json['projects'][0]
+    assert with_components['summary'] == projects[0]['summary']
+    assert [component['skill'] for component in with_components['components']] == ['Backend', 'Frontend']
+
+def test_each_selection_gets_its_own_etag(client, planner):
+    seeded = planner.seed(1)
+    etags = {listing(client, seeded['period_id'], **params).headers['ETag']
+             for params in ({}, {'fields': 'project_name'}, {'fields': 'components.skill'}, {'include': 'summary'})}
+    assert len(etags) == 4
+
+@pytest.mark.parametrize('fields', ['budget', 'components.budget'])
+def test_unknown_fields_are_rejected(client, planner, fields):
+    seeded = planner.seed(1)
+    assert client.get(f"/period/{seeded['period_id']}/projects?fields={fields}").status_code == 400
@@ -0,0 +1,30 @@
+from conftest import count_queries
+
+def projects_query_count(client, period_id):
+    with count_queries() as statements:
+        response = client.get(f'/period/{period_id}/projects')
+    assert response.status_code == 200
+    return len(statements), response.json
+
+def test_projects_query_count_does_not_grow_with_data(client, planner):
+    small = planner.seed(num_projects=2, name='Small')
+    large = planner.seed(num_projects=20, name='Large')
+
+    small_count, small_body = projects_query_count(client, small['period_id'])
+    large_count, large_body = projects_query_count(client, large['period_id'])
+
+    assert len(small_body['projects']) == 2
+    assert len(large_body['projects']) == 20
+    assert small_count == large_count
+
+def test_projects_response_shape(client, planner):
+    seeded = planner.seed(num_projects=1)
+    project = client.get(f"/period/{seeded['period_id']}/projects").json['projects'][0]
+    assert project['project_name'] == 'P000'
+    backend, frontend = project['components']
+    assert backend['skill'] == 'Backend'
+    assert backend['contributor_name'] == 'Ada Tester'
+    assert backend['assignments'][:3] == [True, True, False]
+    assert backend['assigned_weeks'] == 2
+    assert frontend['contributor_id'] is None
+    assert frontend['assigned_weeks'] == 0
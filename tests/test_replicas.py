@@ -0,0 +1,80 @@
+"""Two empty SQLite files stand in for replicas that have not caught up, so a
+read that lands on one finds no periods."""
+import pytest
+from sqlalchemy import event
+from conftest import TEST_DATABASE_URL, make_app
+from models import db
+from replicas import READ_PRIMARY_HEADER, READ_PRIMARY_COOKIE
+
+pytestmark = pytest.mark.skipif(bool(TEST_DATABASE_URL), reason='replicas are SQLite stand-ins')
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(f'sqlite:///{tmp_path / "primary.db"}', SQLALCHEMY_BINDS={
+        f'replica_{index}': f'sqlite:///{tmp_path / f"replica_{index}.db"}' for index in range(2)
+    }, READ_YOUR_WRITES_SECONDS=60)
+    with app.app_context():
+        for key in ('replica_0', 'replica_1'):
+            db.metadata.create_all(db.engines[key])
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def used_engines(app):
+    used = []
+    for key, engine in db.engines.items():
+        event.listen(engine, 'before_cursor_execute', lambda *args, key=key: used.append(key))
+    return used
+
+def period_names(client, **kwargs):
+    return [period['name'] for period in client.get('/periods', **kwargs).json]
+
+def test_reads_rotate_over_the_replicas(app, used_engines):
+    client = app.test_client()
+    for _ in range(4):
+        assert period_names(client) == []
+    assert set(used_engines) == {'replica_0', 'replica_1'}
+    assert used_engines.count('replica_0') == used_engines.count('replica_1')
+
+def test_writes_go_to_the_primary_and_pin_the_writer(app, used_engines):
+    writer = app.test_client()
+    response = writer.post('/period', json={'name': 'Q1', 'start_date': '2025-02-03', 'end_date': '2025-04-28'})
+    assert response.status_code == 201
+    assert set(used_engines) == {None}
+    until = response.headers[READ_PRIMARY_HEADER]
+    assert writer.get_cookie(READ_PRIMARY_COOKIE).value == until
+
+    # The cookie keeps the writer on the primary; others read the replicas
+    assert period_names(writer) == ['Q1']
+    assert period_names(app.test_client()) == []
+    # Cross-site clients get no cookie and echo the header instead
+    assert period_names(app.test_client(), headers={READ_PRIMARY_HEADER: until}) == ['Q1']
+    assert period_names(app.test_client(), headers={READ_PRIMARY_HEADER: '0'}) == []
+
+def test_cors_allows_and_exposes_the_read_primary_header(app):
+    client = app.test_client()
+    preflight = client.options('/periods', headers={
+        'Origin': 'https://planner.example', 'Access-Control-Request-Method': 'GET',
+        'Access-Control-Request-Headers': READ_PRIMARY_HEADER
+    })
+    assert READ_PRIMARY_HEADER.lower() in preflight.headers['Access-Control-Allow-Headers'].lower()
+    response = client.post('/period', headers={'Origin': 'https://planner.example'},
+                           json={'name': 'Q1', 'start_date': '2025-02-03', 'end_date': '2025-04-28'})
+    assert READ_PRIMARY_HEADER in response.headers['Access-Control-Expose-Headers']
+
+def test_shared_caches_load_from_the_primary(app):
+    writer = app.test_client()
+    reader = app.test_client()
+    skill_id = writer.post('/skill', json={'name': 'Backend'}).json['skill_id']
+    url = f'/contributors/get_contributors_by_skill/{skill_id}'
+    # Builds the index; the replicas have not seen anything yet
+    assert reader.get(url).json['contributors'] == []
+    writer.post('/contributor', json={'first_name': 'Ada', 'last_name': 'Tester', 'skill_ids': [skill_id]})
+    assert [contributor['first_name'] for contributor in reader.get(url).json['contributors']] == ['Ada']
+
+    period_id = writer.post('/period', json={'name': 'Q1', 'start_date': '2025-02-03', 'end_date': '2025-04-28'}).json['period_id']
+    chart = reader.get(f'/period/{period_id}/contributor_chart')
+    assert chart.status_code == 200
+    assert [contributor['name'] for contributor in chart.json.values()] == ['Ada Tester']
@@ -0,0 +1,48 @@
+import pytest
+from conftest import count_queries
+from models import db, ChangeVersion
+from response_cache import response_cache
+
+pytestmark = pytest.mark.parametrize('app_config', [{'RESPONSE_CACHE_BACKEND': 'local'}])
+
+def get_projects(client, period_id):
+    # Number of statements the request ran besides the version lookup
+    with count_queries() as statements:
+        response = client.get(f'/period/{period_id}/projects')
+    assert response.status_code == 200
+    return response.json, len(statements) - 1
+
+def test_repeated_reads_come_from_the_cache(client, planner):
+    seeded = planner.seed(2)
+    body, built = get_projects(client, seeded['period_id'])
+    hits = response_cache.hits
+    assert get_projects(client, seeded['period_id']) == (body, 0)
+    assert response_cache.hits == hits + 1
+
+def test_writes_evict_only_their_period(client, planner):
+    seeded = planner.seed(1)
+    other = planner.seed(1, name='Q2')
+    get_projects(client, seeded['period_id'])
+    get_projects(client, other['period_id'])
+    component = planner.components(seeded['period_id'])['P000 Frontend']
+    client.put(f"/component/{component['component_id']}/estimated_weeks", json={'estimated_weeks': 6})
+
+    body, built = get_projects(client, seeded['period_id'])
+    assert built > 0
+    assert body['projects'][0]['components'][1]['estimated_weeks'] == 6
+    assert get_projects(client, other['period_id'])[1] == 0
+
+def test_contributor_changes_clear_every_period(client, planner):
+    seeded = planner.seed(1)
+    get_projects(client, seeded['period_id'])
+    planner.contributor('Cy', [])
+    assert get_projects(client, seeded['period_id'])[1] > 0
+
+def test_versions_moved_by_another_worker_turn_entries_into_misses(client, planner):
+    seeded = planner.seed(1)
+    get_projects(client, seeded['period_id'])
+    # A commit this process never saw, as another worker's would be
+    db.session.execute(db.update(ChangeVersion).where(ChangeVersion.scope == seeded['period_id'])
+                       .values(version=ChangeVersion.version + 1))
+    db.session.commit()
+    assert get_projects(client, seeded['period_id'])[1] > 0
@@ -0,0 +1,35 @@
+import pytest
+
+def test_periods_add_up_on_one_calendar(client, planner):
+    seeded = planner.seed(1)
+    ada = seeded['contributors'][0]
+    backend = planner.components(seeded['period_id'])['P000 Backend']
+    planner.assign(backend['component_id'], ada, [2])
+    # Starts two weeks into Q1, so its week 0 is Q1's week 2
+    overlap_id = planner.period('Overlap', '2025-02-17', '2025-03-31')
+    planner.project(overlap_id, 'Side', [seeded['skills']['Backend']])
+    planner.assign(planner.components(overlap_id)['Side Backend']['component_id'], ada, [0, 3])
+    planner.period('Later', '2025-06-02', '2025-06-30')
+
+    roadmap = client.get('/roadmap?from=2025-02-05&to=2025-03-03').json
+    assert roadmap['from'] == '2025-02-03'
+    assert roadmap['weeks'] == ['2025-02-03', '2025-02-10', '2025-02-17', '2025-02-24', '2025-03-03']
+    assert [(period['name'], period['start_week']) for period in roadmap['periods']] == [('Q1', 0), ('Overlap', 2)]
+    [contributor] = roadmap['contributors']
+    assert contributor['name'] == 'Ada Tester'
+    assert contributor['weekly_load'] == [1, 1, 2, 0, 0]
+    assert contributor['overbooked_weeks'] == 1
+    [skill] = roadmap['skills']
+    assert (skill['skill'], skill['assigned_weeks']) == ('Backend', 4)
+
+def test_roadmap_etag_follows_the_periods_in_range(client, planner):
+    seeded = planner.seed(1)
+    url = '/roadmap?from=2025-02-03&to=2025-04-28'
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    planner.assign(planner.components(seeded['period_id'])['P000 Backend']['component_id'], seeded['contributors'][0], [6])
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+
+@pytest.mark.parametrize('query', ['', '?from=2025-02-03', '?from=2025-03-03&to=2025-02-03', '?from=2025-02-03&to=2040-01-01', '?from=03/02/2025&to=2025-04-28'])
+def test_bad_ranges_are_rejected(client, query):
+    assert client.get('/roadmap' + query).status_code == 400
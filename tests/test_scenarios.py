@@ -0,0 +1,112 @@
+import pytest
+
+def weeks(chart):
+    return [week for week, assigned in enumerate(chart['assignments']) if assigned]
+
+def live_weeks(planner, period_id, name):
+    return weeks(planner.components(period_id)[name])
+
+def start(client, period_id):
+    response = client.post(f'/period/{period_id}/scenarios')
+    assert response.status_code == 201
+    return response.json['scenario_id']
+
+def test_edits_stay_in_the_scenario(client, planner):
+    seeded = planner.seed(2)
+    backend = planner.components(seeded['period_id'])['P000 Backend']
+    scenario_id = start(client, seeded['period_id'])
+    response = client.post(f'/scenarios/{scenario_id}/edits', json={'edits': [
+        {'type': 'weeks', 'component_id': backend['component_id'], 'added_weeks': [1, 2], 'removed_weeks': [0]},
+        {'type': 'estimated_weeks', 'component_id': backend['component_id'], 'estimated_weeks': 5},
+    ]})
+    assert response.status_code == 200
+    assert weeks(response.json['components'][0]) == [1, 2]
+    # Ada's load follows the edit; the live plan is untouched
+    assert response.json['capacity']['contributors'][0]['weekly_load'][:3] == [0, 1, 1]
+    assert live_weeks(planner, seeded['period_id'], 'P000 Backend') == [0, 1]
+
+    scenario = client.get(f'/scenarios/{scenario_id}').json
+    assert scenario['stale'] is False
+    assert scenario['changes'] == [{
+        'component_id': backend['component_id'], 'component_name': 'P000 Backend', 'version': backend['version'],
+        'added_weeks': [2], 'removed_weeks': [0], 'estimated_weeks': {'from': 3, 'to': 5}
+    }]
+
+def test_forks_do_not_share_later_edits(client, planner):
+    seeded = planner.seed(1)
+    backend = planner.components(seeded['period_id'])['P000 Backend']
+    parent_id = start(client, seeded['period_id'])
+    fork = client.post(f'/scenarios/{parent_id}/fork').json
+    assert fork['parent_id'] == parent_id
+    client.post(f"/scenarios/{fork['scenario_id']}/edits", json={'edits': [
+        {'type': 'shift_weeks', 'component_id': backend['component_id'], 'offset': 3}]})
+    charts = {scenario_id: client.get(f'/scenarios/{scenario_id}/components').json['components']
+              for scenario_id in (parent_id, fork['scenario_id'])}
+    by_name = {scenario_id: {chart['component_name']: weeks(chart) for chart in scenario_charts} for scenario_id, scenario_charts in charts.items()}
+    assert by_name[parent_id]['P000 Backend'] == [0, 1]
+    assert by_name[fork['scenario_id']]['P000 Backend'] == [3, 4]
+
+def test_failing_edit_undoes_the_whole_request(client, planner):
+    seeded = planner.seed(1)
+    components = planner.components(seeded['period_id'])
+    scenario_id = start(client, seeded['period_id'])
+    response = client.post(f'/scenarios/{scenario_id}/edits', json={'edits': [
+        {'type': 'estimated_weeks', 'component_id': components['P000 Backend']['component_id'], 'estimated_weeks': 5},
+        {'type': 'assign_contributor', 'component_id': components['P000 Frontend']['component_id'], 'contributor_id': seeded['contributors'][0]},
+    ]})
+    assert (response.status_code, response.json['index']) == (400, 1)
+    assert client.get(f'/scenarios/{scenario_id}').json['changes'] == []
+
+def test_commit_writes_the_diff(client, planner):
+    seeded = planner.seed(1)
+    components = planner.components(seeded['period_id'])
+    ben = seeded['contributors'][1]
+    scenario_id = start(client, seeded['period_id'])
+    client.post(f'/scenarios/{scenario_id}/edits', json={'edits': [
+        {'type': 'assign_contributor', 'component_id': components['P000 Frontend']['component_id'], 'contributor_id': ben},
+        {'type': 'weeks', 'component_id': components['P000 Frontend']['component_id'], 'added_weeks': [7, 8]},
+        {'type': 'weeks', 'component_id': components['P000 Backend']['component_id'], 'removed_weeks': [1]},
+    ]})
+    assert client.post(f'/scenarios/{scenario_id}/commit').status_code == 200
+    live = planner.components(seeded['period_id'])
+    assert (live['P000 Frontend']['contributor_id'], weeks(live['P000 Frontend'])) == (ben, [7, 8])
+    assert weeks(live['P000 Backend']) == [0]
+    assert client.get(f'/scenarios/{scenario_id}').status_code == 404
+
+def test_commit_after_a_live_edit_is_a_conflict(client, planner):
+    seeded = planner.seed(1)
+    backend = planner.components(seeded['period_id'])['P000 Backend']
+    scenario_id = start(client, seeded['period_id'])
+    client.post(f'/scenarios/{scenario_id}/edits', json={'edits': [
+        {'type': 'weeks', 'component_id': backend['component_id'], 'added_weeks': [9]}]})
+    planner.assign(backend['component_id'], seeded['contributors'][0], [4])
+    assert client.get(f'/scenarios/{scenario_id}').json['stale'] is True
+
+    response = client.post(f'/scenarios/{scenario_id}/commit')
+    assert response.status_code == 409
+    assert live_weeks(planner, seeded['period_id'], 'P000 Backend') == [0, 1, 4]
+    assert client.get(f'/scenarios/{scenario_id}').status_code == 200
+
+@pytest.mark.parametrize('bad_edit', [
+    {'type': 'shift_weeks', 'offset': 'later'},
+    {'type': 'estimated_weeks', 'estimated_weeks': 'five'},
+    {'type': 'weeks', 'added_weeks': ['3']},
+    {'type': 'weeks', 'added_weeks': 3},
+])
+def test_malformed_edit_rolls_back_the_earlier_ones(client, planner, bad_edit):
+    seeded = planner.seed(1)
+    backend = planner.components(seeded['period_id'])['P000 Backend']
+    scenario_id = start(client, seeded['period_id'])
+    response = client.post(f'/scenarios/{scenario_id}/edits', json={'edits': [
+        {'type': 'weeks', 'component_id': backend['component_id'], 'added_weeks': [6]},
+        {'component_id': backend['component_id'], **bad_edit},
+    ]})
+    assert response.status_code == 400
+    assert response.json['index'] == 1
+    assert client.get(f'/scenarios/{scenario_id}').json['changes'] == []
+
+@pytest.mark.parametrize('body', [{}, {'edits': 'none'}])
+def test_edits_must_be_a_list(client, planner, body):
+    seeded = planner.seed(1)
+    scenario_id = start(client, seeded['period_id'])
+    assert client.post(f'/scenarios/{scenario_id}/edits', json=body).status_code == 400
@@ -0,0 +1,85 @@
+def planned_weeks(planner, period_id):
+    return {name: [week for week, assigned in enumerate(component['assignments']) if assigned]
+            for name, component in planner.components(period_id).items()}
+
+def test_preview_writes_nothing(client, planner):
+    seeded = planner.seed(2)
+    before = planned_weeks(planner, seeded['period_id'])
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': False})
+    assert response.status_code == 200
+    assert response.json['applied'] is False
+    assert response.json['plan']
+    assert planned_weeks(planner, seeded['period_id']) == before
+
+def test_apply_writes_the_previewed_plan(client, planner):
+    seeded = planner.seed(2)
+    before = planned_weeks(planner, seeded['period_id'])
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': True, 'plan': plan})
+    assert response.status_code == 200
+    assert response.json['applied'] is True
+    expected = dict(before)
+    for item in plan:
+        expected[item['component_name']] = sorted(set(before[item['component_name']]) | set(item['added_weeks']))
+    assert planned_weeks(planner, seeded['period_id']) == expected
+
+def test_apply_after_concurrent_edit_is_a_conflict(client, planner):
+    seeded = planner.seed(2)
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    item = next(item for item in plan if not item['assign_contributor'])
+    before = planned_weeks(planner, seeded['period_id'])
+    # Someone else books the contributor on the planned component meanwhile
+    free_week = next(week for week in range(13) if week not in before[item['component_name']] + item['added_weeks'])
+    assert planner.assign(item['component_id'], item['contributor_id'], [free_week]).status_code == 201
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': True, 'plan': plan})
+    assert response.status_code == 409
+    after = planned_weeks(planner, seeded['period_id'])
+    assert after[item['component_name']] == sorted(before[item['component_name']] + [free_week])
+
+def test_apply_rejects_components_of_another_period(client, planner):
+    seeded = planner.seed(1)
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    other_period_id = planner.period('Q2')
+    response = client.post(f"/period/{other_period_id}/auto_plan", json={'apply': True, 'plan': plan})
+    assert response.status_code == 400
+
+def test_apply_rejects_items_without_a_version(client, planner):
+    seeded = planner.seed(1)
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    for item in plan:
+        del item['version']
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': True, 'plan': plan})
+    assert response.status_code == 400
+
+def test_apply_rejects_a_contributor_the_component_does_not_have(client, planner):
+    seeded = planner.seed(2)
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    item = next(item for item in plan if not item['assign_contributor'])
+    item['contributor_id'] = next(contributor_id for contributor_id in seeded['contributors'] if contributor_id != item['contributor_id'])
+    before = planned_weeks(planner, seeded['period_id'])
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': True, 'plan': plan})
+    assert response.status_code == 400
+    assert planned_weeks(planner, seeded['period_id']) == before
+
+def test_apply_rejects_a_plan_that_double_books_a_contributor(client, planner):
+    seeded = planner.seed(2)
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    item = next(item for item in plan if item['added_weeks'])
+    before = planned_weeks(planner, seeded['period_id'])
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': True, 'plan': plan + [dict(item)]})
+    assert response.status_code == 400
+    assert planned_weeks(planner, seeded['period_id']) == before
+
+def test_apply_after_the_contributor_was_booked_elsewhere_is_a_conflict(client, planner):
+    seeded = planner.seed(2)
+    plan = client.post(f"/period/{seeded['period_id']}/auto_plan", json={}).json['plan']
+    item = next(item for item in plan if item['added_weeks'])
+    # The contributor is booked on a component outside the plan meanwhile
+    planner.project(seeded['period_id'], 'P002', [seeded['skills']['Backend']])
+    other = planner.components(seeded['period_id'])['P002 Backend']
+    assert planner.assign(other['component_id'], item['contributor_id'], [item['added_weeks'][0]]).status_code == 201
+    before = planned_weeks(planner, seeded['period_id'])
+    response = client.post(f"/period/{seeded['period_id']}/auto_plan", json={'apply': True, 'plan': plan})
+    assert response.status_code == 409
+    assert [component['component_id'] for component in response.json['components']] == [other['component_id']]
+    assert planned_weeks(planner, seeded['period_id']) == before
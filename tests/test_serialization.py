@@ -0,0 +1,48 @@
+import json
+import pytest
+import serialization
+from serialization import encode_weeks
+
+def test_week_encodings():
+    chart = [False, True, True] + [False] * 10
+    assert encode_weeks(chart, 'bits') == '0110000000000'
+    assert encode_weeks(chart, 'rle') == [1, 2, 10]
+    assert encode_weeks([True, False], 'rle') == [0, 1, 1]
+    assert encode_weeks(chart, None) == chart
+
+@pytest.mark.parametrize('request_kwargs', [{'query_string': {'weeks': 'bits'}}, {'headers': {'Accept': 'application/json; weeks=bits'}}])
+def test_projects_in_compact_encoding(client, planner, request_kwargs):
+    seeded = planner.seed(1)
+    plain = client.get(f"/period/{seeded['period_id']}/projects")
+    compact = client.get(f"/period/{seeded['period_id']}/projects", **request_kwargs)
+    backend = compact.json['projects'][0]['components'][0]
+    assert backend['assignments'] == '1100000000000'
+    assert compact.headers['ETag'] != plain.headers['ETag']
+    assert 'Accept' in compact.headers['Vary']
+
+def test_unknown_encoding_falls_back_to_booleans(client, planner):
+    seeded = planner.seed(1)
+    response = client.get(f"/period/{seeded['period_id']}/projects?weeks=hex")
+    assert response.json['projects'][0]['components'][0]['assignments'][:3] == [True, True, False]
+
+@pytest.mark.parametrize('app_config', [{'JSON_PROVIDER': 'default'}])
+def test_default_provider_writes_the_same_documents(app, client, planner):
+    seeded = planner.seed(2)
+    urls = ['/periods', f"/period/{seeded['period_id']}/projects", f"/period/{seeded['period_id']}/capacity"]
+    default = [client.get(url).json for url in urls]
+    app.config['JSON_PROVIDER'] = 'orjson'
+    serialization.init_app(app)
+    assert type(app.json).__name__ == 'OrjsonProvider'
+    assert [client.get(url).json for url in urls] == default
+    assert client.get('/periods').json[0]['start_date'] == 'Mon, 03 Feb 2025 00:00:00 GMT'
+
+@pytest.mark.parametrize('app_config', [{'JSON_PROVIDER': 'default'}])
+def test_orjson_writes_non_ascii_as_utf8(app, client, planner):
+    planner.skill('Ünïcode')
+    default = client.get('/skills').get_data()
+    app.config['JSON_PROVIDER'] = 'orjson'
+    serialization.init_app(app)
+    response = client.get('/skills')
+    assert b'\\u00dcn\\u00efcode' in default
+    assert 'Ünïcode'.encode() in response.get_data()
+    assert response.json == json.loads(default)
@@ -0,0 +1,43 @@
+from conftest import count_queries
+from models import db, Component
+from utils import weeks_to_mask
+
+def stored_masks(planner, period_id):
+    components = planner.components(period_id)
+    masks = dict(db.session.query(Component.component_id, Component.week_mask))
+    return {name: masks[component['component_id']] for name, component in components.items()}
+
+def assigned(component):
+    return [week for week, is_set in enumerate(component['assignments']) if is_set]
+
+def test_week_mask_follows_every_kind_of_week_edit(client, planner):
+    seeded = planner.seed(2)
+    components = planner.components(seeded['period_id'])
+    ada, ben = seeded['contributors']
+    client.post('/assignments/bulk', json={'changes': [
+        {'component_id': components['P000 Backend']['component_id'], 'contributor_id': ada, 'added_weeks': [5, 12], 'removed_weeks': [0]},
+        {'component_id': components['P000 Frontend']['component_id'], 'contributor_id': ben, 'added_weeks': [3], 'removed_weeks': []},
+    ]})
+    client.delete(f"/component/{components['P001 Backend']['component_id']}/assignments")
+
+    masks = stored_masks(planner, seeded['period_id'])
+    for name, component in planner.components(seeded['period_id']).items():
+        assert masks[name] == weeks_to_mask(assigned(component)), name
+    assert masks['P000 Backend'] == weeks_to_mask([1, 5, 12])
+    assert masks['P001 Backend'] == 0
+
+def test_bitmap_reads_match_assignment_rows(app, client, planner):
+    seeded = planner.seed(4)
+    period_id = seeded['period_id']
+    urls = [f'/period/{period_id}/projects', f'/period/{period_id}/projects?include=summary',
+            f'/period/{period_id}/contributor_chart', f'/period/{period_id}/export']
+    from_rows = [client.get(url).get_data() for url in urls]
+    app.config['USE_WEEK_BITMAP'] = True
+    assert [client.get(url).get_data() for url in urls] == from_rows
+
+def test_bitmap_listing_skips_the_assignment_rows(app, client, planner):
+    seeded = planner.seed(2)
+    app.config['USE_WEEK_BITMAP'] = True
+    with count_queries() as statements:
+        assert client.get(f"/period/{seeded['period_id']}/projects").status_code == 200
+    assert not any('FROM assignments' in statement for statement in statements)
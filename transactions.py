@@ -0,0 +1,97 @@
+"""Request-scoped unit of work.
+
+Model methods only stage changes on the session; a route commits once when
+it is done. Anything still staged when a request ends without that commit,
+because the handler raised or answered with an error, is rolled back so none
+of it reaches the database or the change listeners.
+
+Composite edits go through apply_batch, which applies a list of actions in
+order inside the request's transaction:
+
+    {"type": "assign_contributor", "component_id": ..., "contributor_id": ...}
+    {"type": "weeks", "component_id": ..., "contributor_id": ..., "added_weeks": [...], "removed_weeks": [...]}
+    {"type": "clear_assignments", "component_id": ...}
+    {"type": "estimated_weeks", "component_id": ..., "estimated_weeks": ...}
+
+Any action may carry the component "version" the client saw. It is checked
+against the state before the batch, so later actions on the same component
+need not know what the earlier ones did to it.
+"""
+from models import db, Component, Assignment, record_event
+
+class BatchError(Exception):
+    def __init__(self, index, message):
+        super().__init__(message)
+        self.index = index
+
+def _assign_contributor(component, action):
+    component.assign_contributor(action['contributor_id'])
+
+def _weeks(component, action):
+    Assignment.apply_week_changes([{
+        'component_id': component.component_id,
+        'contributor_id': action['contributor_id'],
+        'added_weeks': action.get('added_weeks', []),
+        'removed_weeks': action.get('removed_weeks', [])
+    }])
+    # apply_week_changes bumps the version with a bulk UPDATE the loaded
+    # object does not see
+    db.session.expire(component, ['version'])
+
+def _clear_assignments(component, action):
+    component.clear_assignments()
+
+def _estimated_weeks(component, action):
+    component.estimated_weeks = action['estimated_weeks']
+    record_event({'type': 'estimated_weeks', 'component_id': str(component.component_id), 'estimated_weeks': action['estimated_weeks']})
+
+ACTIONS = {
+    'assign_contributor': _assign_contributor,
+    'weeks': _weeks,
+    'clear_assignments': _clear_assignments,
+    'estimated_weeks': _estimated_weeks,
+}
+
+def apply_batch(actions):
+    # Raises VersionConflict before anything is written, or BatchError naming
+    # the first action that could not be applied; the caller rolls back
+    for index, action in enumerate(actions):
+        if action.get('type') not in ACTIONS:
+            raise BatchError(index, f"Unknown action type {action.get('type')!r}")
+        if not action.get('component_id'):
+            raise BatchError(index, "component_id is required")
+
+    expected = {}
+    for action in actions:
+        if action.get('version') is not None:
+            expected.setdefault(str(action['component_id']), action['version'])
+    component_ids = {str(action['component_id']) for action in actions}
+    # Checks every expected version and locks the rows in one statement,
+    # before any component is loaded into the session
+    Component.claim_versions(component_ids, expected)
+
+    components = {str(component.component_id): component for component in (db.session.query(Component)
+    .filter(Component.component_id.in_(component_ids)))}
+    for index, action in enumerate(actions):
+        component = components.get(str(action['component_id']))
+        if component is None:
+            raise BatchError(index, "Component not found")
+        try:
+            ACTIONS[action['type']](component, action)
+        except (KeyError, ValueError) as error:
+            raise BatchError(index, str(error) if isinstance(error, ValueError) else f"{error.args[0]} is required")
+
+    charts = {str(chart['component_id']): chart for chart in Assignment.get_week_charts(component_ids)}
+    return [{**component.to_dict(), **charts[component_id]} for component_id, component in components.items()]
+
+def init_app(app):
+    @app.after_request
+    def rollback_failed(response):
+        if response.status_code >= 400:
+            db.session.rollback()
+        return response
+
+    @app.teardown_request
+    def rollback_unfinished(error=None):
+        if error is not None:
+            db.session.rollback()
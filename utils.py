@@ -1,2 +1,25 @@
+# Week bitmaps are stored in a signed BIGINT, so only the first 63 weeks of a
+# period fit; longer periods fall back to the assignments rows.
+MAX_BITMAP_WEEKS = 63
 
+def weeks_to_mask(weeks):
+    # Like Component.refresh_week_masks, weeks past the bitmap are left out:
+    # periods that long never read the mask, and bit 63 would overflow BIGINT
+    mask = 0
+    for week in weeks:
+        if week < MAX_BITMAP_WEEKS:
+            mask |= 1 << week
+    return mask
 
+# Week charts for every byte value, so decoding costs one lookup per 8 weeks
+_BYTE_CHARTS = [[bool(byte >> bit & 1) for bit in range(8)] for byte in range(256)]
+
+def mask_to_chart(mask, num_weeks):
+    chart = []
+    for shift in range(0, num_weeks, 8):
+        chart += _BYTE_CHARTS[mask >> shift & 0xFF]
+    del chart[num_weeks:]
+    return chart
+
+def count_weeks(mask):
+    return bin(mask).count('1')
@@ -0,0 +1,36 @@
+from flask import current_app, request, make_response
+from models import ChangeVersion
+from response_cache import response_cache
+
+def conditional_response(scopes, build, cache_key=None, variant=None):
+    """Tags a read with the change versions of the scopes it depends on.
+
+    A client that sends back the current ETag in If-None-Match gets a 304
+    without build ever running. build receives the versions it was tagged
+    with and returns a normal view result. With a cache_key, whose first item
+    is the period id, the serialized body is kept in the response cache. A
+    variant, such as a compact week encoding, gets its own ETag and cache
+    entry.
+    """
+    versions = ChangeVersion.get_versions(scopes)
+    etag = 'v' + '.'.join(str(versions[scope]) for scope in scopes)
+    if variant:
+        etag += '-' + variant
+        if cache_key:
+            cache_key = cache_key + (variant,)
+    body = None
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    elif cache_key and (body := response_cache.get(cache_key, versions)) is not None:
+        response = current_app.response_class(body, mimetype='application/json')
+    else:
+        response = make_response(build(versions))
+        if response.status_code != 200:
+            return response
+        if cache_key:
+            response_cache.set(cache_key, versions, response.get_data())
+    response.set_etag(etag)
+    if variant:
+        response.vary.add('Accept')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
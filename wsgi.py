@@ -0,0 +1,5 @@
+from app import create_app
+
+# Entry point for production WSGI servers; tables are created once by the
+# gunicorn master (see gunicorn.conf.py), not in every worker.
+app = create_app(create_tables=False)